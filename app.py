@@ -1,22 +1,34 @@
 import asyncio
 import os
+import tempfile
+import weakref
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import base64
 
-from config.config import REDDIT_CONFIG
+from config.config import REDDIT_CONFIG, MAX_PLOT_POINTS, ENTITY_CACHE_PATH
 from src.reddit_client import RedditClient
 from src.text_analysis import TextAnalyzer
 from src.sentiment_analysis import calculate_sentiment_distribution
 from src.entity_analysis import EntityAnalyzer
+from src.entity_index import EntityCache
 from src.visualization import Visualizer
 from src.advanced_visualization import AdvancedVisualizer
 from src.trend_analysis import TrendAnalyzer
 from src.research_export import ResearchExporter
-from src.content_generator import ContentGenerator
+from src.analysis_frame import build_analysis_frame
+from src.time_cube import TimeCube
+from src.render_cache import RenderCache
+from src.plot_reduction import downsample_timeline, density_grid, sparse_points
+from src.streaming_export import write_csv, write_jsonl
+from src.result_store import ResultStore
+from src.payload_archive import PayloadArchive
+from src.sketches import SummarySketch
+from src.generator_pool import warm_up, session_generator
 
 
 st.set_page_config(page_title="Enhanced Reddit Analyzer", page_icon="📊", layout="wide")
@@ -47,19 +59,32 @@ st.caption("Advanced Reddit analysis with research-grade visualizations and tren
 
 @st.cache_resource
 def get_cached_components():
+    # One render cache shared by the visualizer and the exporter
+    render_cache = RenderCache()
     return (
-        RedditClient(**REDDIT_CONFIG),
+        RedditClient(**REDDIT_CONFIG, store=ResultStore(), archive=PayloadArchive()),
         TextAnalyzer(),
         EntityAnalyzer(),
         Visualizer(),
-        AdvancedVisualizer(output_dir="streamlit_visualizations"),
+        AdvancedVisualizer(output_dir="streamlit_visualizations", headless=True, render_cache=render_cache),
         TrendAnalyzer(),
-        ResearchExporter(output_dir="streamlit_research_output")
+        ResearchExporter(output_dir="streamlit_research_output", render_cache=render_cache),
+        EntityCache(ENTITY_CACHE_PATH)
     )
 
 
-reddit_client, text_analyzer, entity_analyzer, visualizer, advanced_visualizer, trend_analyzer, research_exporter = get_cached_components()
-content_generator = ContentGenerator()
+reddit_client, text_analyzer, entity_analyzer, visualizer, advanced_visualizer, trend_analyzer, research_exporter, entity_cache = get_cached_components()
+# The LLM client is created once per process in the background; each
+# session gets its own chat context on first use
+warm_up()
+
+
+def get_content_generator():
+    try:
+        return session_generator(st.session_state)
+    except Exception as e:
+        st.info(f"AI content generation is unavailable: {e}")
+        return None
 
 # Sidebar for analysis options
 st.sidebar.header("📊 Analysis Options")
@@ -81,42 +106,38 @@ with col2:
 analyze_clicked = st.button("🔍 Analyze Reddit Data", type="primary")
 
 
-async def analyze(query_text: str, limit_num: int):
+async def analyze(query_text: str, limit_num: int, sketch=None):
+    # Load the spaCy model while the crawl is running
+    entity_analyzer.preload()
     keywords = text_analyzer.extract_keywords(query_text)
     search_query = " ".join(keywords) or query_text
-    results = await reddit_client.search_reddit(search_query, limit=limit_num)
+    results = await reddit_client.search_reddit(search_query, limit=limit_num, sketch=sketch)
     return keywords, results
 
 
-def create_temporal_chart(results):
+def create_temporal_chart(cube):
     """Create interactive temporal trend chart for Streamlit."""
-    df = pd.DataFrame(results)
-    if 'created_utc' not in df.columns:
+    if cube.total == 0:
         return None
     
-    df['created_utc'] = pd.to_datetime(df['created_utc'])
-    df['date'] = df['created_utc'].dt.date
-    
     # Group by date and sentiment
-    temporal_data = df.groupby(['date', 'sentiment']).size().reset_index(name='count')
+    temporal_data = cube.counts(['date', 'sentiment']).reset_index(name='count')
+    temporal_data = downsample_timeline(temporal_data, 'date', 'count', 'sentiment', MAX_PLOT_POINTS)
     
     fig = px.line(temporal_data, x='date', y='count', color='sentiment',
                  title='Reddit Activity Trends Over Time',
-                 labels={'count': 'Number of Posts/Comments', 'date': 'Date'})
+                 labels={'count': 'Number of Posts/Comments', 'date': 'Date'},
+                 render_mode='webgl')
     
     fig.update_layout(height=400)
     return fig
 
-def create_subreddit_chart(results):
+def create_subreddit_chart(cube):
     """Create subreddit comparison chart."""
-    df = pd.DataFrame(results)
-    if 'subreddit' not in df.columns:
+    if cube.total == 0:
         return None
     
-    subreddit_stats = df.groupby('subreddit').agg({
-        'score': ['count', 'mean'],
-        'sentiment': lambda x: (x == 'positive').mean() * 100
-    }).round(2)
+    subreddit_stats = cube.summary('subreddit')[['count', 'avg_score', 'positive_pct']].round(2)
     
     subreddit_stats.columns = ['post_count', 'avg_score', 'positive_pct']
     top_subreddits = subreddit_stats.nlargest(10, 'post_count').reset_index()
@@ -129,27 +150,98 @@ def create_subreddit_chart(results):
     fig.update_layout(height=400, xaxis_tickangle=-45)
     return fig
 
-def create_engagement_scatter(results):
-    """Create engagement scatter plot."""
-    posts = [r for r in results if r.get('type') == 'post']
-    if not posts:
-        return None
+def create_engagement_scatter(frame, max_points=MAX_PLOT_POINTS):
+    """Create engagement scatter plot.
     
-    df = pd.DataFrame(posts)
-    required_cols = ['score', 'num_comments', 'upvote_ratio']
-    if not all(col in df.columns for col in required_cols):
+    Above ``max_points`` posts the chart becomes a binned density heatmap
+    plus WebGL markers for the posts in sparse cells, so the payload sent
+    to the browser no longer grows with the number of posts.
+    """
+    df = frame[frame['type'] == 'post']
+    if df.empty:
         return None
     
-    fig = px.scatter(df, x='score', y='num_comments', color='upvote_ratio',
-                    size='upvote_ratio', hover_data=['title'],
-                    title='Post Engagement: Score vs Comments',
-                    color_continuous_scale='viridis')
+    if len(df) <= max_points:
+        fig = px.scatter(df, x='score', y='num_comments', color='upvote_ratio',
+                        size='upvote_ratio', hover_data=['title'],
+                        title='Post Engagement: Score vs Comments',
+                        color_continuous_scale='viridis', render_mode='webgl')
+        fig.update_layout(height=400)
+        return fig
     
-    fig.update_layout(height=400)
+    counts, means, x_edges, y_edges = density_grid(df['score'], df['num_comments'], bins=60,
+                                                   values=df['upvote_ratio'])
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=np.where(counts > 0, counts, np.nan),
+        customdata=means,
+        colorscale='viridis',
+        colorbar=dict(title='Posts'),
+        hovertemplate='Score: %{x:.0f}<br>Comments: %{y:.0f}<br>Posts: %{z}'
+                      '<br>Mean upvote ratio: %{customdata:.2f}<extra></extra>'
+    ))
+    
+    # Outliers in near-empty cells stay visible (and hoverable) as raw points
+    outliers = df[sparse_points(df['score'], df['num_comments'], x_edges, y_edges, counts)]
+    outliers = outliers.nlargest(max_points // 10, 'score')
+    fig.add_trace(go.Scattergl(
+        x=outliers['score'], y=outliers['num_comments'], mode='markers',
+        marker=dict(size=5, color='rgba(255, 80, 80, 0.8)'),
+        text=outliers['title'], name='Outliers',
+        hovertemplate='%{text}<br>Score: %{x}<br>Comments: %{y}<extra></extra>'
+    ))
+    
+    fig.update_layout(height=400, title=f'Post Engagement: Score vs Comments ({len(df):,} posts, binned)',
+                      xaxis_title='score', yaxis_title='num_comments', showlegend=False)
     return fig
 
+def _remove_files(paths):
+    for path in paths.values():
+        if os.path.exists(path):
+            os.remove(path)
+    paths.clear()
+
+class ExportFiles:
+    def __init__(self):
+        """Temp export files of one session, keyed by format.
+        
+        The files are removed when a new analysis starts, when the session
+        state is dropped (the browser session ends) and at interpreter exit.
+        """
+        self.paths = {}
+        weakref.finalize(self, _remove_files, self.paths)
+
+    def clear(self):
+        _remove_files(self.paths)
+
+def export_file(kind, records):
+    """Gzipped temp file with the current results as CSV or JSON Lines, written once per analysis.
+    
+    Download buttons read from this file instead of rebuilding the export
+    as an in-memory string on every rerun. Streamlit still sends the file
+    contents with every render of the button, so the exports are offered
+    compressed to keep that payload small.
+    """
+    files = st.session_state.setdefault('export_files', ExportFiles()).paths
+    path = files.get(kind)
+    if path is None or not os.path.exists(path):
+        fd, path = tempfile.mkstemp(suffix=f'.{kind}.gz')
+        os.close(fd)
+        writer = write_csv if kind == 'csv' else write_jsonl
+        writer(records, path)
+        files[kind] = path
+    return path
+
+def clear_export_files():
+    """Remove the temp export files of the previous analysis."""
+    files = st.session_state.get('export_files')
+    if files is not None:
+        files.clear()
+
 if analyze_clicked and query:
     # Clear previous export status and auto-generation flags when starting new analysis
+    clear_export_files()
     if 'export_status' in st.session_state:
         st.session_state.export_status = {}
     if 'export_logs' in st.session_state:
@@ -171,7 +263,8 @@ if analyze_clicked and query:
         progress_bar.progress(20)
         
         # Run the analysis
-        keywords, results = asyncio.run(analyze(query, limit))
+        summary_sketch = SummarySketch()
+        keywords, results = asyncio.run(analyze(query, limit, summary_sketch))
         
         progress_bar.progress(60)
         status_text.text(f"📊 Processing {len(results) if results else 0} results...")
@@ -191,7 +284,8 @@ if analyze_clicked and query:
         status_text.text("🔄 Retrying with new event loop...")
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
-        keywords, results = loop.run_until_complete(analyze(query, limit))
+        summary_sketch = SummarySketch()
+        keywords, results = loop.run_until_complete(analyze(query, limit, summary_sketch))
         
         progress_bar.progress(100)
         status_text.text("✅ Analysis complete!")
@@ -211,11 +305,20 @@ if analyze_clicked and query:
         st.session_state['analysis_query'] = query
         st.session_state['analysis_keywords'] = keywords
         
+        # One typed frame shared by every chart and table below
+        frame = build_analysis_frame(results)
+        cube = TimeCube.from_frame(frame)
+        st.session_state['analysis_frame'] = frame
+        
         sentiments = calculate_sentiment_distribution(results)
         texts = [r['text'] for r in results if r.get('text')]
-        combined = " ".join(texts)
-        top_keywords = text_analyzer.extract_top_keywords(combined)
-        entities = entity_analyzer.extract_entities(combined)
+        titles = [r['title'] for r in results if r.get('title')]
+        keyword_counts = text_analyzer.keyword_counts(texts + titles)
+        top_keywords = text_analyzer.extract_top_keywords(counts=keyword_counts)
+        entities = entity_analyzer.merge_entities(
+            entity_analyzer.extract_record_entities(results, cache=entity_cache)
+        )
+        entity_cache.save()
         
         # Create main metrics row
         col1, col2, col3, col4 = st.columns(4)
@@ -274,7 +377,7 @@ if analyze_clicked and query:
             st.subheader("📈 Temporal Trends Analysis")
             
             # Interactive temporal chart
-            temporal_fig = create_temporal_chart(results)
+            temporal_fig = create_temporal_chart(cube)
             if temporal_fig:
                 st.plotly_chart(temporal_fig, use_container_width=True)
             else:
@@ -282,7 +385,7 @@ if analyze_clicked and query:
             
             # Engagement scatter plot
             if analysis_type in ["Advanced Research Analysis", "All Features"]:
-                engagement_fig = create_engagement_scatter(results)
+                engagement_fig = create_engagement_scatter(frame)
                 if engagement_fig:
                     st.subheader("Post Engagement Analysis")
                     st.plotly_chart(engagement_fig, use_container_width=True)
@@ -291,7 +394,7 @@ if analyze_clicked and query:
             st.subheader("🏘️ Subreddit Community Analysis")
             
             # Subreddit comparison chart
-            subreddit_fig = create_subreddit_chart(results)
+            subreddit_fig = create_subreddit_chart(cube)
             if subreddit_fig:
                 st.plotly_chart(subreddit_fig, use_container_width=True)
             else:
@@ -299,31 +402,26 @@ if analyze_clicked and query:
             
             # Community stats table
             if show_tables:
-                df = pd.DataFrame(results)
-                if 'subreddit' in df.columns:
-                    community_stats = df.groupby('subreddit').agg({
-                        'score': ['count', 'mean', 'sum'],
-                        'sentiment': lambda x: (x == 'positive').mean() * 100
-                    }).round(2)
-                    community_stats.columns = ['Posts/Comments', 'Avg Score', 'Total Score', 'Positive %']
-                    st.subheader("Community Statistics")
-                    st.dataframe(community_stats.head(10))
+                community_stats = cube.summary('subreddit')[
+                    ['count', 'avg_score', 'total_score', 'positive_pct']
+                ].round(2)
+                community_stats.columns = ['Posts/Comments', 'Avg Score', 'Total Score', 'Positive %']
+                st.subheader("Community Statistics")
+                st.dataframe(community_stats.head(10))
         
         with tab4:
             st.subheader("📋 Raw Data & Export")
             
             if show_tables:
                 # Display sample data
-                df = pd.DataFrame(results)
                 st.subheader("Sample Data (First 10 rows)")
                 display_cols = ['type', 'title', 'author', 'score', 'sentiment', 'subreddit', 'created_utc']
-                available_cols = [col for col in display_cols if col in df.columns]
-                st.dataframe(df[available_cols].head(10))
+                st.dataframe(frame[display_cols].head(10))
                 
                 # Data summary
                 st.subheader("Data Summary")
-                st.write(f"**Total Records:** {len(df)}")
-                st.write(f"**Date Range:** {df['created_utc'].min()} to {df['created_utc'].max()}" if 'created_utc' in df.columns else "Date information not available")
+                st.write(f"**Total Records:** {len(frame)}")
+                st.write(f"**Date Range:** {frame['created_utc'].min()} to {frame['created_utc'].max()}")
                 st.write(f"**Sentiment Breakdown:** Positive: {sentiments['positive']:.1f}%, Negative: {sentiments['negative']:.1f}%, Neutral: {sentiments['neutral']:.1f}%")
         
         # Research Export Section
@@ -342,32 +440,30 @@ if analyze_clicked and query:
             with col1:
                 st.subheader("📊 Data Export")
                 
-                # CSV Export with immediate download
-                df = pd.DataFrame(results)
-                csv_data = df.to_csv(index=False)
+                # CSV Export with immediate download (streamed to a gzipped temp file once)
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"reddit_analysis_{query.replace(' ', '_')}_{timestamp}.csv"
+                filename = f"reddit_analysis_{query.replace(' ', '_')}_{timestamp}.csv.gz"
                 
-                st.download_button(
-                    label="📥 Download CSV Data",
-                    data=csv_data,
-                    file_name=filename,
-                    mime="text/csv",
-                    help="Download raw data in CSV format"
-                )
+                with open(export_file('csv', results), 'rb') as csv_file:
+                    st.download_button(
+                        label="📥 Download CSV Data",
+                        data=csv_file,
+                        file_name=filename,
+                        mime="application/gzip",
+                        help="Download raw data in CSV format (gzip-compressed)"
+                    )
                 
-                # JSON Export
-                import json
-                json_data = json.dumps(results, indent=2, default=str)
-                json_filename = f"reddit_analysis_{query.replace(' ', '_')}_{timestamp}.json"
+                # JSON Lines Export
+                json_filename = f"reddit_analysis_{query.replace(' ', '_')}_{timestamp}.jsonl.gz"
                 
-                st.download_button(
-                    label="📥 Download JSON Data",
-                    data=json_data,
-                    file_name=json_filename,
-                    mime="application/json",
-                    help="Download raw data in JSON format"
-                )
+                with open(export_file('jsonl', results), 'rb') as json_file:
+                    st.download_button(
+                        label="📥 Download JSON Data",
+                        data=json_file,
+                        file_name=json_filename,
+                        mime="application/gzip",
+                        help="Download raw data in JSON Lines format, one record per line (gzip-compressed)"
+                    )
             
             with col2:
                 st.subheader("📈 Generate Report")
@@ -380,7 +476,7 @@ if analyze_clicked and query:
                     with st.spinner("🔍 Auto-generating trend report..."):
                         try:
                             # Auto-generate trend analysis
-                            trend_results = trend_analyzer.generate_trend_report(results, keywords)
+                            trend_results = trend_analyzer.generate_trend_report(frame, keywords)
                             
                             # Store results in session state
                             st.session_state['trend_results'] = trend_results
@@ -419,7 +515,9 @@ if analyze_clicked and query:
                     with st.spinner("🎨 Auto-creating research visualizations..."):
                         try:
                             # Generate comprehensive report automatically
-                            analysis_tables = advanced_visualizer.create_comprehensive_report(results, keywords)
+                            analysis_tables = advanced_visualizer.create_comprehensive_report(
+                                frame, keywords, word_frequencies=keyword_counts, sketch=summary_sketch
+                            )
                             
                             # Store results
                             st.session_state['visualization_results'] = analysis_tables
@@ -525,13 +623,15 @@ if analyze_clicked and query:
         
         # AI Content Generation
         st.subheader("🤖 AI-Generated Summary Post")
-        content_generator.set_context(topic=query, keywords=top_keywords, sentiment_data=sentiments, entities=entities)
+        content_generator = get_content_generator()
+        if content_generator is not None:
+            content_generator.set_context(topic=query, keywords=top_keywords, sentiment_data=sentiments, entities=entities)
 
-        post = content_generator.generate_content(query=query, keywords=top_keywords, sentiment_data=sentiments)
-        if post and post[0]:
-            st.success(post[0])
-        else:
-            st.info("Could not generate content right now. Try again or adjust the topic.")
+            post = content_generator.generate_content(query=query, keywords=top_keywords, sentiment_data=sentiments)
+            if post and post[0]:
+                st.success(post[0])
+            else:
+                st.info("Could not generate content right now. Try again or adjust the topic.")
     
     else:
         st.error("No results found. Try a different search query or increase the result limit.")
@@ -559,10 +659,16 @@ if user_msg:
     with st.chat_message("user"):
         st.markdown(user_msg)
     with st.chat_message("assistant"):
-        with st.spinner("Thinking…"):
-            reply = content_generator.chat_reply(user_msg)
-            reply = reply or "I'm having trouble responding right now. Please try again."
+        content_generator = get_content_generator()
+        # Tokens are rendered as they arrive instead of after the full reply
+        reply = st.write_stream(content_generator.stream_chat_reply(user_msg)) if content_generator else ""
+        if not reply:
+            reply = "I'm having trouble responding right now. Please try again."
             st.markdown(reply)
+        elif content_generator.chat_metrics:
+            turn = content_generator.chat_metrics[-1]
+            st.caption(f"Prompt ~{turn['prompt_tokens']} tokens · first token {turn['first_chunk_latency']:.2f}s · "
+                       f"total {turn['latency']:.2f}s")
     st.session_state.chat_history.append(("assistant", reply))
 
 
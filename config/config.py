@@ -10,4 +10,24 @@ REDDIT_CONFIG = {
 }
 
 HUGGING_FACE_TOKEN = os.getenv('HUGGING_FACE_HUB_TOKEN')
-NLTK_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'nltk_data') 
\ No newline at end of file
+NLTK_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'nltk_data') 
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cache')
+ENTITY_CACHE_PATH = os.path.join(CACHE_DIR, 'entity_cache.json')
+ENTITY_INDEX_PATH = os.path.join(CACHE_DIR, 'entity_index.npz')
+RENDER_CACHE_DIR = os.path.join(CACHE_DIR, 'renders')
+RENDER_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Charts switch from raw points to binned/downsampled views above this size
+MAX_PLOT_POINTS = int(os.getenv('MAX_PLOT_POINTS', 5000))
+WORDCLOUD_LAYOUT_PATH = os.path.join(CACHE_DIR, 'wordcloud_layout.json')
+RESULT_STORE_PATH = os.path.join(CACHE_DIR, 'results.sqlite3')
+PAYLOAD_ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'archive')
+# Generated posts are cached by prompt fingerprint for this many seconds
+GENERATION_CACHE_DIR = os.path.join(CACHE_DIR, 'generations')
+GENERATION_CACHE_TTL = int(os.getenv('GENERATION_CACHE_TTL', 24 * 3600))
+# 'gemini' or the offline 'stub' backend
+CONTENT_BACKEND = os.getenv('CONTENT_BACKEND', 'gemini')
+# Prompt budget (approximate tokens) for each chat turn
+CHAT_TOKEN_BUDGET = int(os.getenv('CHAT_TOKEN_BUDGET', 2000))
+# Prepared (formatted + tokenized) training datasets and the offline TweetEval snapshot
+TRAINING_CACHE_DIR = os.path.join(CACHE_DIR, 'training')
+TWEET_EVAL_SNAPSHOT_DIR = os.getenv('TWEET_EVAL_SNAPSHOT_DIR', os.path.join(CACHE_DIR, 'tweet_eval'))
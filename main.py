@@ -1,46 +1,96 @@
+import os
+import argparse
 import asyncio
+import matplotlib
 from src.reddit_client import RedditClient
 from src.text_analysis import TextAnalyzer
 from src.sentiment_analysis import calculate_sentiment_distribution
 from src.entity_analysis import EntityAnalyzer
+from src.entity_index import EntityCache, EntityCooccurrenceIndex
+from src.readability import ReadabilityEngine
 from src.visualization import Visualizer
 from src.advanced_visualization import AdvancedVisualizer
 from src.trend_analysis import TrendAnalyzer
 from src.research_export import ResearchExporter
-from src.utils import save_results, read_file
-from config.config import REDDIT_CONFIG
+from src.analysis_frame import build_analysis_frame
+from src.render_cache import RenderCache
+from src.result_store import ResultStore
+from src.payload_archive import PayloadArchive
+from src.utils import save_results
+from src.record_file import write_records, read_records
+from src.sketches import SummarySketch
+from config.config import REDDIT_CONFIG, ENTITY_CACHE_PATH, ENTITY_INDEX_PATH
 from src.content_generator import ContentGenerator
 
-async def main():
+def parse_args():
+    parser = argparse.ArgumentParser(description="Reddit text polarity and sentiment analyser")
+    parser.add_argument('--headless', action='store_true',
+                        help="Render figures off-screen (Agg backend) in parallel instead of showing them")
+    parser.add_argument('--reprocess', action='store_true',
+                        help="Re-run the analysis on the raw payload archive instead of calling the Reddit API")
+    parser.add_argument('--query',
+                        help="Search query (skips the prompt); with --reprocess, only payloads fetched "
+                             "for this query are used")
+    parser.add_argument('--from-records', metavar='PATH',
+                        help="Analyse the results saved by an earlier run (e.g. reddit_results.rrf) "
+                             "instead of calling the Reddit API")
+    parser.add_argument('--zip-package', action='store_true',
+                        help="Also bundle the research package into a single zip file")
+    return parser.parse_args()
+
+async def main(args):
     try:
         # Initialize components
-        reddit_client = RedditClient(**REDDIT_CONFIG)
+        result_store = ResultStore()
+        reddit_client = RedditClient(**REDDIT_CONFIG, store=result_store, archive=PayloadArchive())
         text_analyzer = TextAnalyzer()
         entity_analyzer = EntityAnalyzer()
         visualizer = Visualizer()
-        advanced_visualizer = AdvancedVisualizer()
+        render_cache = RenderCache()
+        if args.headless:
+            matplotlib.use('Agg')
+        advanced_visualizer = AdvancedVisualizer(headless=args.headless, render_cache=render_cache)
         trend_analyzer = TrendAnalyzer()
-        research_exporter = ResearchExporter()
+        research_exporter = ResearchExporter(render_cache=render_cache)
         content_generator = ContentGenerator()
 
         # Get user input
-        input_query = input("Enter your search query: ").strip()
+        input_query = (args.query or input("Enter your search query: ")).strip()
         if not input_query:
             raise ValueError("Search query cannot be empty")
             
-        limit = int(input("Enter number of results per keyword (default 20): ") or 20)
-        if limit < 1:
-            raise ValueError("Limit must be positive")
+        if not (args.reprocess or args.from_records):
+            limit = int(input("Enter number of results per keyword (default 20): ") or 20)
+            if limit < 1:
+                raise ValueError("Limit must be positive")
             
         # Extract and process keywords
         keywords = text_analyzer.extract_keywords(input_query)
         print(f"Extracted Keywords: {keywords}")
         
         search_query = " ".join(keywords)
-        print(f"Searching Reddit for: '{search_query}'")
 
-        # Search Reddit
-        all_results = await reddit_client.search_reddit(search_query, limit=limit)
+        # Load the spaCy model while we wait on the network
+        entity_analyzer.preload()
+
+        # Distinct counts and quantiles for the summary tables, filled while fetching
+        summary_sketch = SummarySketch()
+
+        if args.from_records:
+            # Reuse the records saved by an earlier run as they are
+            print(f"Loading saved results from '{args.from_records}'")
+            all_results = list(read_records(args.from_records))
+            summary_sketch.update(all_results)
+        elif args.reprocess:
+            # Rebuild results from archived payloads (no network)
+            print(f"Reprocessing archived payloads{f' for: {search_query!r}' if args.query else ''}")
+            all_results = reddit_client.records_from_archive(
+                reddit_client.archive, query=search_query if args.query else None, sketch=summary_sketch
+            )
+        else:
+            # Search Reddit
+            print(f"Searching Reddit for: '{search_query}'")
+            all_results = await reddit_client.search_reddit(search_query, limit=limit, sketch=summary_sketch)
 
         if not all_results:
             print("No results found. Analysis cannot be performed.")
@@ -48,7 +98,11 @@ async def main():
 
         # Save results
         save_results(all_results, filename='reddit_results.txt')
-        print("Results saved to 'reddit_results.txt'.")
+        if args.from_records:
+            print("Results saved to 'reddit_results.txt'.")
+        else:
+            write_records(all_results, 'reddit_results.rrf')
+            print("Results saved to 'reddit_results.txt' and 'reddit_results.rrf'.")
 
         # Perform analyses
         sentiment_distribution = calculate_sentiment_distribution(all_results)
@@ -60,15 +114,26 @@ async def main():
             print(f"Neutral: {sentiment_distribution['neutral']:.2f}%")
 
             # Extract and analyze text content
-            text = read_file('reddit_results.txt')
             texts = [r['text'] for r in all_results if r['text']]
             combined_text = " ".join(texts)
+            titles = [r['title'] for r in all_results if r.get('title')]
 
-            # Perform various analyses
-            top_keywords = text_analyzer.extract_top_keywords(text)
+            # Perform various analyses (keywords and the word cloud share these counts)
+            keyword_counts = text_analyzer.keyword_counts(texts + titles)
+            top_keywords = text_analyzer.extract_top_keywords(counts=keyword_counts)
             topics = text_analyzer.perform_topic_analysis(texts)
             readability_scores = entity_analyzer.analyze_readability(combined_text)
-            entities = entity_analyzer.extract_entities(combined_text)
+
+            # Per-record entities; records seen in earlier runs skip NER
+            entity_cache = EntityCache(ENTITY_CACHE_PATH)
+            entity_index = (EntityCooccurrenceIndex.load(ENTITY_INDEX_PATH)
+                            if os.path.exists(ENTITY_INDEX_PATH) else EntityCooccurrenceIndex())
+            record_entities = entity_analyzer.extract_record_entities(
+                all_results, cache=entity_cache, index=entity_index
+            )
+            entities = entity_analyzer.merge_entities(record_entities)
+            entity_cache.save()
+            entity_index.save(ENTITY_INDEX_PATH)
 
             # Display results
             if top_keywords:
@@ -86,6 +151,13 @@ async def main():
                 for metric, score in readability_scores.items():
                     print(f"{metric}: {score:.2f}")
 
+            subreddit_readability = ReadabilityEngine().aggregate(all_results, by='subreddit')
+            if not subreddit_readability.empty:
+                print("\nReadability by Subreddit (top 10 by records):")
+                print(subreddit_readability.nlargest(10, 'records')[
+                    ['records', 'flesch_reading_ease', 'flesch_kincaid_grade']
+                ].to_string())
+
             if entities:
                 print("\nNamed Entities Found:")
                 for entity_type, entity_list in entities.items():
@@ -93,6 +165,27 @@ async def main():
                         print(f"\n{entity_type}:")
                         print(", ".join(set(entity_list)))
 
+            top_pairs = entity_index.top_pairs(10)
+            if top_pairs:
+                print("\nMost Co-mentioned Entities:")
+                for pair in top_pairs:
+                    print(f"{pair['entities'][0]} + {pair['entities'][1]}: "
+                          f"{pair['count']} records, avg sentiment {pair['avg_sentiment']:+.2f}")
+
+            # Neighbourhood of this run's most mentioned entity across the whole index
+            run_ids = [entity_index.lookup(name.strip(), label)
+                       for label, names in entities.items() if label in entity_index.entity_types
+                       for name in names]
+            run_ids = [entity_id for entity_id in run_ids if entity_id is not None]
+            if run_ids:
+                label, name = entity_index.entities[max(run_ids, key=lambda i: entity_index.mentions[i])]
+                co_mentioned = entity_index.top_co_mentioned(name, label, top_n=5)
+                if co_mentioned:
+                    print(f"\nMost Co-mentioned with {name} ({label}):")
+                    for item in co_mentioned:
+                        print(f"{item['entity']} ({item['label']}): "
+                              f"{item['count']} records, avg sentiment {item['avg_sentiment']:+.2f}")
+
             # Generate content
             print("\nGenerating engaging content based on analysis...")
             generated_posts = content_generator.generate_content(
@@ -108,18 +201,33 @@ async def main():
                 print("-" * 50)
 
             # Show basic visualization
-            visualizer.plot_sentiment_distribution(sentiment_distribution)
+            if not args.headless:
+                visualizer.plot_sentiment_distribution(sentiment_distribution)
             
             # Generate comprehensive analysis report
             print("\n" + "="*80)
             print("GENERATING COMPREHENSIVE RESEARCH-READY ANALYSIS")
             print("="*80)
             
+            # Build the typed analysis frame once and share it across stages
+            frame = build_analysis_frame(all_results)
+            
             # Create advanced visualizations and analysis
-            analysis_tables = advanced_visualizer.create_comprehensive_report(all_results, keywords)
+            analysis_tables = advanced_visualizer.create_comprehensive_report(
+                frame, keywords, word_frequencies=keyword_counts, sketch=summary_sketch
+            )
             
             # Generate trend analysis
-            trend_results = trend_analyzer.generate_trend_report(all_results, keywords)
+            trend_results = trend_analyzer.generate_trend_report(frame, keywords)
+            
+            # Subreddit momentum across every stored run (aggregated in SQL)
+            history = trend_analyzer.analyze_history(result_store)
+            print(f"\nStored history: {result_store.count()} posts/comments")
+            top_momentum = sorted(history['subreddit_trends'].items(),
+                                  key=lambda item: item[1]['activity_trend'], reverse=True)[:5]
+            for subreddit, stats in top_momentum:
+                print(f"  r/{subreddit}: {stats['total_activity']} total, "
+                      f"{stats['avg_daily_activity']:.1f}/day, peak {stats['peak_activity']}")
             
             # Create research-ready export package
             print("\n" + "="*80)
@@ -127,7 +235,8 @@ async def main():
             print("="*80)
             
             research_exporter.create_complete_research_package(
-                all_results, analysis_tables, input_query, keywords
+                all_results, analysis_tables, input_query, keywords, frame=frame,
+                zip_package=args.zip_package
             )
 
     except ValueError as e:
@@ -138,4 +247,4 @@ async def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main(parse_args()))
\ No newline at end of file
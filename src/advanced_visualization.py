@@ -3,50 +3,162 @@ import seaborn as sns
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from collections import Counter, defaultdict
-from wordcloud import WordCloud
+from wordcloud import WordCloud, STOPWORDS
 from tabulate import tabulate
 import os
+import time
+import functools
+import multiprocessing
+from matplotlib import cycler
+from concurrent.futures import ProcessPoolExecutor
+from .analysis_frame import as_analysis_frame
+from .time_cube import TimeCube
+from .render_cache import RenderCache
+from .plot_reduction import downsample_timeline
+from .sketches import SpaceSaving
+from .word_frequencies import count_words, as_frequencies, WordCloudLayoutCache
+from config.config import MAX_PLOT_POINTS
+
+# Figures rendered by create_comprehensive_report: method name -> files it writes
+REPORT_FIGURES = {
+    'plot_temporal_trends': ['temporal_trends.png'],
+    'plot_subreddit_analysis': ['subreddit_analysis.png'],
+    'create_engagement_metrics_chart': ['engagement_metrics.png'],
+    'create_word_cloud': ['wordcloud.png'],
+    'create_interactive_timeline': ['interactive_timeline.html']
+}
+
+# Report figures that can reuse a prebuilt TimeCube
+CUBE_FIGURES = {'plot_temporal_trends', 'plot_subreddit_analysis', 'create_interactive_timeline'}
+
+# Word cloud settings (also part of the cached layout's identity)
+WORDCLOUD_SETTINGS = {
+    'width': 1200,
+    'height': 600,
+    'background_color': 'white',
+    'max_words': 100,
+    'colormap': 'viridis'
+}
+
+
+# Style every matplotlib report figure is drawn with (and cached under)
+FIGURE_STYLE = ['default', {'axes.prop_cycle': cycler(color=sns.color_palette('husl').as_hex())}]
+
+# Frame columns the per-record report figures draw from
+ENGAGEMENT_COLUMNS = ['timestamp', 'type', 'score', 'num_comments', 'upvote_ratio', 'sentiment', 'title']
+WORDCLOUD_COLUMNS = ['timestamp', 'text', 'title']
+
+
+def _figure_inputs(name, frame, cube, word_frequencies=None):
+    """The slice of the data one report figure draws, as (data, keyword arguments)."""
+    if name in CUBE_FIGURES:
+        return None, {'cube': cube}
+    if name == 'create_word_cloud':
+        if word_frequencies is not None:
+            return None, {'frequencies': word_frequencies}
+        return frame[WORDCLOUD_COLUMNS], {}
+    return frame.loc[frame['type'] == 'post', ENGAGEMENT_COLUMNS], {}
+
+
+def _styled(method):
+    """Draw under FIGURE_STYLE so figures do not depend on the global rcParams."""
+    @functools.wraps(method)
+    def draw(*args, **kwargs):
+        with plt.style.context(FIGURE_STYLE):
+            return method(*args, **kwargs)
+    return draw
+
+
+def _init_worker():
+    # Only worker processes switch backend; the parent keeps whatever it uses
+    plt.switch_backend('Agg')
+
+
+def _render_figure(name, output_dir, data, kwargs, render_cache=None):
+    """Render one report figure headlessly (runs inside a worker process).
+
+    ``cache_hits``/``cache_misses`` are this call's render cache lookups, so
+    the parent can add a worker's counts to its own cache.
+    """
+    start = time.perf_counter()
+    visualizer = AdvancedVisualizer(output_dir=output_dir, headless=True, render_cache=render_cache)
+    hits, misses = visualizer.render_cache.hits, visualizer.render_cache.misses
+    getattr(visualizer, name)(data, **kwargs)
+    return {
+        'figure': name,
+        'paths': visualizer.written,
+        'seconds': round(time.perf_counter() - start, 3),
+        'cache_hits': visualizer.render_cache.hits - hits,
+        'cache_misses': visualizer.render_cache.misses - misses
+    }
+
 
 class AdvancedVisualizer:
-    def __init__(self, output_dir="visualizations"):
-        """Initialize the advanced visualizer with output directory for saving plots."""
+    def __init__(self, output_dir="visualizations", headless=False, render_cache=None,
+                 max_points=MAX_PLOT_POINTS):
+        """Initialize the advanced visualizer with output directory for saving plots.
+        
+        In headless mode figures are saved and closed instead of shown, so
+        nothing blocks or opens a browser; create_comprehensive_report then
+        renders figures in parallel worker processes (which use Agg).
+        Saved files go through a ``RenderCache``: an unchanged figure is
+        copied from the cache, and in headless mode is not drawn at all.
+        Above ``max_points`` records, scatter plots switch to binned density
+        and timelines are downsampled so chart cost stays bounded.
+        """
         self.output_dir = output_dir
+        self.headless = headless
+        self.max_points = max_points
+        self.layout_cache = WordCloudLayoutCache()
+        self.render_cache = render_cache if render_cache is not None else RenderCache()
+        # Files saved or copied from the render cache by this instance
+        self.written = []
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
         
-        # Set style for matplotlib/seaborn
-        plt.style.use('default')
-        sns.set_palette("husl")
-        
+    def _show(self, fig):
+        """Show a matplotlib figure, or just release it in headless mode."""
+        if self.headless:
+            plt.close(fig)
+        else:
+            plt.show()
+    
+    def _lookup(self, filename, data, spec=None):
+        """Copy an unchanged render from the cache into output_dir; returns (key, hit)."""
+        key = self.render_cache.key(filename, data, spec, style=FIGURE_STYLE)
+        path = os.path.join(self.output_dir, filename)
+        hit = self.render_cache.fetch(key, path)
+        if hit:
+            self.written.append(path)
+        return key, hit
+    
+    def _save(self, fig, filename, key):
+        """Save a figure at 300 DPI and add it to the render cache."""
+        path = os.path.join(self.output_dir, filename)
+        fig.savefig(path, dpi=300, bbox_inches='tight')
+        self.written.append(path)
+        self.render_cache.store(key, path)
+    
     def create_dataframe(self, results):
-        """Convert results to pandas DataFrame for easier analysis."""
-        df_data = []
-        for result in results:
-            df_data.append({
-                'type': result['type'],
-                'author': result['author'],
-                'score': result['score'],
-                'text': result['text'],
-                'sentiment': result['sentiment'],
-                'created_utc': result['created_utc'],
-                'subreddit': result.get('subreddit', 'unknown'),
-                'title': result.get('title', result.get('post_title', '')),
-                'num_comments': result.get('num_comments', 0),
-                'upvote_ratio': result.get('upvote_ratio', 0.5)
-            })
-        return pd.DataFrame(df_data)
+        """Return the shared analysis frame, building it only if given raw results."""
+        return as_analysis_frame(results)
     
-    def plot_temporal_trends(self, results, save=True):
+    @_styled
+    def plot_temporal_trends(self, results, save=True, cube=None):
         """Create time-based trend analysis showing activity over time."""
-        df = self.create_dataframe(results)
+        if cube is None:
+            cube = TimeCube.from_frame(results)
         
         # Group by date and sentiment
-        df['date'] = df['created_utc'].dt.date
-        temporal_data = df.groupby(['date', 'sentiment']).size().unstack(fill_value=0)
+        temporal_data = cube.counts(['date', 'sentiment']).unstack(fill_value=0)
+        daily_total = cube.counts('date')
+        
+        key, cached = self._lookup('temporal_trends.png', [temporal_data, daily_total]) if save else (None, False)
+        if cached and self.headless:
+            return None
         
         # Create the plot
         fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10))
@@ -61,7 +173,6 @@ class AdvancedVisualizer:
         ax1.tick_params(axis='x', rotation=45)
         
         # Plot 2: Daily total activity
-        daily_total = df.groupby('date').size()
         ax2.plot(daily_total.index, daily_total.values, marker='o', linewidth=2, markersize=6)
         ax2.set_title('Total Daily Activity', fontsize=16, fontweight='bold')
         ax2.set_xlabel('Date', fontsize=12)
@@ -70,24 +181,32 @@ class AdvancedVisualizer:
         
         plt.tight_layout()
         
-        if save:
-            plt.savefig(f'{self.output_dir}/temporal_trends.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        if save and not cached:
+            self._save(fig, 'temporal_trends.png', key)
+        self._show(fig)
         
         return fig
     
-    def plot_subreddit_analysis(self, results, save=True):
+    @_styled
+    def plot_subreddit_analysis(self, results, save=True, cube=None):
         """Analyze and visualize subreddit engagement patterns."""
-        df = self.create_dataframe(results)
+        if cube is None:
+            cube = TimeCube.from_frame(results)
         
         # Get top subreddits
-        subreddit_stats = df.groupby('subreddit').agg({
-            'score': ['mean', 'sum', 'count'],
-            'sentiment': lambda x: (x == 'positive').mean() * 100
-        }).round(2)
+        subreddit_stats = cube.summary('subreddit')[
+            ['avg_score', 'total_score', 'count', 'positive_pct']
+        ].round(2)
         
         subreddit_stats.columns = ['avg_score', 'total_score', 'post_count', 'positive_sentiment_pct']
         top_subreddits = subreddit_stats.nlargest(10, 'post_count')
+        sentiment_pivot = cube.counts(['subreddit', 'sentiment']).unstack(fill_value=0)
+        sentiment_pivot_pct = sentiment_pivot.div(sentiment_pivot.sum(axis=1), axis=0) * 100
+        top_sentiment = sentiment_pivot_pct.loc[top_subreddits.index[:8]]
+        
+        key, cached = self._lookup('subreddit_analysis.png', [top_subreddits, top_sentiment]) if save else (None, False)
+        if cached and self.headless:
+            return None, top_subreddits
         
         # Create subplots
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
@@ -111,22 +230,19 @@ class AdvancedVisualizer:
         ax3.tick_params(axis='x', rotation=45)
         
         # Plot 4: Sentiment distribution heatmap
-        sentiment_pivot = df.groupby(['subreddit', 'sentiment']).size().unstack(fill_value=0)
-        sentiment_pivot_pct = sentiment_pivot.div(sentiment_pivot.sum(axis=1), axis=0) * 100
-        top_sentiment = sentiment_pivot_pct.loc[top_subreddits.index[:8]]
-        
         sns.heatmap(top_sentiment, annot=True, fmt='.1f', cmap='RdYlGn', ax=ax4)
         ax4.set_title('Sentiment Distribution Heatmap', fontsize=14, fontweight='bold')
         ax4.set_ylabel('Subreddit')
         
         plt.tight_layout()
         
-        if save:
-            plt.savefig(f'{self.output_dir}/subreddit_analysis.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        if save and not cached:
+            self._save(fig, 'subreddit_analysis.png', key)
+        self._show(fig)
         
         return fig, top_subreddits
     
+    @_styled
     def create_engagement_metrics_chart(self, results, save=True):
         """Create comprehensive engagement metrics visualization."""
         df = self.create_dataframe(results)
@@ -145,18 +261,31 @@ class AdvancedVisualizer:
             posts_df['upvote_ratio'] * 100 * 0.2
         )
         
+        plotted = posts_df[['score', 'num_comments', 'upvote_ratio', 'sentiment', 'engagement_score', 'title']]
+        binned = len(posts_df) > self.max_points
+        key, cached = self._lookup('engagement_metrics.png', plotted, {'binned': binned}) if save else (None, False)
+        if cached and self.headless:
+            return None
+        
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
         
-        # Plot 1: Score vs Comments scatter
-        scatter = ax1.scatter(posts_df['score'], posts_df['num_comments'], 
-                            c=posts_df['upvote_ratio'], cmap='viridis', alpha=0.6, s=60)
+        # Plot 1: Score vs Comments scatter (hexbin of mean upvote ratio for large N)
+        if binned:
+            scatter = ax1.hexbin(posts_df['score'], posts_df['num_comments'], C=posts_df['upvote_ratio'],
+                                 reduce_C_function=np.mean, gridsize=50, mincnt=1, cmap='viridis')
+            ax1.set_title(f'Post Engagement: Score vs Comments ({len(posts_df):,} posts, binned)', fontweight='bold')
+            colorbar_label = 'Mean Upvote Ratio'
+        else:
+            scatter = ax1.scatter(posts_df['score'], posts_df['num_comments'], 
+                                c=posts_df['upvote_ratio'], cmap='viridis', alpha=0.6, s=60)
+            ax1.set_title('Post Engagement: Score vs Comments', fontweight='bold')
+            colorbar_label = 'Upvote Ratio'
         ax1.set_xlabel('Post Score')
         ax1.set_ylabel('Number of Comments')
-        ax1.set_title('Post Engagement: Score vs Comments', fontweight='bold')
-        plt.colorbar(scatter, ax=ax1, label='Upvote Ratio')
+        plt.colorbar(scatter, ax=ax1, label=colorbar_label)
         
         # Plot 2: Engagement by sentiment
-        engagement_by_sentiment = posts_df.groupby('sentiment')['engagement_score'].mean()
+        engagement_by_sentiment = posts_df.groupby('sentiment', observed=True)['engagement_score'].mean()
         engagement_by_sentiment.plot(kind='bar', ax=ax2, color=['red', 'gray', 'green'])
         ax2.set_title('Average Engagement by Sentiment', fontweight='bold')
         ax2.set_ylabel('Engagement Score')
@@ -183,43 +312,67 @@ class AdvancedVisualizer:
         
         plt.tight_layout()
         
-        if save:
-            plt.savefig(f'{self.output_dir}/engagement_metrics.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        if save and not cached:
+            self._save(fig, 'engagement_metrics.png', key)
+        self._show(fig)
         
         return fig
     
-    def create_word_cloud(self, results, save=True):
-        """Generate word cloud from all text content."""
-        df = self.create_dataframe(results)
-        
-        # Combine all text
-        all_text = ' '.join(df['text'].fillna('') + ' ' + df['title'].fillna(''))
-        
-        # Create word cloud
-        wordcloud = WordCloud(
-            width=1200, height=600, 
-            background_color='white',
-            max_words=100,
-            colormap='viridis'
-        ).generate(all_text)
-        
-        plt.figure(figsize=(15, 8))
+    @_styled
+    def create_word_cloud(self, results, save=True, frequencies=None):
+        """Generate word cloud from word frequencies.
+        
+        ``frequencies`` may be an existing keyword Counter, a SpaceSaving
+        sketch, a {word: count} dict or ``extract_top_keywords`` output.
+        Without it, words are counted record by record (with a bounded
+        SpaceSaving sketch above ``max_points`` records). The layout is
+        reused from the previous run while the frequencies barely change.
+        """
+        if frequencies is None:
+            df = self.create_dataframe(results)
+            counter = SpaceSaving(capacity=50 * WORDCLOUD_SETTINGS['max_words']) if len(df) > self.max_points else None
+            counter = count_words(df['text'], STOPWORDS, counter)
+            frequencies = count_words(df['title'], STOPWORDS, counter)
+        frequencies = as_frequencies(frequencies, WORDCLOUD_SETTINGS['max_words'])
+        if not frequencies:
+            print("No words available for the word cloud")
+            return
+        
+        key, cached = self._lookup('wordcloud.png', frequencies, WORDCLOUD_SETTINGS) if save else (None, False)
+        if cached and self.headless:
+            return
+        
+        # Create word cloud, reusing the stored layout when possible
+        wordcloud = WordCloud(**WORDCLOUD_SETTINGS)
+        layout = self.layout_cache.get(frequencies, WORDCLOUD_SETTINGS)
+        if layout is not None:
+            wordcloud.layout_ = layout
+        else:
+            wordcloud.generate_from_frequencies(frequencies)
+            self.layout_cache.put(frequencies, WORDCLOUD_SETTINGS, wordcloud.layout_)
+        
+        fig = plt.figure(figsize=(15, 8))
         plt.imshow(wordcloud, interpolation='bilinear')
         plt.axis('off')
         plt.title('Most Frequent Words in Reddit Content', fontsize=20, fontweight='bold')
         
-        if save:
-            plt.savefig(f'{self.output_dir}/wordcloud.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        if save and not cached:
+            self._save(fig, 'wordcloud.png', key)
+        self._show(fig)
     
-    def create_interactive_timeline(self, results, save=True):
+    def create_interactive_timeline(self, results, save=True, cube=None):
         """Create interactive timeline using Plotly."""
-        df = self.create_dataframe(results)
+        if cube is None:
+            cube = TimeCube.from_frame(results)
         
         # Prepare data for timeline
-        timeline_data = df.groupby([df['created_utc'].dt.date, 'sentiment']).size().reset_index()
+        timeline_data = cube.counts(['date', 'sentiment']).reset_index()
         timeline_data.columns = ['date', 'sentiment', 'count']
+        timeline_data = downsample_timeline(timeline_data, 'date', 'count', 'sentiment', self.max_points)
+        
+        key, cached = self._lookup('interactive_timeline.html', timeline_data) if save else (None, False)
+        if cached and self.headless:
+            return None
         
         # Create interactive plot
         fig = px.line(timeline_data, x='date', y='count', color='sentiment',
@@ -233,15 +386,35 @@ class AdvancedVisualizer:
             legend_title_font_size=14
         )
         
-        if save:
-            fig.write_html(f'{self.output_dir}/interactive_timeline.html')
+        if save and not cached:
+            path = os.path.join(self.output_dir, 'interactive_timeline.html')
+            fig.write_html(path)
+            self.written.append(path)
+            self.render_cache.store(key, path)
         
-        fig.show()
+        if not self.headless:
+            fig.show()
         return fig
     
-    def generate_summary_tables(self, results, keywords=None):
-        """Generate formatted summary tables for research papers."""
-        df = self.create_dataframe(results)
+    def generate_summary_tables(self, results, keywords=None, cube=None, sketch=None):
+        """Generate formatted summary tables for research papers.
+        
+        With a ``SummarySketch`` (and a ``TimeCube``) the tables can be built
+        for streamed or sharded data without the raw records: unique counts
+        come from HyperLogLog and score quantiles from KLL, each reported
+        with its error bound.
+        """
+        if cube is None:
+            cube = TimeCube.from_frame(self.create_dataframe(results))
+        if sketch is not None:
+            distinct_error = sketch.authors.relative_error * 100
+            unique_authors = f"~{sketch.authors.count()} (±{distinct_error:.1f}%)"
+            unique_subreddits = f"~{sketch.subreddits.count()} (±{distinct_error:.1f}%)"
+        else:
+            unique_authors = self.create_dataframe(results)['author'].nunique()
+            unique_subreddits = len(cube.counts('subreddit'))
+        type_counts = cube.counts('type')
+        first_date, last_date = cube.date_range()
         
         print("="*80)
         print("REDDIT ANALYSIS SUMMARY TABLES")
@@ -252,21 +425,32 @@ class AdvancedVisualizer:
             'Metric': ['Total Posts', 'Total Comments', 'Unique Authors', 'Unique Subreddits',
                       'Average Score', 'Date Range'],
             'Value': [
-                len(df[df['type'] == 'post']),
-                len(df[df['type'] == 'comment']),
-                df['author'].nunique(),
-                df['subreddit'].nunique(),
-                f"{df['score'].mean():.2f}",
-                f"{df['created_utc'].min().date()} to {df['created_utc'].max().date()}"
+                int(type_counts.get('post', 0)),
+                int(type_counts.get('comment', 0)),
+                unique_authors,
+                unique_subreddits,
+                f"{cube.score_sum.sum() / max(cube.total, 1):.2f}",
+                f"{first_date} to {last_date}"
             ]
         }
         
+        if sketch is not None:
+            rank_error = sketch.scores.rank_error * 100
+            median_score, p90_score = sketch.scores.quantiles([0.5, 0.9])
+            median_engagement = sketch.engagement.quantile(0.5)
+            basic_stats['Metric'].extend(['Median Score', '90th Percentile Score', 'Median Post Engagement'])
+            basic_stats['Value'].extend([
+                f"{median_score:.2f} (±{rank_error:.1f}% rank)",
+                f"{p90_score:.2f} (±{rank_error:.1f}% rank)",
+                f"{median_engagement:.2f} (±{rank_error:.1f}% rank)" if median_engagement is not None else "N/A"
+            ])
+        
         print("\nTable 1: Basic Statistics")
         print(tabulate(basic_stats, headers='keys', tablefmt='grid'))
         
         # Table 2: Sentiment Distribution
-        sentiment_stats = df['sentiment'].value_counts()
-        sentiment_pct = df['sentiment'].value_counts(normalize=True) * 100
+        sentiment_stats = cube.counts('sentiment').sort_values(ascending=False, kind='stable')
+        sentiment_pct = sentiment_stats / sentiment_stats.sum() * 100
         
         sentiment_table = {
             'Sentiment': sentiment_stats.index,
@@ -278,10 +462,9 @@ class AdvancedVisualizer:
         print(tabulate(sentiment_table, headers='keys', tablefmt='grid'))
         
         # Table 3: Top Subreddits
-        subreddit_stats = df.groupby('subreddit').agg({
-            'score': ['count', 'mean', 'sum'],
-            'sentiment': lambda x: (x == 'positive').mean() * 100
-        }).round(2)
+        subreddit_stats = cube.summary('subreddit')[
+            ['count', 'avg_score', 'total_score', 'positive_pct']
+        ].round(2)
         
         subreddit_stats.columns = ['Posts/Comments', 'Avg Score', 'Total Score', 'Positive %']
         top_subreddits = subreddit_stats.nlargest(10, 'Posts/Comments')
@@ -290,10 +473,7 @@ class AdvancedVisualizer:
         print(tabulate(top_subreddits, headers='keys', tablefmt='grid'))
         
         # Table 4: Daily Activity Summary
-        daily_activity = df.groupby(df['created_utc'].dt.date).agg({
-            'score': ['count', 'mean'],
-            'sentiment': lambda x: (x == 'positive').mean() * 100
-        }).round(2)
+        daily_activity = cube.summary('date')[['count', 'avg_score', 'positive_pct']].round(2)
         
         daily_activity.columns = ['Daily Posts/Comments', 'Avg Daily Score', 'Daily Positive %']
         
@@ -329,19 +509,85 @@ class AdvancedVisualizer:
             'daily_activity': daily_activity
         }
     
-    def create_comprehensive_report(self, results, keywords=None):
-        """Generate a comprehensive visual and statistical report."""
+    def render_figures(self, results, cube=None, parallel=True, max_workers=None, word_frequencies=None):
+        """Render every report figure headlessly and return paths and timings.
+        
+        Figures are independent, so with ``parallel=True`` each one renders
+        in its own worker process and the total time is roughly that of the
+        slowest figure. Workers are spawned rather than forked, since the
+        caller (e.g. the Streamlit server) may hold threads and locks. Each
+        worker is sent only the data its figure draws and its render cache
+        hits/misses are added to this visualizer's cache; figures whose
+        worker fails are rendered again in this process. ``paths`` lists the
+        files written by this call.
+        """
+        frame = self.create_dataframe(results)
+        if cube is None:
+            cube = TimeCube.from_frame(frame)
+        
+        names = list(REPORT_FIGURES)
+        if word_frequencies is not None:
+            # Only the words that can appear in the cloud are sent to the workers
+            word_frequencies = as_frequencies(word_frequencies, WORDCLOUD_SETTINGS['max_words'])
+        inputs = {name: _figure_inputs(name, frame, cube, word_frequencies) for name in names}
+        start = time.perf_counter()
+        renders = {}
+        if parallel:
+            try:
+                with ProcessPoolExecutor(max_workers=max_workers or len(names),
+                                         mp_context=multiprocessing.get_context('spawn'),
+                                         initializer=_init_worker) as pool:
+                    futures = {name: pool.submit(_render_figure, name, self.output_dir, *inputs[name],
+                                                 self.render_cache)
+                               for name in names}
+                    for name, future in futures.items():
+                        try:
+                            renders[name] = future.result()
+                            self.render_cache.hits += renders[name]['cache_hits']
+                            self.render_cache.misses += renders[name]['cache_misses']
+                        except Exception as e:
+                            print(f"Rendering {name} in a worker failed ({e}); retrying in this process")
+            except Exception as e:
+                print(f"Parallel rendering failed ({e}); rendering sequentially")
+        for name in names:
+            if name not in renders:
+                renders[name] = _render_figure(name, self.output_dir, *inputs[name], self.render_cache)
+        renders = [renders[name] for name in names]
+        
+        print(f"Rendered {len(renders)} figures in {time.perf_counter() - start:.2f}s:")
+        for render in renders:
+            print(f"  - {render['figure']}: {render['seconds']:.2f}s")
+        
+        return renders
+    
+    def create_comprehensive_report(self, results, keywords=None, word_frequencies=None, sketch=None):
+        """Generate a comprehensive visual and statistical report.
+        
+        ``word_frequencies`` (e.g. the keyword counter from TextAnalyzer)
+        lets the word cloud skip counting words again; ``sketch`` is the
+        SummarySketch filled while fetching, used for the summary tables.
+        """
         print("Generating comprehensive Reddit analysis report...")
         
+        # Build the shared frame and aggregation cube once for every figure and table
+        results = self.create_dataframe(results)
+        cube = TimeCube.from_frame(results)
+        
         # Create all visualizations
-        self.plot_temporal_trends(results)
-        subreddit_fig, subreddit_data = self.plot_subreddit_analysis(results)
-        self.create_engagement_metrics_chart(results)
-        self.create_word_cloud(results)
-        self.create_interactive_timeline(results)
+        if self.headless:
+            renders = self.render_figures(results, cube=cube, word_frequencies=word_frequencies)
+        else:
+            renders = None
+            self.plot_temporal_trends(results, cube=cube)
+            subreddit_fig, subreddit_data = self.plot_subreddit_analysis(results, cube=cube)
+            self.create_engagement_metrics_chart(results)
+            self.create_word_cloud(results, frequencies=word_frequencies)
+            self.create_interactive_timeline(results, cube=cube)
         
         # Generate summary tables
-        tables = self.generate_summary_tables(results, keywords)
+        tables = self.generate_summary_tables(results, keywords, cube=cube, sketch=sketch)
+        if renders is not None:
+            tables['rendered_figures'] = renders
         
         print(f"\nComprehensive report generated! Check the '{self.output_dir}' folder for:")
         print("- temporal_trends.png: Time-based activity analysis")
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+SENTIMENT_CATEGORIES = ['negative', 'neutral', 'positive']
+TYPE_CATEGORIES = ['post', 'comment']
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+FRAME_COLUMNS = [
+    'type', 'author', 'score', 'text', 'title', 'sentiment', 'subreddit',
+    'created_utc', 'timestamp', 'date', 'hour', 'day_of_week',
+    'num_comments', 'upvote_ratio', 'id', 'post_id', 'url'
+]
+
+
+def build_analysis_frame(results):
+    """Build the canonical typed DataFrame shared by every analysis stage.
+
+    ``subreddit``, ``sentiment``, ``type``, ``date`` and ``day_of_week`` are
+    categorical, ``timestamp`` holds int64 epoch seconds, and ``date``,
+    ``hour`` and ``day_of_week`` are precomputed from ``created_utc`` so
+    downstream stages never re-parse timestamps. Group-bys on the categorical
+    columns should pass ``observed=True``.
+    """
+    created = pd.to_datetime([r.get('created_utc') for r in results])
+    timestamp = created.values.astype('datetime64[s]').astype(np.int64)
+    days = timestamp // 86400
+
+    df = pd.DataFrame({
+        'type': pd.Categorical([r.get('type', 'post') for r in results], categories=TYPE_CATEGORIES),
+        'author': [r.get('author', '') for r in results],
+        'score': np.array([r.get('score', 0) or 0 for r in results], dtype=np.int64),
+        'text': [r.get('text', '') or '' for r in results],
+        'title': [r.get('title', r.get('post_title', '')) or '' for r in results],
+        'sentiment': pd.Categorical([r.get('sentiment', 'neutral') for r in results],
+                                    categories=SENTIMENT_CATEGORIES),
+        'subreddit': pd.Categorical([r.get('subreddit', 'unknown') for r in results]),
+        'created_utc': created,
+        'timestamp': timestamp,
+        'date': pd.Categorical(created.date),
+        'hour': ((timestamp // 3600) % 24).astype(np.int8),
+        # 1970-01-01 was a Thursday
+        'day_of_week': pd.Categorical.from_codes((days + 3) % 7, categories=DAY_NAMES, ordered=True),
+        'num_comments': np.array([r.get('num_comments', 0) or 0 for r in results], dtype=np.int64),
+        'upvote_ratio': np.array([r.get('upvote_ratio', 0.5) for r in results], dtype=np.float64),
+        'id': [r.get('id', r.get('comment_id', '')) for r in results],
+        'post_id': [r.get('post_id', r.get('id', '')) for r in results],
+        'url': [r.get('url', r.get('post_url', '')) for r in results]
+    }, columns=FRAME_COLUMNS)
+    return df
+
+
+def as_analysis_frame(data):
+    """Return ``data`` if it is already an analysis frame, otherwise build one."""
+    if isinstance(data, pd.DataFrame) and 'timestamp' in data.columns:
+        return data
+    return build_analysis_frame(data)
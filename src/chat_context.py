@@ -0,0 +1,121 @@
+import time
+from collections import deque
+from config.config import CHAT_TOKEN_BUDGET
+
+# Rough English average; avoids a tokenizer round trip per turn
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _truncate_tokens(text, tokens):
+    """Keep the last ``tokens`` worth of text (the newest facts)."""
+    limit = tokens * CHARS_PER_TOKEN
+    return text if len(text) <= limit else "…" + text[-limit:]
+
+
+class ChatContext:
+    def __init__(self, token_budget=CHAT_TOKEN_BUDGET, summary_tokens=None, min_recent_turns=2):
+        """Bounded prompt state for a chat over one analysis.
+
+        Every prompt is the analysis context (once), a running summary of
+        older turns, the most recent turns verbatim and the new message.
+        When that exceeds ``token_budget`` the oldest turns are folded into
+        the summary, which is capped at ``summary_tokens``, so the prompt
+        size (and per-turn cost) stays flat however long the chat runs.
+        """
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens or token_budget // 4
+        self.min_recent_turns = min_recent_turns
+        self.system = ""
+        self.summary = ""
+        self.turns = deque()
+        self.metrics = []
+
+    def set_system(self, text):
+        """Set the analysis context; a different context starts a new conversation."""
+        if text != self.system:
+            self.system = text
+            self.reset()
+
+    def reset(self):
+        self.summary = ""
+        self.turns.clear()
+
+    def _render(self, message, turns=None):
+        parts = []
+        if self.system:
+            parts.append(self.system)
+        if self.summary:
+            parts.append(f"Summary of the earlier conversation: {self.summary}")
+        for user, assistant in (self.turns if turns is None else turns):
+            parts.append(f"User: {user}\nAssistant: {assistant}")
+        parts.append(f"User message: {message}")
+        return "\n\n".join(parts)
+
+    def build_prompt(self, message, summarize=None):
+        """Prompt for ``message`` within the budget.
+
+        ``summarize(text, max_tokens)`` condenses folded turns (e.g. with the
+        chat model); without it, or if it fails, the newest part of the
+        transcript is kept verbatim up to ``summary_tokens``. Recent turns
+        that still do not fit are cut down to the budget that is left.
+        """
+        folded = []
+        while (len(self.turns) > self.min_recent_turns
+               and estimate_tokens(self._render(message)) > self.token_budget):
+            folded.append(self.turns.popleft())
+        # Fold at least half the history at a time so summaries stay infrequent
+        while folded and len(self.turns) > self.min_recent_turns and len(folded) < len(self.turns):
+            folded.append(self.turns.popleft())
+        if folded:
+            self._fold(folded, summarize)
+        return self._render(message, self._fit_turns(message)), len(folded)
+
+    def _fit_turns(self, message):
+        """Recent turns that fit the rest of the budget, newest first; an overlong reply is truncated."""
+        remaining = self.token_budget - estimate_tokens(self._render(message, turns=()))
+        fitted = []
+        for user, assistant in reversed(self.turns):
+            # Everything but the reply, including the separator before the turn
+            fixed = estimate_tokens(f"User: {user}\nAssistant: \n\n")
+            if fixed >= remaining:
+                break
+            if estimate_tokens(assistant) > remaining - fixed:
+                # One token of slack for the ellipsis and rounding
+                assistant = _truncate_tokens(assistant, remaining - fixed - 1)
+            fitted.append((user, assistant))
+            remaining -= fixed + estimate_tokens(assistant)
+        fitted.reverse()
+        return fitted
+
+    def _fold(self, turns, summarize):
+        transcript = "\n".join(f"User: {user}\nAssistant: {assistant}" for user, assistant in turns)
+        if self.summary:
+            transcript = f"{self.summary}\n{transcript}"
+        summary = ""
+        if summarize is not None:
+            try:
+                summary = summarize(transcript, self.summary_tokens) or ""
+            except Exception as e:
+                print(f"Error summarizing chat history: {e}")
+        self.summary = _truncate_tokens((summary or transcript).strip(), self.summary_tokens)
+
+    def record(self, message, reply, prompt, started, first_chunk=None, folded=0):
+        """Append a finished turn and its metrics; returns the metrics entry."""
+        self.turns.append((message, reply))
+        finished = time.perf_counter()
+        entry = {
+            'turn': len(self.metrics) + 1,
+            'prompt_tokens': estimate_tokens(prompt),
+            'reply_tokens': estimate_tokens(reply),
+            'summary_tokens': estimate_tokens(self.summary),
+            'recent_turns': len(self.turns) - 1,
+            'folded_turns': folded,
+            'latency': finished - started,
+            'first_chunk_latency': (first_chunk - started) if first_chunk is not None else finished - started
+        }
+        self.metrics.append(entry)
+        return entry
@@ -0,0 +1,94 @@
+import os
+import shutil
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from .analysis_frame import as_analysis_frame
+
+# Bump when columns are added, removed or change type
+PARQUET_SCHEMA_VERSION = 1
+SCHEMA_VERSION_KEY = b'reddit_analyzer.schema_version'
+
+# Low-cardinality columns stored dictionary-encoded
+DICTIONARY_COLUMNS = ['type', 'author', 'sentiment', 'subreddit']
+
+PARQUET_SCHEMA = pa.schema([
+    ('type', pa.dictionary(pa.int8(), pa.string())),
+    ('title', pa.string()),
+    ('author', pa.dictionary(pa.int32(), pa.string())),
+    ('score', pa.int64()),
+    ('text', pa.string()),
+    ('sentiment', pa.dictionary(pa.int8(), pa.string())),
+    ('subreddit', pa.dictionary(pa.int32(), pa.string())),
+    ('created_utc', pa.timestamp('s')),
+    ('date', pa.string()),
+    ('num_comments', pa.int64()),
+    ('upvote_ratio', pa.float64()),
+    ('id', pa.string()),
+    ('post_id', pa.string()),
+    ('url', pa.string())
+], metadata={SCHEMA_VERSION_KEY: str(PARQUET_SCHEMA_VERSION).encode()})
+
+
+def records_to_table(data):
+    """Arrow table in PARQUET_SCHEMA from raw results or an analysis frame."""
+    df = as_analysis_frame(data)
+    columns = {}
+    for field in PARQUET_SCHEMA:
+        if field.name == 'date':
+            values = df['created_utc'].dt.strftime('%Y-%m-%d')
+        elif field.name == 'created_utc':
+            values = df['timestamp'].to_numpy().astype('datetime64[s]')
+        else:
+            values = df[field.name]
+            if hasattr(values, 'cat'):
+                values = values.astype(object)
+        columns[field.name] = pa.array(values, type=field.type, from_pandas=True)
+    return pa.Table.from_pydict(columns, schema=PARQUET_SCHEMA)
+
+
+def write_parquet_dataset(data, root_dir, partition_cols=('subreddit', 'date'), overwrite=True):
+    """Write results as a Hive-partitioned Parquet dataset (zstd, dictionary-encoded).
+
+    Files land in ``root_dir/subreddit=<name>/date=<YYYY-MM-DD>/``, so
+    readers can prune partitions and read only the columns they need. The
+    schema (with its version) is also written to ``_common_metadata``.
+    """
+    table = records_to_table(data)
+    if overwrite and os.path.exists(root_dir):
+        shutil.rmtree(root_dir)
+    os.makedirs(root_dir, exist_ok=True)
+
+    partitioning = ds.partitioning(
+        pa.schema([PARQUET_SCHEMA.field(name) for name in partition_cols]), flavor='hive'
+    )
+    file_options = ds.ParquetFileFormat().make_write_options(
+        compression='zstd', use_dictionary=DICTIONARY_COLUMNS
+    )
+    ds.write_dataset(
+        table, root_dir, format='parquet', partitioning=partitioning,
+        file_options=file_options, existing_data_behavior='overwrite_or_ignore',
+        basename_template='part-{i}.parquet'
+    )
+    pq.write_metadata(PARQUET_SCHEMA, os.path.join(root_dir, '_common_metadata'))
+    return root_dir
+
+
+def read_parquet_dataset(root_dir, columns=None, filters=None):
+    """Load a dataset written by write_parquet_dataset as a DataFrame.
+
+    ``filters`` uses pyarrow's DNF form, e.g. ``[('subreddit', '=', 'python')]``;
+    only matching partitions are read.
+    """
+    metadata_path = os.path.join(root_dir, '_common_metadata')
+    if os.path.exists(metadata_path):
+        version = pq.read_schema(metadata_path).metadata.get(SCHEMA_VERSION_KEY)
+        if version is not None and int(version) > PARQUET_SCHEMA_VERSION:
+            raise ValueError(f"Parquet dataset schema version {int(version)} is newer than "
+                             f"supported version {PARQUET_SCHEMA_VERSION}")
+    dataset = ds.dataset(root_dir, format='parquet', partitioning=ds.partitioning(
+        pa.schema([PARQUET_SCHEMA.field(name) for name in ('subreddit', 'date')]),
+        flavor='hive', dictionaries='infer'
+    ))
+    expression = pq.filters_to_expression(filters) if filters else None
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
@@ -1,54 +1,33 @@
-import os
-os.environ.setdefault("GRPC_VERBOSITY", "ERROR")
-os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
-try:
-    from absl import logging as absl_logging
-    absl_logging.set_verbosity(absl_logging.ERROR)
-except Exception:
-    pass
-
-import google.generativeai as genai
-from typing import List, Dict
+import time
+import asyncio
+from typing import List, Dict, Iterator
 import logging
+from .generation_backends import create_backend
+from .generation_cache import ResponseCache, prompt_fingerprint
+from .chat_context import ChatContext
 
 class ContentGenerator:
-    def __init__(self):
+    def __init__(self, backend=None, cache=None, conversation=None):
+        """Post generation and grounded chat on a pluggable text backend.
+        
+        ``backend`` defaults to the one named by CONTENT_BACKEND (Gemini
+        unless configured otherwise); ``cache`` is a ResponseCache for
+        generated posts and ``conversation`` the ChatContext that keeps chat
+        prompts within a token budget, both created with defaults when
+        omitted.
+        """
         try:
-            # Initialize Gemini API
-            api_key = os.getenv('GEMINI_API_KEY')
-            if not api_key:
-                raise ValueError("GEMINI_API_KEY not found in environment variables")
-            
-            genai.configure(api_key=api_key)
-            
-            # Initialize the model with Gemini 2.0 Flash
-            generation_config = {
-                "temperature": 0.9,
-                "top_p": 1,
-                "top_k": 1,
-                "max_output_tokens": 2048,
-            }
-            
-            # Initialize the model
-            try:
-                self.model = genai.GenerativeModel(
-                    model_name="gemini-2.0-flash",
-                    generation_config=generation_config
-                )
-                print("Successfully initialized Chatbot model!")
-                
-                self.chat = self.model.start_chat(history=[])
-                print("Chat initialized successfully!")
-                
-            except Exception as model_error:
-                print(f"Error initializing the model: {model_error}")
-                raise
+            self.backend = backend if backend is not None else create_backend()
+            print(f"Successfully initialized Chatbot model! ({self.backend.fingerprint})")
             
         except Exception as e:
             print(f"Error initializing the model: {e}")
             logging.error(f"Initialization failed: {str(e)}")
             raise
 
+        self.cache = cache if cache is not None else ResponseCache()
+        self.conversation = conversation if conversation is not None else ChatContext()
+
         # In-memory analysis context used to ground chat replies
         self.context_text = ""
 
@@ -89,6 +68,7 @@ class ContentGenerator:
         except Exception:
             # Fail closed; empty context
             self.context_text = ""
+        self.conversation.set_system(self.context_text)
 
     def chat_loop(self):
         """Start an interactive chat loop with the user"""
@@ -108,16 +88,15 @@ class ContentGenerator:
                 
                 # Generate response
                 try:
-                    response = self.chat.send_message(
-                        user_input,
-                        stream=True  # Enable streaming for better user experience
-                    )
-                    
                     # Print response as it streams
                     print("\nAI: ", end="", flush=True)
-                    for chunk in response:
-                        print(chunk.text, end="", flush=True)
+                    reply = ""
+                    for chunk in self.stream_chat_reply(user_input):
+                        reply += chunk
+                        print(chunk, end="", flush=True)
                     print()  # New line after response
+                    if not reply:
+                        print("Please try again with a different question.")
                     
                 except Exception as e:
                     print(f"\nError generating response: {e}")
@@ -129,59 +108,156 @@ class ContentGenerator:
             print(f"\nAn error occurred: {e}")
             logging.error(f"Chat error: {str(e)}")
 
+    def build_post_prompt(self, query: str, keywords: List = None, sentiment_data: Dict = None, platform: str = "reddit") -> str:
+        """Prompt for one short post about the analysis."""
+        keyword_list = []
+        if keywords:
+            # keywords may be list of tuples (count, word) or strings
+            for kw in keywords:
+                if isinstance(kw, (list, tuple)) and len(kw) == 2:
+                    keyword_list.append(str(kw[1]))
+                else:
+                    keyword_list.append(str(kw))
+        keyword_text = ", ".join(keyword_list[:10])
+
+        sentiment_summary = ""
+        if sentiment_data and isinstance(sentiment_data, dict):
+            sentiment_summary = (
+                f"Positive {sentiment_data.get('positive', 0):.1f}%, "
+                f"Negative {sentiment_data.get('negative', 0):.1f}%, "
+                f"Neutral {sentiment_data.get('neutral', 0):.1f}%"
+            )
+
+        prompt_lines = [
+            "You are a helpful assistant that writes a concise, engaging social media post.",
+            f"Platform: {platform}.",
+            f"Topic/query: {query}.",
+            f"Important keywords: {keyword_text}.",
+        ]
+        if sentiment_summary:
+            prompt_lines.append(f"Sentiment distribution: {sentiment_summary}.")
+        prompt_lines.append(
+            "Write 1 short post (2-4 sentences), friendly tone, no hashtags, no emojis."
+        )
+        return "\n".join(prompt_lines)
+
+    def generate_cached(self, prompt: str) -> str:
+        """Backend response for a prompt; identical prompts (e.g. Streamlit reruns) hit the cache."""
+        key = prompt_fingerprint(self.backend.fingerprint, prompt)
+        text = self.cache.get(key)
+        if text is None:
+            text = self.backend.generate(prompt)
+            if text:
+                self.cache.put(key, text)
+        return text or ""
+
     def generate_content(self, query: str, keywords: List = None, sentiment_data: Dict = None, platform: str = "reddit") -> List[str]:
         """Generate a short, engaging post based on analysis (non-interactive)."""
         try:
-            keyword_list = []
-            if keywords:
-                # keywords may be list of tuples (count, word) or strings
-                for kw in keywords:
-                    if isinstance(kw, (list, tuple)) and len(kw) == 2:
-                        keyword_list.append(str(kw[1]))
-                    else:
-                        keyword_list.append(str(kw))
-            keyword_text = ", ".join(keyword_list[:10])
-
-            sentiment_summary = ""
-            if sentiment_data and isinstance(sentiment_data, dict):
-                sentiment_summary = (
-                    f"Positive {sentiment_data.get('positive', 0):.1f}%, "
-                    f"Negative {sentiment_data.get('negative', 0):.1f}%, "
-                    f"Neutral {sentiment_data.get('neutral', 0):.1f}%"
-                )
+            prompt = self.build_post_prompt(query, keywords, sentiment_data, platform)
+            return [self.generate_cached(prompt)]
+        except Exception as e:
+            logging.error(f"Content generation failed: {e}")
+            return [""]
 
-            prompt_lines = [
-                "You are a helpful assistant that writes a concise, engaging social media post.",
-                f"Platform: {platform}.",
-                f"Topic/query: {query}.",
-                f"Important keywords: {keyword_text}.",
-            ]
-            if sentiment_summary:
-                prompt_lines.append(f"Sentiment distribution: {sentiment_summary}.")
-            prompt_lines.append(
-                "Write 1 short post (2-4 sentences), friendly tone, no hashtags, no emojis."
-            )
-            prompt = "\n".join(prompt_lines)
+    async def agenerate_cached(self, prompt: str) -> str:
+        """Async generate_cached(); the event loop is free while the backend responds."""
+        key = prompt_fingerprint(self.backend.fingerprint, prompt)
+        text = self.cache.get(key)
+        if text is None:
+            text = await self.backend.agenerate(prompt)
+            if text:
+                self.cache.put(key, text)
+        return text or ""
 
-            response = self.model.generate_content(prompt)
-            text = getattr(response, "text", None)
-            if not text and hasattr(response, "candidates") and response.candidates:
-                text = response.candidates[0].content.parts[0].text
-            return [text or ""]
+    async def agenerate_content(self, query: str, keywords: List = None, sentiment_data: Dict = None, platform: str = "reddit") -> List[str]:
+        """Async variant of generate_content()."""
+        try:
+            prompt = self.build_post_prompt(query, keywords, sentiment_data, platform)
+            return [await self.agenerate_cached(prompt)]
         except Exception as e:
             logging.error(f"Content generation failed: {e}")
             return [""]
 
+    async def agenerate_many(self, requests: List[Dict], max_concurrency: int = 4) -> List[List[str]]:
+        """Generate several posts concurrently, e.g. one per platform or subreddit.
+        
+        Each request holds generate_content() keyword arguments; at most
+        ``max_concurrency`` are in flight at once. Results keep the order of
+        ``requests``.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(request):
+            async with semaphore:
+                return await self.agenerate_content(**request)
+
+        return await asyncio.gather(*(run(request) for request in requests))
+
+    def generate_many(self, requests: List[Dict], max_concurrency: int = 4) -> List[List[str]]:
+        """Blocking wrapper around agenerate_many() for code without an event loop."""
+        return asyncio.run(self.agenerate_many(requests, max_concurrency))
+
+    def stream_content(self, query: str, keywords: List = None, sentiment_data: Dict = None, platform: str = "reddit") -> Iterator[str]:
+        """Yield a generated post in chunks (cached posts arrive as one chunk)."""
+        try:
+            prompt = self.build_post_prompt(query, keywords, sentiment_data, platform)
+            key = prompt_fingerprint(self.backend.fingerprint, prompt)
+            text = self.cache.get(key)
+            if text is not None:
+                yield text
+                return
+            parts = []
+            for chunk in self.backend.stream(prompt):
+                parts.append(chunk)
+                yield chunk
+            if parts:
+                self.cache.put(key, "".join(parts))
+        except Exception as e:
+            logging.error(f"Content generation failed: {e}")
+
+    def cache_stats(self) -> Dict:
+        """Hit/miss metrics of the generated-post cache."""
+        return self.cache.stats()
+
+    def _summarize(self, transcript: str, max_tokens: int) -> str:
+        prompt = (
+            f"Summarize this conversation in at most {max_tokens * 3 // 4} words. "
+            "Keep facts, decisions and open requests; omit pleasantries.\n\n" + transcript
+        )
+        return self.backend.generate(prompt)
+
     def chat_reply(self, message: str) -> str:
         """Return a single-turn chat response for UI chat box."""
         try:
-            prefixed = (self.context_text + "\n\nUser message: " + message) if self.context_text else message
-            response = self.chat.send_message(prefixed)
-            if hasattr(response, "text"):
-                return response.text
-            if hasattr(response, "candidates") and response.candidates:
-                return response.candidates[0].content.parts[0].text
+            started = time.perf_counter()
+            prompt, folded = self.conversation.build_prompt(message, self._summarize)
+            reply = self.backend.generate(prompt)
+            if reply:
+                self.conversation.record(message, reply, prompt, started, folded=folded)
+            return reply
+        except Exception as e:
+            logging.error(f"Chat reply failed: {e}")
             return ""
+
+    def stream_chat_reply(self, message: str) -> Iterator[str]:
+        """Yield a chat response as it is generated, e.g. for ``st.write_stream``."""
+        try:
+            started = time.perf_counter()
+            prompt, folded = self.conversation.build_prompt(message, self._summarize)
+            parts = []
+            first_chunk = None
+            for chunk in self.backend.stream(prompt):
+                if first_chunk is None:
+                    first_chunk = time.perf_counter()
+                parts.append(chunk)
+                yield chunk
+            if parts:
+                self.conversation.record(message, "".join(parts), prompt, started, first_chunk, folded)
         except Exception as e:
             logging.error(f"Chat reply failed: {e}")
-            return ""
\ No newline at end of file
+
+    @property
+    def chat_metrics(self) -> List[Dict]:
+        """Per-turn prompt size, summary size and latency of the chat."""
+        return self.conversation.metrics
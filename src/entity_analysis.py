@@ -1,40 +1,155 @@
+import threading
 import spacy
-import textstat
+from .entity_index import record_text, content_hash
+from .readability import readability_scores
+
+SPACY_MODEL = "en_core_web_sm"
+
+# Only the NER component (and the tok2vec layer it may listen to) is needed
+# for entity extraction, so the rest of the pipeline is never loaded.
+NER_EXCLUDE = ["tagger", "parser", "attribute_ruler", "lemmatizer", "senter"]
+
+ENTITY_TYPES = ('PERSON', 'ORG', 'GPE', 'PRODUCT', 'DATE')
+
+# One model per process, shared by every EntityAnalyzer instance
+_nlp = None
+_nlp_lock = threading.Lock()
+
+
+def load_nlp(model_name=SPACY_MODEL):
+    """Return the process-wide spaCy model, loading it on first use."""
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                _nlp = spacy.load(model_name, exclude=NER_EXCLUDE)
+    return _nlp
+
 
 class EntityAnalyzer:
-    def __init__(self):
-        self.nlp = spacy.load("en_core_web_sm")
+    def __init__(self, preload=False):
+        self._preload_thread = None
+        if preload:
+            self.preload()
+
+    @property
+    def nlp(self):
+        """spaCy pipeline, loaded lazily the first time it is needed."""
+        return load_nlp()
+
+    def preload(self):
+        """Start loading the spaCy model in a background thread.
+
+        Call this before slow I/O (e.g. the Reddit crawl) so the model load
+        overlaps with it. Returns the thread so callers may join it.
+        """
+        if _nlp is not None:
+            return None
+        if self._preload_thread is None or not self._preload_thread.is_alive():
+            self._preload_thread = threading.Thread(
+                target=self._preload_worker, name="spacy-preload", daemon=True
+            )
+            self._preload_thread.start()
+        return self._preload_thread
+
+    @staticmethod
+    def _preload_worker():
+        try:
+            load_nlp()
+        except Exception as e:
+            print(f"Error preloading spaCy model: {e}")
 
     def extract_entities(self, text):
         try:
             doc = self.nlp(text)
-            
-            entities = {
-                'PERSON': [],
-                'ORG': [],
-                'GPE': [],
-                'PRODUCT': [],
-                'DATE': []
-            }
-            
+
+            entities = {label: [] for label in ENTITY_TYPES}
+
             for ent in doc.ents:
                 if ent.label_ in entities:
                     entities[ent.label_].append(ent.text)
-                    
+
             return entities
         except Exception as e:
             print(f"Error in entity extraction: {e}")
             return {}
 
+    @staticmethod
+    def _collect_entities(doc):
+        entities = {label: [] for label in ENTITY_TYPES}
+        for ent in doc.ents:
+            if ent.label_ in entities and ent.text not in entities[ent.label_]:
+                entities[ent.label_].append(ent.text)
+        return entities
+
+    def extract_record_entities(self, results, cache=None, index=None, batch_size=64):
+        """Extract deduplicated entities per record.
+
+        Records whose content hash is already in ``cache`` skip NER entirely;
+        the rest run through ``nlp.pipe`` in batches. If an
+        ``EntityCooccurrenceIndex`` is given, every record is added to it
+        (records it has already indexed are skipped).
+        Returns a list of entity dicts aligned with ``results``.
+        """
+        keys = []
+        record_entities = [None] * len(results)
+        pending = {}
+
+        for i, record in enumerate(results):
+            text = record_text(record)
+            key = content_hash(text)
+            keys.append(key)
+            cached = cache.get(key) if cache is not None else None
+            if cached is not None:
+                record_entities[i] = cached
+            elif key in pending:
+                pending[key][1].append(i)
+            else:
+                pending[key] = (text, [i])
+
+        if pending:
+            try:
+                texts = [text for text, _ in pending.values()]
+                docs = self.nlp.pipe(texts, batch_size=batch_size)
+                for (key, (_, positions)), doc in zip(pending.items(), docs):
+                    entities = self._collect_entities(doc)
+                    if cache is not None:
+                        cache.put(key, entities)
+                    for i in positions:
+                        record_entities[i] = entities
+            except Exception as e:
+                print(f"Error in entity extraction: {e}")
+
+        for i, entities in enumerate(record_entities):
+            if entities is None:
+                record_entities[i] = {label: [] for label in ENTITY_TYPES}
+            elif index is not None:
+                record = results[i]
+                record_id = record.get('comment_id') or record.get('id') or keys[i]
+                index.add(record_id, entities, record.get('sentiment'))
+
+        return record_entities
+
+    @staticmethod
+    def merge_entities(record_entities):
+        """Merge per-record entities into one deduplicated dict per type."""
+        merged = {label: [] for label in ENTITY_TYPES}
+        seen = {label: set() for label in ENTITY_TYPES}
+        for entities in record_entities:
+            for label, names in entities.items():
+                if label not in merged:
+                    continue
+                for name in names:
+                    if name not in seen[label]:
+                        seen[label].add(name)
+                        merged[label].append(name)
+        return merged
+
     @staticmethod
     def analyze_readability(text):
         try:
-            return {
-                'flesch_reading_ease': textstat.flesch_reading_ease(text),
-                'flesch_kincaid_grade': textstat.flesch_kincaid_grade(text),
-                'automated_readability_index': textstat.automated_readability_index(text),
-                'coleman_liau_index': textstat.coleman_liau_index(text)
-            }
+            # Sentences, words and syllables are counted once and shared by all four formulas
+            return readability_scores(text)
         except Exception as e:
             print(f"Error in readability analysis: {e}")
-            return {} 
\ No newline at end of file
+            return {}
@@ -0,0 +1,268 @@
+import os
+import json
+import hashlib
+import threading
+from itertools import combinations
+import numpy as np
+from scipy import sparse
+
+# Entity types tracked in the co-occurrence graph
+GRAPH_ENTITY_TYPES = ('PERSON', 'ORG', 'PRODUCT')
+
+SENTIMENT_VALUES = {'positive': 1.0, 'neutral': 0.0, 'negative': -1.0}
+
+
+def record_text(record):
+    """Text NER runs on for a single post or comment."""
+    title = record.get('title', '') or ''
+    text = record.get('text', '') or ''
+    return f"{title}\n{text}" if title else text
+
+
+def content_hash(text):
+    """Stable content hash used as the entity cache key."""
+    return hashlib.sha1(text.encode('utf-8', errors='replace')).hexdigest()
+
+
+class EntityCache:
+    def __init__(self, path=None):
+        """Per-record entity cache keyed by content hash, optionally persisted to JSON.
+
+        One instance can be shared by several threads (e.g. app sessions).
+        """
+        self.path = path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load()
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        with self._lock:
+            entities = self.entries.get(key)
+            if entities is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entities
+
+    def put(self, key, entities):
+        with self._lock:
+            self.entries[key] = entities
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading entity cache: {e}")
+            entries = {}
+        with self._lock:
+            self.entries = entries
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            entries = dict(self.entries)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+class EntityCooccurrenceIndex:
+    def __init__(self, entity_types=GRAPH_ENTITY_TYPES):
+        """Incrementally maintained entity co-occurrence graph.
+
+        Co-mention counts and summed sentiment are kept as sparse symmetric
+        matrices indexed by entity id. New records only append triplets; the
+        CSR matrices are rebuilt lazily on the next query.
+        """
+        self.entity_types = tuple(entity_types)
+        self.vocab = {}
+        self.entities = []
+        self.indexed = set()
+        self.mentions = np.zeros(0, dtype=np.int64)
+        self.mention_sentiment = np.zeros(0, dtype=np.float64)
+        self._counts = sparse.csr_matrix((0, 0), dtype=np.int64)
+        self._sentiment = sparse.csr_matrix((0, 0), dtype=np.float64)
+        self._pending_rows = []
+        self._pending_cols = []
+        self._pending_sentiment = []
+
+    def __len__(self):
+        return len(self.entities)
+
+    def _entity_id(self, label, name):
+        key = (label, name)
+        entity_id = self.vocab.get(key)
+        if entity_id is None:
+            entity_id = len(self.entities)
+            self.vocab[key] = entity_id
+            self.entities.append(key)
+        return entity_id
+
+    def add(self, key, entities, sentiment=None):
+        """Index one record's entities; records already indexed are skipped."""
+        if key in self.indexed:
+            return False
+        self.indexed.add(key)
+
+        ids = sorted({
+            self._entity_id(label, name.strip())
+            for label in self.entity_types
+            for name in entities.get(label, [])
+            if name and name.strip()
+        })
+        if not ids:
+            return True
+
+        value = SENTIMENT_VALUES.get(sentiment, 0.0)
+        if len(self.entities) > len(self.mentions):
+            grow = len(self.entities) - len(self.mentions)
+            self.mentions = np.concatenate([self.mentions, np.zeros(grow, dtype=np.int64)])
+            self.mention_sentiment = np.concatenate(
+                [self.mention_sentiment, np.zeros(grow, dtype=np.float64)]
+            )
+        self.mentions[ids] += 1
+        self.mention_sentiment[ids] += value
+
+        for a, b in combinations(ids, 2):
+            self._pending_rows.extend((a, b))
+            self._pending_cols.extend((b, a))
+            self._pending_sentiment.extend((value, value))
+        return True
+
+    def _flush(self):
+        n = len(self.entities)
+        if self._counts.shape[0] == n and not self._pending_rows:
+            return
+
+        counts = self._counts.copy()
+        sentiment = self._sentiment.copy()
+        counts.resize((n, n))
+        sentiment.resize((n, n))
+        if self._pending_rows:
+            rows = np.asarray(self._pending_rows, dtype=np.int64)
+            cols = np.asarray(self._pending_cols, dtype=np.int64)
+            counts = counts + sparse.csr_matrix(
+                (np.ones(len(rows), dtype=np.int64), (rows, cols)), shape=(n, n)
+            )
+            sentiment = sentiment + sparse.csr_matrix(
+                (np.asarray(self._pending_sentiment, dtype=np.float64), (rows, cols)), shape=(n, n)
+            )
+            self._pending_rows = []
+            self._pending_cols = []
+            self._pending_sentiment = []
+        self._counts = counts.tocsr()
+        self._sentiment = sentiment.tocsr()
+
+    @property
+    def counts(self):
+        """Sparse entity x entity co-mention count matrix."""
+        self._flush()
+        return self._counts
+
+    @property
+    def sentiment(self):
+        """Sparse entity x entity matrix of summed record sentiment (+1/0/-1)."""
+        self._flush()
+        return self._sentiment
+
+    def lookup(self, name, label=None):
+        """Return the entity id for a name, optionally restricted to a label."""
+        labels = [label] if label else self.entity_types
+        for candidate in labels:
+            entity_id = self.vocab.get((candidate, name))
+            if entity_id is not None:
+                return entity_id
+        return None
+
+    def top_co_mentioned(self, name, label=None, top_n=10):
+        """Entities most often mentioned alongside the given one."""
+        entity_id = self.lookup(name, label)
+        if entity_id is None:
+            return []
+
+        counts = self.counts
+        start, end = counts.indptr[entity_id], counts.indptr[entity_id + 1]
+        neighbours = counts.indices[start:end]
+        weights = counts.data[start:end]
+        if len(neighbours) == 0:
+            return []
+
+        sentiment_row = self.sentiment.getrow(entity_id).toarray().ravel()
+        order = np.argsort(-weights, kind='stable')[:top_n]
+        return [
+            {
+                'entity': self.entities[neighbours[i]][1],
+                'label': self.entities[neighbours[i]][0],
+                'count': int(weights[i]),
+                'avg_sentiment': float(sentiment_row[neighbours[i]] / weights[i])
+            }
+            for i in order
+        ]
+
+    def top_pairs(self, top_n=10):
+        """Most frequently co-mentioned entity pairs across the corpus."""
+        upper = sparse.triu(self.counts, k=1).tocoo()
+        if upper.nnz == 0:
+            return []
+
+        sentiment = self.sentiment
+        order = np.argsort(-upper.data, kind='stable')[:top_n]
+        pairs = []
+        for i in order:
+            a, b, count = upper.row[i], upper.col[i], upper.data[i]
+            pairs.append({
+                'entities': (self.entities[a][1], self.entities[b][1]),
+                'labels': (self.entities[a][0], self.entities[b][0]),
+                'count': int(count),
+                'avg_sentiment': float(sentiment[a, b] / count)
+            })
+        return pairs
+
+    def save(self, path):
+        """Persist the index to a single .npz file."""
+        counts = self.counts.tocoo()
+        sentiment = self.sentiment.tocoo()
+        np.savez_compressed(
+            path,
+            entities=np.array(json.dumps(self.entities)),
+            entity_types=np.array(json.dumps(self.entity_types)),
+            indexed=np.array(json.dumps(sorted(self.indexed))),
+            mentions=self.mentions,
+            mention_sentiment=self.mention_sentiment,
+            count_row=counts.row, count_col=counts.col, count_data=counts.data,
+            sent_row=sentiment.row, sent_col=sentiment.col, sent_data=sentiment.data
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Restore an index written by save()."""
+        with np.load(path) as data:
+            index = cls(entity_types=json.loads(str(data['entity_types'])))
+            index.entities = [tuple(e) for e in json.loads(str(data['entities']))]
+            index.vocab = {e: i for i, e in enumerate(index.entities)}
+            index.indexed = set(json.loads(str(data['indexed'])))
+            index.mentions = data['mentions']
+            index.mention_sentiment = data['mention_sentiment']
+            n = len(index.entities)
+            index._counts = sparse.csr_matrix(
+                (data['count_data'], (data['count_row'], data['count_col'])), shape=(n, n)
+            )
+            index._sentiment = sparse.csr_matrix(
+                (data['sent_data'], (data['sent_row'], data['sent_col'])), shape=(n, n)
+            )
+        return index
@@ -0,0 +1,138 @@
+import os
+import time
+import asyncio
+import random
+import hashlib
+from config.config import CONTENT_BACKEND
+
+GEMINI_MODEL = "gemini-2.0-flash"
+GENERATION_CONFIG = {
+    "temperature": 0.9,
+    "top_p": 1,
+    "top_k": 1,
+    "max_output_tokens": 2048,
+}
+
+
+def _response_text(response):
+    text = getattr(response, "text", None)
+    if not text and hasattr(response, "candidates") and response.candidates:
+        text = response.candidates[0].content.parts[0].text
+    return text or ""
+
+
+class GeminiBackend:
+    name = "gemini"
+
+    def __init__(self, model_name=GEMINI_MODEL, generation_config=None, api_key=None):
+        """Google Gemini backend; the client library is imported on first construction."""
+        # Must be set before grpc is loaded
+        os.environ.setdefault("GRPC_VERBOSITY", "ERROR")
+        os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+        try:
+            from absl import logging as absl_logging
+            absl_logging.set_verbosity(absl_logging.ERROR)
+        except Exception:
+            pass
+        import google.generativeai as genai
+
+        api_key = api_key or os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found in environment variables")
+        genai.configure(api_key=api_key)
+
+        self.model_name = model_name
+        self.generation_config = dict(generation_config or GENERATION_CONFIG)
+        self.model = genai.GenerativeModel(
+            model_name=model_name,
+            generation_config=self.generation_config
+        )
+
+    @property
+    def fingerprint(self):
+        """Identifies the model and settings a cached response was produced with."""
+        settings = ",".join(f"{key}={value}" for key, value in sorted(self.generation_config.items()))
+        return f"{self.name}:{self.model_name}:{settings}"
+
+    def generate(self, prompt):
+        return _response_text(self.model.generate_content(prompt))
+
+    async def agenerate(self, prompt):
+        return _response_text(await self.model.generate_content_async(prompt))
+
+    def stream(self, prompt):
+        for chunk in self.model.generate_content(prompt, stream=True):
+            if chunk.text:
+                yield chunk.text
+
+
+STUB_VOCABULARY = (
+    "community", "discussion", "people", "really", "interesting", "thread", "sharing",
+    "opinions", "mixed", "mostly", "positive", "curious", "worth", "reading", "today"
+)
+
+
+class StubBackend:
+    name = "stub"
+
+    def __init__(self, latency=0.0, words=40, chunk_words=4):
+        """Deterministic offline backend for tests, benchmarks and machines without network.
+
+        The same prompt always yields the same text. ``latency`` seconds are
+        slept per call (split across chunks when streaming) to mimic a
+        remote model.
+        """
+        self.latency = latency
+        self.words = words
+        self.chunk_words = chunk_words
+        self.calls = 0
+
+    @property
+    def fingerprint(self):
+        return f"{self.name}:{self.words}"
+
+    def _text(self, prompt):
+        seed = int.from_bytes(hashlib.sha256(prompt.encode('utf-8')).digest()[:8], 'big')
+        rng = random.Random(seed)
+        # Echo a few prompt words so the output is recognisably about the prompt
+        prompt_words = [word.strip('.,:') for word in prompt.split() if len(word) > 3]
+        pool = list(STUB_VOCABULARY) + prompt_words[-20:]
+        text = " ".join(rng.choice(pool) for _ in range(self.words))
+        return text[:1].upper() + text[1:] + "."
+
+    def generate(self, prompt):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._text(prompt)
+
+    async def agenerate(self, prompt):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._text(prompt)
+
+    def stream(self, prompt):
+        """Yield the generate() text in chunks of ``chunk_words`` words."""
+        self.calls += 1
+        words = self._text(prompt).split(" ")
+        starts = range(0, len(words), self.chunk_words)
+        for start in starts:
+            if self.latency:
+                time.sleep(self.latency / len(starts))
+            chunk = " ".join(words[start:start + self.chunk_words])
+            yield chunk if start == 0 else " " + chunk
+
+
+BACKENDS = {
+    'gemini': GeminiBackend,
+    'stub': StubBackend,
+}
+
+
+def create_backend(name=None, **kwargs):
+    """Backend by name; defaults to the CONTENT_BACKEND setting."""
+    name = (name or CONTENT_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown content backend '{name}' (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name](**kwargs)
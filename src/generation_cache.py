@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from config.config import GENERATION_CACHE_DIR, GENERATION_CACHE_TTL
+
+
+def prompt_fingerprint(backend_fingerprint, prompt):
+    """Cache key for one prompt sent to one backend configuration."""
+    digest = hashlib.sha256(backend_fingerprint.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(prompt.encode('utf-8', errors='replace'))
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, cache_dir=GENERATION_CACHE_DIR, max_entries=256, ttl=GENERATION_CACHE_TTL):
+        """Two-level cache of generated text keyed by prompt fingerprint.
+
+        An in-memory LRU of ``max_entries`` sits in front of one JSON file
+        per entry in ``cache_dir`` (``None`` keeps the cache in memory only),
+        so responses survive restarts and are shared between processes.
+        Entries older than ``ttl`` seconds are treated as misses and removed.
+        One instance can be shared by several threads (e.g. app sessions).
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _fresh(self, created):
+        return self.ttl is None or time.time() - created < self.ttl
+
+    def _remember(self, key, created, text):
+        # Caller holds _lock
+        self.entries[key] = (created, text)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get(self, key):
+        """Cached text for ``key``, or None on a miss.
+
+        A lookup counts as one memory hit, disk hit or miss, and at most one
+        expiry however many copies of the entry were stale.
+        """
+        expired = False
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if self._fresh(entry[0]):
+                    self.entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self.entries[key]
+                expired = True
+
+        if self.cache_dir:
+            path = self._entry_path(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                entry = None
+            if entry is not None:
+                if self._fresh(entry['created']):
+                    with self._lock:
+                        self._remember(key, entry['created'], entry['text'])
+                        self.disk_hits += 1
+                    return entry['text']
+                expired = True
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+        with self._lock:
+            if expired:
+                self.expired += 1
+            self.misses += 1
+        return None
+
+    def put(self, key, text):
+        created = time.time()
+        with self._lock:
+            self._remember(key, created, text)
+        if not self.cache_dir:
+            return
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'created': created, 'text': text}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error storing generated content in cache: {e}")
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.json'):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+    def stats(self):
+        """Hit/miss counters and hit rate since this cache was created."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self.entries)
+            }
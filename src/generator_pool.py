@@ -0,0 +1,85 @@
+import time
+import threading
+
+# Seconds before a failed backend initialization is attempted again
+ERROR_RETRY_SECONDS = 60
+
+_lock = threading.Lock()
+_warmup_lock = threading.Lock()
+_shared = None
+_error = None
+_error_time = 0.0
+_warmup = None
+
+
+def _create():
+    # Imported here so callers do not load the generation stack until needed
+    from .generation_backends import create_backend
+    from .generation_cache import ResponseCache
+    return create_backend(), ResponseCache()
+
+
+def _failed_recently():
+    return _error is not None and time.monotonic() - _error_time < ERROR_RETRY_SECONDS
+
+
+def shared_backend():
+    """The process-wide (backend, response cache) pair, created on first use.
+
+    A failed initialization (e.g. a missing API key) is re-raised without
+    retrying for ``ERROR_RETRY_SECONDS``, then attempted again.
+    """
+    global _shared, _error, _error_time
+    if _shared is not None:
+        return _shared
+    with _lock:
+        if _shared is None:
+            if _failed_recently():
+                raise _error
+            try:
+                _shared = _create()
+                _error = None
+            except Exception as e:
+                print(f"Error initializing the content backend: {e}")
+                _error, _error_time = e, time.monotonic()
+                raise
+        return _shared
+
+
+def warm_up():
+    """Create the shared backend on a background thread (once per process).
+
+    Never waits for a construction in progress, so it is cheap to call on
+    every rerun.
+    """
+    global _warmup
+
+    def run():
+        try:
+            shared_backend()
+        except Exception:
+            pass
+
+    if _shared is not None or (_warmup is not None and _warmup.is_alive()):
+        return _warmup
+    with _warmup_lock:
+        idle = _warmup is None or not _warmup.is_alive()
+        if _shared is None and idle and not _failed_recently():
+            _warmup = threading.Thread(target=run, name="content-backend-warmup", daemon=True)
+            _warmup.start()
+    return _warmup
+
+
+def session_generator(state, key='content_generator'):
+    """ContentGenerator for one user session, kept in ``state`` (e.g. st.session_state).
+
+    Sessions share the process-wide backend and response cache; each keeps
+    its own chat context.
+    """
+    generator = state.get(key)
+    if generator is None:
+        from .content_generator import ContentGenerator
+        backend, cache = shared_backend()
+        generator = ContentGenerator(backend=backend, cache=cache)
+        state[key] = generator
+    return generator
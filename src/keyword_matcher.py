@@ -0,0 +1,96 @@
+from collections import deque
+import numpy as np
+from scipy import sparse
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+
+class KeywordMatcher:
+    def __init__(self, keywords):
+        """Aho-Corasick automaton matching many keywords in a single pass.
+
+        Matching is case-insensitive and respects word boundaries, so "ai"
+        matches "AI tools" but not "said". Multi-word keywords are supported.
+        """
+        self.keywords = []
+        self.keyword_ids = {}
+        for keyword in keywords:
+            normalized = ' '.join(str(keyword).lower().split())
+            if normalized and normalized not in self.keyword_ids:
+                self.keyword_ids[normalized] = len(self.keywords)
+                self.keywords.append(normalized)
+
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for keyword_id, keyword in enumerate(self.keywords):
+            self._insert(keyword, keyword_id)
+        self._build_failure_links()
+
+    def _insert(self, keyword, keyword_id):
+        state = 0
+        for ch in keyword:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((keyword_id, len(keyword)))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def column(self, keyword):
+        """Column index of a keyword in the incidence matrix, or None."""
+        return self.keyword_ids.get(' '.join(str(keyword).lower().split()))
+
+    def find(self, text):
+        """Yield (keyword_id, start, end) for every whole-word match in text."""
+        if not text or not self.keywords:
+            return
+        text = text.lower()
+        goto, fail, output = self._goto, self._fail, self._output
+        length = len(text)
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not output[state]:
+                continue
+            end = i + 1
+            if end < length and _is_word_char(text[end]):
+                continue
+            for keyword_id, keyword_length in output[state]:
+                start = end - keyword_length
+                if start == 0 or not _is_word_char(text[start - 1]):
+                    yield keyword_id, start, end
+
+    def incidence_matrix(self, texts):
+        """Sparse (records x keywords) matrix of mention counts, built in one pass."""
+        rows, cols = [], []
+        for row, text in enumerate(texts):
+            for keyword_id, _, _ in self.find(text):
+                rows.append(row)
+                cols.append(keyword_id)
+
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+            shape=(len(texts), len(self.keywords))
+        )
+        matrix.sum_duplicates()
+        return matrix
@@ -1,55 +1,84 @@
-from datasets import load_dataset, concatenate_datasets
+from datasets import load_dataset, load_from_disk, concatenate_datasets
 from peft import prepare_model_for_kbit_training, LoraConfig, get_peft_model
 from transformers import AutoModelForCausalLM, AutoTokenizer, TrainingArguments
-from transformers import Trainer, DataCollatorForLanguageModeling
+from transformers import Trainer, DataCollatorForLanguageModeling, default_data_collator
 import torch
 import os
+import json
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from huggingface_hub import login
-from config.config import HUGGING_FACE_TOKEN
+from config.config import HUGGING_FACE_TOKEN, TRAINING_CACHE_DIR, TWEET_EVAL_SNAPSHOT_DIR
 
-def load_and_merge_tweet_eval():
+MAX_LENGTH = 128
+# Bump when formatting or tokenization changes so prepared datasets are rebuilt
+DATASET_FORMAT_VERSION = 1
+DEFAULT_NUM_PROC = max(1, min(8, (os.cpu_count() or 2) // 2))
+
+TWEET_EVAL_SUBSETS = [
+    "emotion", "hate", "irony", "offensive", 
+    "sentiment", "stance_abortion", "stance_atheism",
+    "stance_climate", "stance_feminist", "stance_hillary"
+]
+
+def label_map_for(subset):
+    if subset == "emotion":
+        return {0: "anger", 1: "joy", 2: "optimism", 3: "sadness"}
+    if subset == "sentiment":
+        return {0: "negative", 1: "neutral", 2: "positive"}
+    if subset in ["irony", "hate", "offensive"]:
+        return {0: "no", 1: "yes"}
+    # stance datasets
+    return {0: "none", 1: "against", 2: "favor"}
+
+def format_text(examples, subset):
+    """Format tweets based on subset type"""
+    label_map = label_map_for(subset)
+    formatted = [
+        f"Tweet: {text}\nCategory: {subset}\nLabel: {label_map[label]}"
+        for text, label in zip(examples["text"], examples["label"])
+    ]
+    return {"text": formatted}
+
+def load_subset(subset, snapshot_dir=TWEET_EVAL_SNAPSHOT_DIR):
+    """Training split of one subset, from the local snapshot when present.
+    
+    Downloads are saved into ``snapshot_dir`` so later runs (or machines
+    given a copy of it) need no network access.
+    """
+    local_path = os.path.join(snapshot_dir, subset) if snapshot_dir else None
+    if local_path and os.path.isdir(local_path):
+        return load_from_disk(local_path)
+    dataset = load_dataset("tweet_eval", subset, split="train")
+    if local_path:
+        # Same write-then-rename as prepare_dataset, so an interrupted save is never loaded
+        tmp_path = f"{local_path}.{os.getpid()}.tmp"
+        dataset.save_to_disk(tmp_path)
+        if os.path.isdir(local_path):
+            shutil.rmtree(local_path)
+        os.replace(tmp_path, local_path)
+    return dataset
+
+def load_and_merge_tweet_eval(snapshot_dir=TWEET_EVAL_SNAPSHOT_DIR, num_proc=DEFAULT_NUM_PROC, max_workers=4):
     """Load and merge all TweetEval subsets"""
     try:
         print("Loading TweetEval subsets...")
-        subsets = [
-            "emotion", "hate", "irony", "offensive", 
-            "sentiment", "stance_abortion", "stance_atheism",
-            "stance_climate", "stance_feminist", "stance_hillary"
-        ]
+        # Downloads are network bound, so subsets are fetched concurrently
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            datasets = list(pool.map(lambda subset: load_subset(subset, snapshot_dir), TWEET_EVAL_SUBSETS))
         
         all_datasets = []
-        for subset in subsets:
-            print(f"Loading subset: {subset}")
-            dataset = load_dataset("tweet_eval", subset)
-            
-            # Format tweets based on subset type
-            def format_text(examples):
-                texts = examples["text"]
-                labels = examples["label"]
-                
-                # Format based on subset type
-                if subset == "emotion":
-                    label_map = {0: "anger", 1: "joy", 2: "optimism", 3: "sadness"}
-                elif subset == "sentiment":
-                    label_map = {0: "negative", 1: "neutral", 2: "positive"}
-                elif subset in ["irony", "hate", "offensive"]:
-                    label_map = {0: "no", 1: "yes"}
-                else:  # stance datasets
-                    label_map = {0: "none", 1: "against", 2: "favor"}
-                
-                formatted = [
-                    f"Tweet: {text}\nCategory: {subset}\nLabel: {label_map[label]}"
-                    for text, label in zip(texts, labels)
-                ]
-                return {"text": formatted}
-            
-            # Process dataset
+        for subset, dataset in zip(TWEET_EVAL_SUBSETS, datasets):
+            print(f"Formatting subset: {subset} ({len(dataset)} examples)")
             processed = dataset.map(
                 format_text,
+                fn_kwargs={"subset": subset},
                 batched=True,
-                remove_columns=dataset["train"].column_names
+                num_proc=num_proc if num_proc and len(dataset) >= 1000 * num_proc else None,
+                remove_columns=dataset.column_names
             )
-            all_datasets.append(processed["train"])
+            all_datasets.append(processed)
         
         # Concatenate all training sets
         print("Merging datasets...")
@@ -62,28 +91,115 @@ def load_and_merge_tweet_eval():
         print(f"Error loading datasets: {e}")
         raise
 
-def tokenize_function(examples, tokenizer):
-    """Tokenize and format data for causal language modeling"""
-    # Add labels for causal language modeling (next token prediction)
-    result = tokenizer(
+def tokenize_function(examples, tokenizer, max_length=MAX_LENGTH):
+    """Tokenize for causal language modeling without padding.
+    
+    Batches are padded to their longest example by the collator, and labels
+    are created there as well (padding masked out of the loss).
+    """
+    return tokenizer(
         examples["text"],
-        padding="max_length",
         truncation=True,
-        max_length=128
+        max_length=max_length
     )
+
+def pack_sequences(examples, tokenizer, block_size=MAX_LENGTH):
+    """Concatenate formatted examples into full ``block_size`` token blocks.
+    
+    Each example is followed by EOS so the model learns where one ends.
+    Labels equal input_ids; only the padding of the last, partial block of a
+    map batch is masked with -100 and excluded from attention.
+    """
+    tokenized = tokenizer(examples["text"])
+    ids = []
+    for input_ids in tokenized["input_ids"]:
+        ids.extend(input_ids)
+        ids.append(tokenizer.eos_token_id)
     
-    # Create labels (same as input_ids for causal LM)
-    result["labels"] = result["input_ids"].copy()
+    blocks = {"input_ids": [], "attention_mask": [], "labels": []}
+    for start in range(0, len(ids), block_size):
+        block = ids[start:start + block_size]
+        padding = block_size - len(block)
+        blocks["input_ids"].append(block + [tokenizer.pad_token_id] * padding)
+        blocks["attention_mask"].append([1] * len(block) + [0] * padding)
+        blocks["labels"].append(block + [-100] * padding)
+    return blocks
+
+def build_data_collator(tokenizer, packing=False):
+    """Collator for tokenize_function (dynamic padding) or pack_sequences output."""
+    if packing:
+        # Blocks are already full length with labels; padding the EOS separators
+        # as pad tokens (GPT-2 has no pad token) would mask them out
+        return default_data_collator
+    return DataCollatorForLanguageModeling(tokenizer=tokenizer, mlm=False, pad_to_multiple_of=8)
+
+def prepared_dataset_key(tokenizer, max_length=MAX_LENGTH, packing=False):
+    """Cache key of a prepared dataset: tokenizer vocabulary and special tokens, length and mode."""
+    digest = hashlib.sha256(json.dumps({
+        "version": DATASET_FORMAT_VERSION,
+        "subsets": TWEET_EVAL_SUBSETS,
+        "tokenizer": type(tokenizer).__name__,
+        "name": tokenizer.name_or_path,
+        "special_tokens": [tokenizer.pad_token_id, tokenizer.eos_token_id],
+        "truncation_side": tokenizer.truncation_side,
+        "max_length": max_length,
+        "packing": packing
+    }, sort_keys=True).encode())
+    digest.update(json.dumps(sorted(tokenizer.get_vocab().items())).encode())
+    name = os.path.basename(str(tokenizer.name_or_path).rstrip("/")) or "tokenizer"
+    return f"{name}-{max_length}{'-packed' if packing else ''}-{digest.hexdigest()[:16]}"
+
+def prepare_dataset(tokenizer, max_length=MAX_LENGTH, packing=False, num_proc=DEFAULT_NUM_PROC,
+                    snapshot_dir=TWEET_EVAL_SNAPSHOT_DIR, cache_dir=TRAINING_CACHE_DIR, rebuild=False):
+    """Formatted and tokenized TweetEval, loaded from the Arrow cache when possible.
+    
+    The prepared dataset is saved under ``cache_dir`` keyed by
+    prepared_dataset_key(), so repeated experiments with the same tokenizer
+    and settings skip formatting and tokenization entirely.
+    """
+    cache_path = os.path.join(cache_dir, prepared_dataset_key(tokenizer, max_length, packing)) if cache_dir else None
+    if cache_path and os.path.isdir(cache_path) and not rebuild:
+        print(f"Loading prepared dataset from {cache_path}")
+        return load_from_disk(cache_path)
+    
+    if num_proc and num_proc > 1:
+        # Forked workers must not share the fast tokenizer's thread pool
+        os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    
+    dataset = load_and_merge_tweet_eval(snapshot_dir, num_proc)
     
-    return result
+    # Tokenize the dataset (labels are added by the collator or packing)
+    print("Tokenizing dataset...")
+    tokenized_dataset = dataset.map(
+        pack_sequences if packing else tokenize_function,
+        fn_kwargs={"tokenizer": tokenizer, ("block_size" if packing else "max_length"): max_length},
+        batched=True,
+        num_proc=num_proc,
+        remove_columns=dataset.column_names
+    )
+    
+    if cache_path:
+        # Written next to the final path and renamed, so readers never see a partial dataset
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        tokenized_dataset.save_to_disk(tmp_path)
+        if os.path.isdir(cache_path):
+            shutil.rmtree(cache_path)
+        os.replace(tmp_path, cache_path)
+        tokenized_dataset = load_from_disk(cache_path)
+        print(f"Prepared dataset saved to {cache_path}")
+    return tokenized_dataset
 
-def train_model():
+def train_model(packing=False, max_length=MAX_LENGTH, num_proc=DEFAULT_NUM_PROC, rebuild_dataset=False):
+    """LoRA fine-tune distilgpt2 on TweetEval.
+    
+    By default examples are padded per batch and batches are grouped by
+    length, so little compute goes to pad tokens; ``packing`` instead
+    concatenates examples into full ``max_length`` blocks.
+    """
     try:
-        # Login with token
-        login(token=HUGGING_FACE_TOKEN)
-        
-        # Load and merge datasets
-        dataset = load_and_merge_tweet_eval()
+        # Login with token (not needed when everything is available locally)
+        if HUGGING_FACE_TOKEN:
+            login(token=HUGGING_FACE_TOKEN)
         
         print("Initializing model and tokenizer...")
         model_name = "distilgpt2"
@@ -105,13 +221,8 @@ def train_model():
         
         model.resize_token_embeddings(len(tokenizer))
         
-        # Tokenize the dataset with labels
-        print("Tokenizing dataset...")
-        tokenized_dataset = dataset.map(
-            lambda x: tokenize_function(x, tokenizer),
-            batched=True,
-            remove_columns=dataset.column_names
-        )
+        # Formatted and tokenized once per tokenizer/max_length, then cached
+        tokenized_dataset = prepare_dataset(tokenizer, max_length, packing, num_proc, rebuild=rebuild_dataset)
         
         print("Configuring LoRA...")
         lora_config = LoraConfig(
@@ -147,7 +258,9 @@ def train_model():
             report_to=[],
             # Add these parameters for better training
             prediction_loss_only=True,
-            label_names=["labels"]
+            label_names=["labels"],
+            # Batch examples of similar length so dynamic padding stays small
+            group_by_length=not packing
         )
         
         # Split dataset into train and validation
@@ -159,6 +272,7 @@ def train_model():
             args=training_args,
             train_dataset=tokenized_dataset["train"],
             eval_dataset=tokenized_dataset["test"],
+            data_collator=build_data_collator(tokenizer, packing),
             # Remove tokenizer parameter to avoid deprecation warning
         )
         
@@ -174,5 +288,16 @@ def train_model():
         raise
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="LoRA fine-tuning on TweetEval")
+    parser.add_argument('--packing', action='store_true',
+                        help="Pack examples into full blocks instead of padding per batch")
+    parser.add_argument('--max-length', type=int, default=MAX_LENGTH)
+    parser.add_argument('--num-proc', type=int, default=DEFAULT_NUM_PROC,
+                        help="Worker processes for formatting and tokenization")
+    parser.add_argument('--rebuild-dataset', action='store_true',
+                        help="Ignore the prepared dataset cache")
+    args = parser.parse_args()
     print("Starting model training process...")
-    train_model() 
\ No newline at end of file
+    train_model(packing=args.packing, max_length=args.max_length, num_proc=args.num_proc,
+                rebuild_dataset=args.rebuild_dataset) 
\ No newline at end of file
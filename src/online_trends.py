@@ -0,0 +1,243 @@
+import math
+import calendar
+from collections import deque
+from datetime import datetime, timedelta
+from .keyword_matcher import KeywordMatcher
+
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def record_timestamp(record):
+    """Epoch seconds for a record (naive datetimes are read as wall-clock UTC)."""
+    if record.get('timestamp') is not None:
+        return int(record['timestamp'])
+    created = record.get('created_utc')
+    if isinstance(created, datetime):
+        return calendar.timegm(created.timetuple())
+    return int(created)
+
+
+class WindowStats:
+    __slots__ = ('window', 'count', 'score_sum', 'positive',
+                 'count_mean', 'count_var', 'ratio_mean', 'ratio_var', 'windows_seen', 'ratio_windows',
+                 'history')
+
+    def __init__(self, window, history_windows):
+        """Open window aggregates plus EWMA state for one tracked series."""
+        self.window = window
+        self.count = 0
+        self.score_sum = 0
+        self.positive = 0
+        self.count_mean = 0.0
+        self.count_var = 0.0
+        self.ratio_mean = 0.0
+        self.ratio_var = 0.0
+        self.windows_seen = 0
+        self.ratio_windows = 0
+        self.history = deque(maxlen=history_windows)
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__ if name != 'history'}
+        data['history'] = list(self.history)
+        return data
+
+    @classmethod
+    def from_dict(cls, data, history_windows):
+        stats = cls(data['window'], history_windows)
+        for name in cls.__slots__:
+            if name != 'history':
+                setattr(stats, name, data[name])
+        stats.history.extend(tuple(item) for item in data['history'])
+        return stats
+
+
+class OnlineTrendEngine:
+    def __init__(self, window_hours=6, keywords=None, alpha=0.3, burst_z=3.0, shift_z=3.0,
+                 min_windows=4, min_count=5, history_windows=28, max_gap_windows=48):
+        """Streaming trend detector with tumbling windows and EWMA z-scores.
+
+        Every record updates the open window of the global series, its
+        subreddit series and one series per matched keyword, so the cost per
+        record does not depend on how much history has been seen. When a
+        window closes its count and positive ratio are compared with the
+        series' exponentially weighted mean/variance; large deviations are
+        reported as ``burst`` or ``sentiment_shift`` alerts.
+        """
+        self.window_seconds = int(window_hours * 3600)
+        self.keywords = list(keywords or [])
+        self.alpha = alpha
+        self.burst_z = burst_z
+        self.shift_z = shift_z
+        self.min_windows = min_windows
+        self.min_count = min_count
+        self.history_windows = history_windows
+        self.max_gap_windows = max_gap_windows
+        self.series = {}
+        self.alerts = []
+        self.records_seen = 0
+        self._matcher = KeywordMatcher(self.keywords) if self.keywords else None
+
+    def _series_keys(self, record):
+        keys = ['all', f"subreddit:{record.get('subreddit', 'unknown')}"]
+        if self._matcher is not None:
+            text = f"{record.get('text') or ''} {record.get('title') or record.get('post_title') or ''}"
+            matched = {keyword_id for keyword_id, _, _ in self._matcher.find(text)}
+            keys.extend(f"keyword:{self._matcher.keywords[keyword_id]}" for keyword_id in sorted(matched))
+        return keys
+
+    def update(self, record):
+        """Add one record; returns the alerts raised by windows it closed."""
+        window = record_timestamp(record) // self.window_seconds
+        score = record.get('score', 0) or 0
+        positive = 1 if record.get('sentiment') == 'positive' else 0
+        self.records_seen += 1
+
+        alerts = []
+        for key in self._series_keys(record):
+            stats = self.series.get(key)
+            if stats is None:
+                stats = self.series[key] = WindowStats(window, self.history_windows)
+            elif window > stats.window:
+                alerts.extend(self._advance(key, stats, window))
+            # Late records (window < stats.window) are counted in the open window
+            stats.count += 1
+            stats.score_sum += score
+            stats.positive += positive
+
+        self.alerts.extend(alerts)
+        return alerts
+
+    def flush(self):
+        """Close every open window (e.g. at the end of a batch) and return new alerts."""
+        alerts = []
+        for key, stats in self.series.items():
+            if stats.count:
+                alerts.extend(self._close(key, stats))
+                stats.window += 1
+        self.alerts.extend(alerts)
+        return alerts
+
+    def _advance(self, key, stats, window):
+        alerts = self._close(key, stats)
+        # Empty windows in between pull the EWMA down; long gaps are capped
+        gap = min(window - stats.window - 1, self.max_gap_windows)
+        for _ in range(gap):
+            self._update_ewma(stats, 0, None)
+        stats.window = window
+        return alerts
+
+    def _close(self, key, stats):
+        count = stats.count
+        ratio = stats.positive / count if count else None
+        alerts = []
+
+        if stats.windows_seen >= self.min_windows and count >= self.min_count:
+            # Floors: Poisson noise for counts, binomial noise for the positive ratio
+            count_z = self._z_score(count, stats.count_mean, stats.count_var,
+                                    floor=max(1.0, math.sqrt(stats.count_mean)))
+            if count_z >= self.burst_z:
+                alerts.append(self._alert('burst', key, stats, count_z))
+            if ratio is not None and stats.ratio_windows >= self.min_windows:
+                ratio_z = self._z_score(ratio, stats.ratio_mean, stats.ratio_var,
+                                        floor=max(0.05, math.sqrt(stats.ratio_mean * (1 - stats.ratio_mean) / count)))
+                if abs(ratio_z) >= self.shift_z:
+                    alerts.append(self._alert('sentiment_shift', key, stats, ratio_z))
+
+        stats.history.append((stats.window, count, stats.score_sum, stats.positive))
+        self._update_ewma(stats, count, ratio)
+        stats.count = 0
+        stats.score_sum = 0
+        stats.positive = 0
+        return alerts
+
+    def _update_ewma(self, stats, count, ratio):
+        # Incremental exponentially weighted mean and variance
+        diff = count - stats.count_mean
+        increment = self.alpha * diff
+        stats.count_mean += increment
+        stats.count_var = (1 - self.alpha) * (stats.count_var + diff * increment)
+        if ratio is not None:
+            if stats.ratio_windows == 0:
+                stats.ratio_mean = ratio
+            else:
+                diff = ratio - stats.ratio_mean
+                increment = self.alpha * diff
+                stats.ratio_mean += increment
+                stats.ratio_var = (1 - self.alpha) * (stats.ratio_var + diff * increment)
+            stats.ratio_windows += 1
+        stats.windows_seen += 1
+
+    @staticmethod
+    def _z_score(value, mean, var, floor):
+        # The floor keeps a perfectly flat history from producing infinite scores
+        return (value - mean) / max(math.sqrt(var), floor)
+
+    def _window_start(self, window):
+        return EPOCH + timedelta(seconds=window * self.window_seconds)
+
+    def _alert(self, kind, key, stats, z_score):
+        return {
+            'type': kind,
+            'key': key,
+            'window_start': self._window_start(stats.window),
+            'count': stats.count,
+            'expected_count': round(stats.count_mean, 3),
+            'total_score': stats.score_sum,
+            'positive_ratio': round(stats.positive / stats.count, 3) if stats.count else 0.0,
+            'expected_positive_ratio': round(stats.ratio_mean, 3),
+            'z_score': round(z_score, 3)
+        }
+
+    def current(self, key='all'):
+        """Aggregates of the open window for a series."""
+        stats = self.series.get(key)
+        if stats is None:
+            return None
+        return {
+            'window_start': self._window_start(stats.window),
+            'count': stats.count,
+            'total_score': stats.score_sum,
+            'positive_ratio': stats.positive / stats.count if stats.count else 0.0,
+            'expected_count': stats.count_mean
+        }
+
+    def recent_windows(self, key='all'):
+        """Closed windows kept for a series: (window_start, count, total_score, positive_ratio)."""
+        stats = self.series.get(key)
+        if stats is None:
+            return []
+        return [
+            (self._window_start(window), count, score_sum,
+             positive / count if count else 0.0)
+            for window, count, score_sum, positive in stats.history
+        ]
+
+    def snapshot(self):
+        """JSON-serializable engine state."""
+        return {
+            'config': {
+                'window_hours': self.window_seconds / 3600,
+                'keywords': self.keywords,
+                'alpha': self.alpha,
+                'burst_z': self.burst_z,
+                'shift_z': self.shift_z,
+                'min_windows': self.min_windows,
+                'min_count': self.min_count,
+                'history_windows': self.history_windows,
+                'max_gap_windows': self.max_gap_windows
+            },
+            'records_seen': self.records_seen,
+            'series': {key: stats.to_dict() for key, stats in self.series.items()}
+        }
+
+    @classmethod
+    def restore(cls, snapshot):
+        """Rebuild an engine from snapshot(); alerts already emitted are not restored."""
+        engine = cls(**snapshot['config'])
+        engine.records_seen = snapshot['records_seen']
+        engine.series = {
+            key: WindowStats.from_dict(data, engine.history_windows)
+            for key, data in snapshot['series'].items()
+        }
+        return engine
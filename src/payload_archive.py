@@ -0,0 +1,61 @@
+import os
+import json
+import gzip
+from datetime import datetime, timezone
+from config.config import PAYLOAD_ARCHIVE_DIR
+from .streaming_export import jsonl_chunk
+
+SEGMENT_SUFFIX = '.jsonl.gz'
+
+
+class PayloadArchive:
+    def __init__(self, root=PAYLOAD_ARCHIVE_DIR, segment_records=5000):
+        """Append-only archive of raw Reddit API payloads.
+
+        Every fetched post and comment is stored as one JSON line in gzip
+        segment files that are written once and never modified; segment
+        names sort chronologically. Replaying the archive lets new analyzers
+        or sentiment thresholds run over old data without the network.
+        """
+        self.root = root
+        self.segment_records = segment_records
+        os.makedirs(root, exist_ok=True)
+
+    def append(self, payloads, query=None):
+        """Write a batch of payload entries as new segment(s); returns their paths."""
+        fetched_at = datetime.now(timezone.utc)
+        entries = [dict(entry, query=query, fetched_at=int(fetched_at.timestamp())) for entry in payloads]
+        stamp = fetched_at.strftime('%Y%m%dT%H%M%S%f')
+        paths = []
+        for seq, start in enumerate(range(0, len(entries), self.segment_records)):
+            name = f"{stamp}-{os.getpid()}-{seq:04d}{SEGMENT_SUFFIX}"
+            path = os.path.join(self.root, name)
+            tmp_path = path + '.tmp'
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                f.write(jsonl_chunk(entries[start:start + self.segment_records]))
+            # Segments appear atomically, so readers never see a partial file
+            os.replace(tmp_path, path)
+            paths.append(path)
+        return paths
+
+    def segments(self):
+        return sorted(
+            os.path.join(self.root, name) for name in os.listdir(self.root)
+            if name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def read(self, query=None, since=None):
+        """Yield archived entries in write order, optionally for one query or since a datetime."""
+        since = since.replace(tzinfo=timezone.utc).timestamp() if since is not None else None
+        for path in self.segments():
+            try:
+                with gzip.open(path, 'rt', encoding='utf-8') as f:
+                    for line in f:
+                        entry = json.loads(line)
+                        if query is not None and entry.get('query') != query:
+                            continue
+                        if since is not None and entry.get('fetched_at', 0) < since:
+                            continue
+                        yield entry
+            except (OSError, ValueError) as e:
+                print(f"Error reading archive segment {path}: {e}")
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+
+def _as_float(values):
+    """Numeric x values for LTTB (datetimes and dates become epoch seconds)."""
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=np.float64)
+    return pd.to_datetime(values).values.astype('datetime64[s]').astype(np.float64)
+
+
+def lttb_indices(x, y, threshold):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last point and, from each of ``threshold - 2``
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the mean of the next bucket, which preserves
+    the visual shape of the series (peaks included).
+    """
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[end:next_end].mean() if next_end > end else x[-1]
+        next_y = y[end:next_end].mean() if next_end > end else y[-1]
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def downsample_timeline(df, x, y, group=None, max_points=5000):
+    """Downsample a (grouped) time series with LTTB to at most ``max_points`` rows in total."""
+    if len(df) <= max_points:
+        return df
+    df = df.sort_values(x)
+    if group is None:
+        return df.iloc[lttb_indices(df[x], df[y], max_points)]
+
+    groups = df.groupby(group, observed=True, sort=False)
+    per_group = max(3, max_points // max(groups.ngroups, 1))
+    parts = [part.iloc[lttb_indices(part[x], part[y], per_group)] for _, part in groups]
+    return pd.concat(parts)
+
+
+def density_grid(x, y, bins=50, values=None):
+    """2-D histogram of (x, y) with optional per-cell means of ``values``.
+
+    Returns ``(counts, means, x_edges, y_edges)``; ``counts`` and ``means``
+    are indexed [y_bin, x_bin] as image/heatmap libraries expect, and
+    ``means`` is None without ``values``. The output size depends only on
+    ``bins``, not on the number of points.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    means = None
+    if values is not None:
+        sums, _, _ = np.histogram2d(x, y, bins=[x_edges, y_edges], weights=np.asarray(values, dtype=np.float64))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = (sums / counts).T
+    return counts.T, means, x_edges, y_edges
+
+
+def sparse_points(x, y, x_edges, y_edges, counts, max_count=2):
+    """Mask of points that fall in cells holding at most ``max_count`` points (outliers)."""
+    x_bin = np.clip(np.searchsorted(x_edges, x, side='right') - 1, 0, len(x_edges) - 2)
+    y_bin = np.clip(np.searchsorted(y_edges, y, side='right') - 1, 0, len(y_edges) - 2)
+    return counts[y_bin, x_bin] <= max_count
@@ -0,0 +1,139 @@
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import textstat
+
+WORD_RE = re.compile(r"[A-Za-z0-9]+(?:'[A-Za-z]+)?")
+SENTENCE_END_RE = re.compile(r"[.!?]+(?=\s|$)")
+
+# Column order of the per-record count matrix
+COUNT_COLUMNS = ['sentences', 'words', 'syllables', 'letters', 'characters']
+METRICS = ['flesch_reading_ease', 'flesch_kincaid_grade',
+           'automated_readability_index', 'coleman_liau_index']
+
+
+@lru_cache(maxsize=200_000)
+def syllable_count(word):
+    """Syllables in a single lower-cased word (memoized across the corpus)."""
+    return max(1, textstat.syllable_count(word))
+
+
+def text_counts(text):
+    """Count sentences, words, syllables, letters and characters in one pass over the words."""
+    if not text:
+        return 0, 0, 0, 0, 0
+
+    words = WORD_RE.findall(text)
+    if not words:
+        return 0, 0, 0, 0, 0
+
+    syllables = letters = characters = 0
+    for word in words:
+        lowered = word.lower()
+        syllables += syllable_count(lowered)
+        characters += len(word)
+        letters += sum(ch.isalpha() for ch in word)
+
+    sentences = max(1, len(SENTENCE_END_RE.findall(text)))
+    return sentences, len(words), syllables, letters, characters
+
+
+def scores_from_counts(counts):
+    """Derive the four readability formulas from an (n, 5) count matrix.
+
+    Rows without words yield NaN.
+    """
+    counts = np.asarray(counts, dtype=np.float64).reshape(-1, len(COUNT_COLUMNS))
+    sentences, words, syllables, letters, characters = counts.T
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        words_safe = np.where(words > 0, words, np.nan)
+        words_per_sentence = words_safe / np.where(sentences > 0, sentences, np.nan)
+        syllables_per_word = syllables / words_safe
+        chars_per_word = characters / words_safe
+        letters_per_100 = letters / words_safe * 100
+        sentences_per_100 = sentences / words_safe * 100
+
+    return {
+        'flesch_reading_ease': 206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word,
+        'flesch_kincaid_grade': 0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59,
+        'automated_readability_index': 4.71 * chars_per_word + 0.5 * words_per_sentence - 21.43,
+        'coleman_liau_index': 0.0588 * letters_per_100 - 0.296 * sentences_per_100 - 15.8
+    }
+
+
+def readability_scores(text):
+    """All four readability scores for a single text."""
+    scores = scores_from_counts(text_counts(text))
+    return {metric: float(np.round(values[0], 2)) for metric, values in scores.items()}
+
+
+class ReadabilityEngine:
+    def __init__(self):
+        """Per-record and per-community readability built on shared text counts."""
+        pass
+
+    @staticmethod
+    def record_counts(results):
+        """Count matrix with one row per record (title and body combined)."""
+        counts = np.zeros((len(results), len(COUNT_COLUMNS)), dtype=np.int64)
+        for i, record in enumerate(results):
+            title = record.get('title') or ''
+            text = record.get('text') or ''
+            counts[i] = text_counts(f"{title}. {text}" if title else text)
+        return counts
+
+    def record_scores(self, results, counts=None):
+        """DataFrame of counts and readability scores for every record."""
+        if counts is None:
+            counts = self.record_counts(results)
+        df = pd.DataFrame(counts, columns=COUNT_COLUMNS)
+        for metric, values in scores_from_counts(counts).items():
+            df[metric] = np.round(values, 2)
+        return df
+
+    def aggregate(self, results, by='subreddit', window_hours=None, counts=None):
+        """Readability per group, computed from summed counts.
+
+        ``by`` is a record field (e.g. ``'subreddit'``) or None; when
+        ``window_hours`` is set, groups are further split into time windows
+        of that length. Counts are summed per group with ``np.add.at`` and the
+        formulas are applied once per group.
+        """
+        if counts is None:
+            counts = self.record_counts(results)
+        if len(counts) == 0:
+            return pd.DataFrame(columns=['records'] + COUNT_COLUMNS + METRICS)
+
+        keys = {}
+        if by:
+            keys[by] = np.array([str(r.get(by, 'unknown')) for r in results], dtype=object)
+        if window_hours:
+            timestamps = pd.to_datetime([r['created_utc'] for r in results]).values.astype('datetime64[s]')
+            window = np.timedelta64(int(window_hours * 3600), 's')
+            epoch = np.datetime64(0, 's')
+            keys['window'] = epoch + (timestamps - epoch) // window * window
+
+        if len(keys) == 1:
+            name, values = next(iter(keys.items()))
+            codes, uniques = pd.factorize(values, sort=True)
+            uniques = pd.Index(uniques, name=name)
+        elif keys:
+            group_index = pd.MultiIndex.from_arrays(list(keys.values()), names=list(keys.keys()))
+            codes, uniques = group_index.factorize(sort=True)
+            uniques = pd.MultiIndex.from_tuples(uniques, names=list(keys.keys()))
+        else:
+            codes = np.zeros(len(counts), dtype=np.int64)
+            uniques = pd.Index(['all'], name='group')
+
+        n_groups = len(uniques)
+        group_counts = np.zeros((n_groups, len(COUNT_COLUMNS)), dtype=np.int64)
+        np.add.at(group_counts, codes, counts)
+        records = np.bincount(codes, minlength=n_groups)
+
+        df = pd.DataFrame(group_counts, columns=COUNT_COLUMNS, index=uniques)
+        df.insert(0, 'records', records)
+        for metric, values in scores_from_counts(group_counts).items():
+            df[metric] = np.round(values, 2)
+        return df
@@ -0,0 +1,239 @@
+import os
+import mmap
+import json
+import zlib
+import random
+import struct
+from datetime import datetime
+import numpy as np
+
+# File layout: MAGIC, then per record a header (payload length, CRC-32) and a
+# UTF-8 JSON payload. ``<path>.idx`` holds the record offsets as uint64.
+MAGIC = b'RRF1\n'
+HEADER = struct.Struct('<II')
+INDEX_SUFFIX = '.idx'
+DATETIME_FIELDS = ('created_utc',)
+
+
+def encode_record(record):
+    return json.dumps(record, default=str, ensure_ascii=False).encode('utf-8')
+
+
+def decode_record(payload):
+    record = json.loads(bytes(payload).decode('utf-8'))
+    for field in DATETIME_FIELDS:
+        value = record.get(field)
+        if isinstance(value, str):
+            try:
+                record[field] = datetime.fromisoformat(value)
+            except ValueError:
+                pass
+    return record
+
+
+class RecordWriter:
+    def __init__(self, path, append=False):
+        """Writes length-prefixed JSON records plus an offset index.
+
+        With ``append`` new records are added after the existing ones (the
+        index is extended, or rebuilt if it is missing or stale).
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.offsets = []
+        if append and os.path.exists(path) and os.path.getsize(path) >= len(MAGIC):
+            with RecordReader(path) as reader:
+                self.offsets = reader.offsets.tolist()
+                end = reader.end
+            self.file = open(path, 'r+b')
+            # Drop an incomplete tail left by an interrupted write (``end`` is
+            # the file size unless the last record runs past it)
+            self.file.truncate(end)
+            self.file.seek(end)
+        else:
+            self.file = open(path, 'wb')
+            self.file.write(MAGIC)
+
+    def write(self, record):
+        payload = encode_record(record)
+        self.offsets.append(self.file.tell())
+        self.file.write(HEADER.pack(len(payload), zlib.crc32(payload)))
+        self.file.write(payload)
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+        return len(self.offsets)
+
+    def close(self):
+        if self.file.closed:
+            return
+        size = self.file.tell()
+        self.file.close()
+        np.asarray(self.offsets + [size], dtype='<u8').tofile(self.path + INDEX_SUFFIX)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordReader:
+    def __init__(self, path):
+        """Memory-mapped reader for files written by RecordWriter.
+
+        Records are located through the offset index (rebuilt by one
+        checksum-verified scan when it is missing or does not match the
+        file), so reader[i] and sample() touch only the pages they need.
+        Payloads are checked and decoded straight from the map; payload()
+        and iter_payloads() return copies, so nothing handed out pins the
+        map open. A record whose checksum, UTF-8 or JSON does not decode is
+        skipped and logged in ``errors`` instead of failing the whole file;
+        so is a corrupt header found while rebuilding the index, and reading
+        resumes at the next record.
+        """
+        self.path = path
+        self.errors = []
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        if self._map is None or self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Not a record file: {path}")
+        self._view = memoryview(self._map)
+        self.offsets, self.end = self._load_index(size)
+
+    def _load_index(self, size):
+        index_path = self.path + INDEX_SUFFIX
+        if os.path.exists(index_path):
+            index = np.fromfile(index_path, dtype='<u8')
+            # The index ends with the file size it was written for
+            if len(index) and int(index[-1]) == size:
+                return index[:-1], size
+        return self._scan(size)
+
+    def _record_at(self, position, size):
+        """True if a complete record with a matching checksum starts at ``position``."""
+        if position + HEADER.size > size:
+            return False
+        length, checksum = HEADER.unpack_from(self._map, position)
+        start = position + HEADER.size
+        if length == 0 or start + length > size:
+            return False
+        with self._view[start:start + length] as payload:
+            return zlib.crc32(payload) == checksum
+
+    def _resync(self, position, size):
+        """Offset of the next verifiable record at or after ``position``, or None."""
+        for candidate in range(position, size - HEADER.size + 1):
+            if self._record_at(candidate, size):
+                return candidate
+        return None
+
+    def _scan(self, size):
+        # A record whose checksum fails is kept (and logged when decoded) if
+        # the file ends or a valid record follows it; otherwise its header is
+        # taken as corrupt and the scan resumes at the next valid record.
+        # Only an unreadable tail running past the end of the file, i.e. an
+        # interrupted write, is left out of ``end``.
+        offsets = []
+        position = len(MAGIC)
+        while position + HEADER.size <= size:
+            length, _ = HEADER.unpack_from(self._map, position)
+            end = position + HEADER.size + length
+            if self._record_at(position, size) or end == size or (end < size and self._record_at(end, size)):
+                offsets.append(position)
+                position = end
+                continue
+            following = self._resync(position + 1, size)
+            if following is None and end > size:
+                break
+            skipped_to = size if following is None else following
+            self.errors.append({'index': None, 'offset': position,
+                                'error': f"corrupt record header, skipped {skipped_to - position} bytes"})
+            position = skipped_to
+        return np.asarray(offsets, dtype='<u8'), position
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _payload_view(self, index):
+        # Zero-copy slice of the map; must not outlive the call that made it
+        offset = int(self.offsets[index])
+        length, _ = HEADER.unpack_from(self._map, offset)
+        start = offset + HEADER.size
+        return self._view[start:start + length]
+
+    def payload(self, index):
+        """One record's JSON bytes."""
+        with self._payload_view(index) as view:
+            return view.tobytes()
+
+    def _decode(self, index):
+        offset = int(self.offsets[index])
+        length, checksum = HEADER.unpack_from(self._map, offset)
+        with self._payload_view(index) as payload:
+            try:
+                if zlib.crc32(payload) != checksum:
+                    raise ValueError("checksum mismatch")
+                return decode_record(payload)
+            except ValueError as e:
+                # UnicodeDecodeError and JSONDecodeError are ValueErrors too
+                self.errors.append({'index': index, 'offset': offset, 'error': str(e)})
+                return None
+
+    def __getitem__(self, index):
+        """Record at a position (negative indices allowed), or None if it is corrupt."""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("record index out of range")
+        return self._decode(index)
+
+    def iter_payloads(self):
+        for index in range(len(self)):
+            yield self.payload(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            record = self._decode(index)
+            if record is not None:
+                yield record
+
+    def sample(self, n, seed=None):
+        """Up to n random records without reading the rest of the file."""
+        picks = random.Random(seed).sample(range(len(self)), min(n, len(self)))
+        records = (self._decode(index) for index in sorted(picks))
+        return [record for record in records if record is not None]
+
+    def close(self):
+        if getattr(self, '_view', None) is not None:
+            self._view.release()
+            self._view = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_records(records, path, append=False):
+    """Write records to a record file; returns the total number of records."""
+    with RecordWriter(path, append=append) as writer:
+        return writer.write_many(records)
+
+
+def read_records(path):
+    """Yield every decodable record of a record file."""
+    with RecordReader(path) as reader:
+        yield from reader
+        if reader.errors:
+            print(f"Skipped {len(reader.errors)} corrupt records in {path}")
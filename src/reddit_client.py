@@ -3,13 +3,19 @@ import asyncio
 from langdetect import detect
 
 class RedditClient:
-    def __init__(self, client_id, client_secret, user_agent):
+    def __init__(self, client_id, client_secret, user_agent, store=None, archive=None):
         self.client_id = client_id
         self.client_secret = client_secret
         self.user_agent = user_agent
+        # Optional ResultStore; every search is upserted into it
+        self.store = store
+        # Optional PayloadArchive; raw API payloads of every search are appended to it
+        self.archive = archive
         
-    async def search_reddit(self, query, limit=100, max_retries=3, retry_delay=2):
+    async def search_reddit(self, query, limit=100, max_retries=3, retry_delay=2, sketch=None):
+        """Search r/all; ``sketch`` (a SummarySketch) is updated as each post and its comments arrive."""
         results = []
+        payloads = []
         reddit = None
         
         for attempt in range(max_retries):
@@ -25,10 +31,15 @@ class RedditClient:
                     try:
                         if not post.author:
                             continue
-                            
+                        
+                        post_data = self.raw_payload(post)
+                        payloads.append({'kind': 'post', 'data': post_data})
                         if self.is_english(post.title + " " + post.selftext):
-                            results.append(self.process_post(post))
-                            await self.process_comments(post, results)
+                            start = len(results)
+                            results.append(self.build_post(post_data))
+                            await self.process_comments(post, results, payloads)
+                            if sketch is not None:
+                                sketch.update(results[start:])
 
                     except Exception as e:
                         print(f"Error processing post: {e}")
@@ -47,12 +58,68 @@ class RedditClient:
             finally:
                 if reddit:
                     await reddit.close()
+        
+        if payloads and self.archive is not None:
+            try:
+                self.archive.append(payloads, query=query)
+            except Exception as e:
+                print(f"Error archiving payloads: {e}")
                     
         if not results:
             print("No results found. Please try a different search query.")
+        else:
+            self._store(results)
             
         return results
 
+    def records_from_archive(self, archive, query=None, since=None, sketch=None):
+        """Rebuild results from archived payloads with the current analysis code (no network).
+        
+        Posts and comments fetched more than once are taken from their most
+        recent payload. Results are upserted into the store like a search.
+        ``sketch`` is updated per post like in search_reddit().
+        """
+        posts = {}
+        comments = {}
+        for entry in archive.read(query=query, since=since):
+            data = entry['data']
+            if entry['kind'] == 'post':
+                posts[data['id']] = data
+            else:
+                comments[data['id']] = (entry['post_id'], data)
+        
+        results = []
+        by_post = {}
+        for post_id, data in comments.values():
+            by_post.setdefault(post_id, []).append(data)
+        for post_id, post_data in posts.items():
+            try:
+                if not self.is_english((post_data.get('title') or '') + " " + (post_data.get('selftext') or '')):
+                    continue
+                start = len(results)
+                results.append(self.build_post(post_data))
+                for comment_data in by_post.get(post_id, []):
+                    if self.is_english(comment_data.get('body') or ''):
+                        results.append(self.build_comment(comment_data, post_data))
+                if sketch is not None:
+                    sketch.update(results[start:])
+            except Exception as e:
+                print(f"Error reprocessing post {post_id}: {e}")
+        
+        print(f"Rebuilt {len(results)} records from {len(posts)} archived posts")
+        if results:
+            self._store(results)
+        return results
+
+    def _store(self, results):
+        if self.store is None:
+            return
+        try:
+            posts, comments = self.store.upsert(results)
+            print(f"Stored {posts} posts and {comments} comments")
+        except Exception as e:
+            print(f"Error storing results: {e}")
+
     @staticmethod
     def is_english(text):
         try:
@@ -60,45 +127,73 @@ class RedditClient:
         except:
             return False
 
-    def process_post(self, post):
+    @staticmethod
+    def raw_payload(item):
+        """JSON-safe copy of the API fields of a post or comment."""
+        data = {
+            key: value for key, value in vars(item).items()
+            if not key.startswith('_') and isinstance(value, (str, int, float, bool, list, dict, type(None)))
+        }
+        for key in ('author', 'subreddit'):
+            value = vars(item).get(key)
+            if value is not None:
+                data[key] = str(value)
+        return data
+
+    def build_post(self, data):
+        """Analysis record for a post payload."""
         from .sentiment_analysis import analyze_sentiment
         from datetime import datetime
+        title = data.get('title') or ''
+        selftext = data.get('selftext') or ''
         return {
             'type': 'post',
-            'title': post.title,
-            'author': str(post.author),
-            'score': post.score,
-            'url': post.url,
-            'subreddit': str(post.subreddit),
-            'text': post.selftext,
-            'sentiment': analyze_sentiment(post.title + " " + post.selftext),
-            'created_utc': datetime.fromtimestamp(post.created_utc),
-            'num_comments': post.num_comments,
-            'upvote_ratio': getattr(post, 'upvote_ratio', 0.5),
-            'id': post.id
+            'title': title,
+            # str() as before archiving: a deleted author is recorded as "None"
+            'author': str(data.get('author')),
+            'score': data.get('score', 0),
+            'url': data.get('url'),
+            'subreddit': str(data.get('subreddit')),
+            'text': selftext,
+            'sentiment': analyze_sentiment(title + " " + selftext),
+            'created_utc': datetime.fromtimestamp(data['created_utc']),
+            'num_comments': data.get('num_comments', 0),
+            'upvote_ratio': data.get('upvote_ratio', 0.5),
+            'id': data['id']
         }
 
-    async def process_comments(self, post, results):
+    def build_comment(self, data, post_data):
+        """Analysis record for a comment payload and the payload of its post."""
         from .sentiment_analysis import analyze_sentiment
         from datetime import datetime
+        return {
+            'type': 'comment',
+            'author': str(data.get('author')),
+            'score': data.get('score', 0),
+            'text': data.get('body') or '',
+            'post_title': post_data.get('title'),
+            'post_url': post_data.get('url'),
+            'sentiment': analyze_sentiment(data.get('body') or ''),
+            'created_utc': datetime.fromtimestamp(data['created_utc']),
+            'post_id': post_data['id'],
+            'comment_id': data['id'],
+            'subreddit': str(post_data.get('subreddit'))
+        }
+
+    def process_post(self, post):
+        return self.build_post(self.raw_payload(post))
+
+    async def process_comments(self, post, results, payloads=None):
         try:
             await post.load()
+            post_data = self.raw_payload(post)
             comments = await post.comments()
             await comments.replace_more(limit=0)
             async for comment in comments:
+                comment_data = self.raw_payload(comment)
+                if payloads is not None:
+                    payloads.append({'kind': 'comment', 'post_id': post.id, 'data': comment_data})
                 if self.is_english(comment.body):
-                    results.append({
-                        'type': 'comment',
-                        'author': str(comment.author),
-                        'score': comment.score,
-                        'text': comment.body,
-                        'post_title': post.title,
-                        'post_url': post.url,
-                        'sentiment': analyze_sentiment(comment.body),
-                        'created_utc': datetime.fromtimestamp(comment.created_utc),
-                        'post_id': post.id,
-                        'comment_id': comment.id,
-                        'subreddit': str(post.subreddit)
-                    })
+                    results.append(self.build_comment(comment_data, post_data))
         except Exception as e:
-            print(f"Error fetching comments: {e}") 
\ No newline at end of file
+            print(f"Error fetching comments: {e}")
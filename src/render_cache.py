@@ -0,0 +1,161 @@
+import os
+import json
+import shutil
+import hashlib
+import pandas as pd
+import matplotlib
+import matplotlib.pyplot as plt
+from config.config import RENDER_CACHE_DIR, RENDER_CACHE_MAX_BYTES
+
+# Bump when figure code changes in a way the spec does not capture
+RENDER_VERSION = 2
+
+
+def _update_hash(digest, value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest.update(repr(value.shape).encode())
+        names = value.columns if isinstance(value, pd.DataFrame) else [value.name]
+        digest.update(repr([str(name) for name in names]).encode())
+        digest.update(repr(list(value.index.names)).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"seq{len(value)}".encode())
+        for item in value:
+            _update_hash(digest, item)
+    elif isinstance(value, dict):
+        digest.update(f"map{len(value)}".encode())
+        for key in sorted(value, key=str):
+            digest.update(str(key).encode('utf-8', errors='replace'))
+            _update_hash(digest, value[key])
+    else:
+        digest.update(json.dumps(value, default=repr).encode('utf-8', errors='replace'))
+        digest.update(b'\0')
+
+
+def content_fingerprint(*parts):
+    """SHA-256 over DataFrames/Series, containers and JSON-serializable values."""
+    digest = hashlib.sha256()
+    for part in parts:
+        _update_hash(digest, part)
+    return digest.hexdigest()
+
+
+def style_fingerprint(style=None):
+    """Hash of a matplotlib style spec and the library version.
+
+    ``style`` is what the draw function applies itself (a style name, an
+    rcParams dict or a list of them, as for ``plt.style.context``), so
+    changes other code makes to the global rcParams do not affect the key.
+    """
+    digest = hashlib.sha256(matplotlib.__version__.encode())
+    _update_hash(digest, style)
+    return digest.hexdigest()
+
+
+def render_key(name, data, spec=None, style=None):
+    """Content address for one rendered file: figure name, input aggregates, spec and style."""
+    digest = hashlib.sha256(f"{RENDER_VERSION}:{name}".encode())
+    _update_hash(digest, data)
+    _update_hash(digest, spec or {})
+    digest.update(style_fingerprint(style).encode())
+    return digest.hexdigest()
+
+
+class RenderCache:
+    def __init__(self, cache_dir=RENDER_CACHE_DIR, max_bytes=RENDER_CACHE_MAX_BYTES):
+        """Disk cache of rendered figures and tables keyed by their inputs.
+
+        A render whose aggregates, spec and style are unchanged is
+        served by copying the stored file instead of drawing it again. Entries
+        are evicted least-recently-used first once the cache exceeds
+        ``max_bytes``. Several visualizers (and processes) can share one
+        directory.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, name, data, spec=None, style=None):
+        return render_key(name, data, spec, style)
+
+    def _entry_path(self, key, dest):
+        return os.path.join(self.cache_dir, key + os.path.splitext(dest)[1])
+
+    def fetch(self, key, dest):
+        """Copy a cached render to ``dest``; returns False on a miss."""
+        entry = self._entry_path(key, dest)
+        try:
+            shutil.copyfile(entry, dest)
+            # Refresh the entry's position in the LRU order
+            os.utime(entry)
+        except OSError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def store(self, key, path):
+        """Add a freshly rendered file to the cache."""
+        entry = self._entry_path(key, path)
+        tmp_path = f"{entry}.{os.getpid()}.tmp"
+        try:
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, entry)
+        except OSError as e:
+            print(f"Error storing render in cache: {e}")
+            return
+        self.evict()
+
+    def render(self, dest, name, data, spec, draw, style=None):
+        """Produce ``dest`` from the cache, or call ``draw(dest)`` and cache the result.
+
+        ``data`` should be the aggregates the figure is drawn from and
+        ``spec`` any parameters that change its appearance. ``draw`` runs
+        under ``plt.style.context(style)`` when a style is given. Returns
+        True on a cache hit.
+        """
+        key = self.key(name, data, spec, style)
+        if self.fetch(key, dest):
+            return True
+        if style is None:
+            draw(dest)
+        else:
+            with plt.style.context(style):
+                draw(dest)
+        if os.path.exists(dest):
+            self.store(key, dest)
+        return False
+
+    def entries(self):
+        """Cached files as (mtime, size, path), oldest first."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(entries)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for _, _, path in self.entries():
+            os.remove(path)
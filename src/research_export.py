@@ -1,15 +1,38 @@
 import os
-import json
 import csv
 from datetime import datetime
-import pandas as pd
 import matplotlib.pyplot as plt
 from tabulate import tabulate
+from .analysis_frame import as_analysis_frame
+from .render_cache import RenderCache
+from .columnar_export import write_parquet_dataset
+from .streaming_export import write_jsonl, write_csv
+
+# Style the publication figures are drawn with (and cached under)
+PUBLICATION_STYLE = ['default', {
+    'font.size': 12,
+    'axes.titlesize': 14,
+    'axes.labelsize': 12,
+    'xtick.labelsize': 10,
+    'ytick.labelsize': 10,
+    'legend.fontsize': 11,
+    'figure.titlesize': 16,
+    'font.family': 'serif'
+}]
+
+# Run ids double as the timestamp in every artifact's file name
+RUN_ID_FORMAT = "%Y%m%d_%H%M%S"
+
+
+def new_run_id():
+    return datetime.now().strftime(RUN_ID_FORMAT)
+
 
 class ResearchExporter:
-    def __init__(self, output_dir="research_output"):
+    def __init__(self, output_dir="research_output", render_cache=None):
         """Initialize research exporter with high-quality output settings."""
         self.output_dir = output_dir
+        self.render_cache = render_cache if render_cache is not None else RenderCache()
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
         
@@ -19,57 +42,49 @@ class ResearchExporter:
         plt.rcParams['savefig.bbox'] = 'tight'
         plt.rcParams['savefig.pad_inches'] = 0.1
         
-    def export_raw_data(self, results, filename="reddit_data"):
-        """Export raw data in multiple formats for research use."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # JSON export
-        json_file = f"{self.output_dir}/{filename}_{timestamp}.json"
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, default=str, ensure_ascii=False)
+    def export_raw_data(self, results, filename="reddit_data", compress=False, timestamp=None):
+        """Export raw data in multiple formats for research use.
         
-        # CSV export
-        csv_file = f"{self.output_dir}/{filename}_{timestamp}.csv"
+        Records are streamed to JSON Lines and CSV in fixed-size chunks, so
+        memory use does not grow with the corpus; ``compress`` gzips both.
+        """
+        timestamp = timestamp or new_run_id()
+        suffix = '.gz' if compress else ''
         
-        # Flatten the data for CSV
-        flattened_data = []
-        for item in results:
-            flat_item = {
-                'type': item.get('type', ''),
-                'title': item.get('title', item.get('post_title', '')),
-                'author': item.get('author', ''),
-                'score': item.get('score', 0),
-                'text': item.get('text', ''),
-                'sentiment': item.get('sentiment', ''),
-                'subreddit': item.get('subreddit', ''),
-                'created_utc': item.get('created_utc', ''),
-                'num_comments': item.get('num_comments', 0),
-                'upvote_ratio': item.get('upvote_ratio', 0),
-                'id': item.get('id', item.get('comment_id', '')),
-                'post_id': item.get('post_id', ''),
-                'url': item.get('url', item.get('post_url', ''))
-            }
-            flattened_data.append(flat_item)
+        # JSON Lines export (one record per line)
+        json_file = f"{self.output_dir}/{filename}_{timestamp}.jsonl{suffix}"
+        write_jsonl(results, json_file)
         
-        df = pd.DataFrame(flattened_data)
-        df.to_csv(csv_file, index=False, encoding='utf-8')
+        # CSV export
+        csv_file = f"{self.output_dir}/{filename}_{timestamp}.csv{suffix}"
+        write_csv(results, csv_file)
         
         print(f"Raw data exported to:")
-        print(f"  - JSON: {json_file}")
+        print(f"  - JSON Lines: {json_file}")
         print(f"  - CSV: {csv_file}")
         
         return json_file, csv_file
     
-    def export_analysis_summary(self, analysis_results, filename="analysis_summary"):
+    def export_parquet(self, results, filename="reddit_data", partition_cols=('subreddit', 'date'), timestamp=None):
+        """Export raw data as a columnar Parquet dataset partitioned by subreddit/date."""
+        timestamp = timestamp or new_run_id()
+        dataset_dir = f"{self.output_dir}/{filename}_{timestamp}_parquet"
+        
+        write_parquet_dataset(results, dataset_dir, partition_cols=partition_cols)
+        
+        print(f"Parquet dataset exported to: {dataset_dir}")
+        return dataset_dir
+    
+    def export_analysis_summary(self, analysis_results, filename="analysis_summary", timestamp=None):
         """Export analysis summary in LaTeX table format for research papers."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = timestamp or new_run_id()
         
         # Create comprehensive summary
         summary_file = f"{self.output_dir}/{filename}_{timestamp}.tex"
         
         with open(summary_file, 'w') as f:
             f.write("% Reddit Analysis Summary - LaTeX Tables for Research Papers\n")
-            f.write("% Generated on: " + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + "\n\n")
+            f.write("% Generated on: " + datetime.strptime(timestamp, RUN_ID_FORMAT).strftime("%Y-%m-%d %H:%M:%S") + "\n\n")
             
             # Basic statistics table
             if 'basic_stats' in analysis_results:
@@ -117,82 +132,82 @@ class ResearchExporter:
         print(f"LaTeX analysis summary exported to: {summary_file}")
         return summary_file
     
-    def create_publication_ready_figures(self, results, output_prefix="figure"):
+    def create_publication_ready_figures(self, results, output_prefix="figure", timestamp=None):
         """Create publication-ready figures with proper formatting."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Set publication style
-        plt.style.use('default')
-        plt.rcParams.update({
-            'font.size': 12,
-            'axes.titlesize': 14,
-            'axes.labelsize': 12,
-            'xtick.labelsize': 10,
-            'ytick.labelsize': 10,
-            'legend.fontsize': 11,
-            'figure.titlesize': 16,
-            'font.family': 'serif'
-        })
+        timestamp = timestamp or new_run_id()
         
-        df = pd.DataFrame(results)
-        df['created_utc'] = pd.to_datetime(df['created_utc'])
+        df = as_analysis_frame(results)
         
         figure_files = []
         
-        # Figure 1: Temporal Activity Pattern
-        fig, ax = plt.subplots(figsize=(10, 6))
-        daily_activity = df.groupby(df['created_utc'].dt.date).size()
+        # Figures are drawn in PUBLICATION_STYLE only when their aggregates changed;
+        # otherwise the render cache copies the previous 300 DPI file
         
-        ax.plot(daily_activity.index, daily_activity.values, 'o-', linewidth=2, markersize=6)
-        ax.set_xlabel('Date')
-        ax.set_ylabel('Number of Posts/Comments')
-        ax.set_title('Reddit Activity Over Time')
-        ax.grid(True, alpha=0.3)
-        plt.xticks(rotation=45)
+        # Figure 1: Temporal Activity Pattern
+        daily_activity = df.groupby('date', observed=True).size()
+        
+        def draw_temporal(path):
+            fig, ax = plt.subplots(figsize=(10, 6))
+            ax.plot(daily_activity.index, daily_activity.values, 'o-', linewidth=2, markersize=6)
+            ax.set_xlabel('Date')
+            ax.set_ylabel('Number of Posts/Comments')
+            ax.set_title('Reddit Activity Over Time')
+            ax.grid(True, alpha=0.3)
+            plt.xticks(rotation=45)
+            plt.savefig(path, dpi=300, bbox_inches='tight')
+            plt.close(fig)
         
         fig1_file = f"{self.output_dir}/{output_prefix}_temporal_{timestamp}.png"
-        plt.savefig(fig1_file, dpi=300, bbox_inches='tight')
+        self.render_cache.render(fig1_file, 'publication_temporal', daily_activity, None, draw_temporal,
+                                 style=PUBLICATION_STYLE)
         figure_files.append(fig1_file)
-        plt.close()
         
         # Figure 2: Sentiment Distribution
-        fig, ax = plt.subplots(figsize=(8, 6))
         sentiment_counts = df['sentiment'].value_counts()
+        sentiment_counts = sentiment_counts[sentiment_counts > 0]
         colors = ['#2E8B57', '#DC143C', '#4682B4']  # Professional colors
         
-        wedges, texts, autotexts = ax.pie(sentiment_counts.values, 
-                                         labels=sentiment_counts.index,
-                                         autopct='%1.1f%%',
-                                         colors=colors,
-                                         startangle=90)
-        
-        ax.set_title('Sentiment Distribution in Reddit Data')
+        def draw_sentiment(path):
+            fig, ax = plt.subplots(figsize=(8, 6))
+            wedges, texts, autotexts = ax.pie(sentiment_counts.values, 
+                                             labels=sentiment_counts.index,
+                                             autopct='%1.1f%%',
+                                             colors=colors,
+                                             startangle=90)
+            ax.set_title('Sentiment Distribution in Reddit Data')
+            plt.savefig(path, dpi=300, bbox_inches='tight')
+            plt.close(fig)
         
         fig2_file = f"{self.output_dir}/{output_prefix}_sentiment_{timestamp}.png"
-        plt.savefig(fig2_file, dpi=300, bbox_inches='tight')
+        self.render_cache.render(fig2_file, 'publication_sentiment', sentiment_counts, {'colors': colors},
+                                 draw_sentiment, style=PUBLICATION_STYLE)
         figure_files.append(fig2_file)
-        plt.close()
         
         # Figure 3: Subreddit Activity
         if 'subreddit' in df.columns:
-            fig, ax = plt.subplots(figsize=(12, 8))
-            top_subreddits = df['subreddit'].value_counts().head(10)
+            top_subreddits = df['subreddit'].value_counts()
+            top_subreddits = top_subreddits[top_subreddits > 0].head(10)
             
-            bars = ax.barh(range(len(top_subreddits)), top_subreddits.values)
-            ax.set_yticks(range(len(top_subreddits)))
-            ax.set_yticklabels([f'r/{sub}' for sub in top_subreddits.index])
-            ax.set_xlabel('Number of Posts/Comments')
-            ax.set_title('Top 10 Most Active Subreddits')
-            
-            # Add value labels on bars
-            for i, (bar, value) in enumerate(zip(bars, top_subreddits.values)):
-                ax.text(bar.get_width() + 0.1, bar.get_y() + bar.get_height()/2, 
-                       str(value), va='center', ha='left')
+            def draw_subreddits(path):
+                fig, ax = plt.subplots(figsize=(12, 8))
+                bars = ax.barh(range(len(top_subreddits)), top_subreddits.values)
+                ax.set_yticks(range(len(top_subreddits)))
+                ax.set_yticklabels([f'r/{sub}' for sub in top_subreddits.index])
+                ax.set_xlabel('Number of Posts/Comments')
+                ax.set_title('Top 10 Most Active Subreddits')
+                
+                # Add value labels on bars
+                for i, (bar, value) in enumerate(zip(bars, top_subreddits.values)):
+                    ax.text(bar.get_width() + 0.1, bar.get_y() + bar.get_height()/2, 
+                           str(value), va='center', ha='left')
+                
+                plt.savefig(path, dpi=300, bbox_inches='tight')
+                plt.close(fig)
             
             fig3_file = f"{self.output_dir}/{output_prefix}_subreddits_{timestamp}.png"
-            plt.savefig(fig3_file, dpi=300, bbox_inches='tight')
+            self.render_cache.render(fig3_file, 'publication_subreddits', top_subreddits, None, draw_subreddits,
+                                     style=PUBLICATION_STYLE)
             figure_files.append(fig3_file)
-            plt.close()
         
         print(f"Publication-ready figures created:")
         for fig_file in figure_files:
@@ -200,16 +215,16 @@ class ResearchExporter:
         
         return figure_files
     
-    def generate_methodology_section(self, results, query, keywords):
+    def generate_methodology_section(self, results, query, keywords, timestamp=None):
         """Generate a methodology section for research papers."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = timestamp or new_run_id()
         methodology_file = f"{self.output_dir}/methodology_{timestamp}.tex"
         
-        df = pd.DataFrame(results)
+        df = as_analysis_frame(results)
         
         with open(methodology_file, 'w') as f:
             f.write("% Methodology Section for Research Paper\n")
-            f.write("% Generated on: " + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + "\n\n")
+            f.write("% Generated on: " + datetime.strptime(timestamp, RUN_ID_FORMAT).strftime("%Y-%m-%d %H:%M:%S") + "\n\n")
             
             f.write("\\section{Methodology}\n\n")
             
@@ -240,59 +255,32 @@ class ResearchExporter:
         print(f"Methodology section generated: {methodology_file}")
         return methodology_file
     
-    def create_complete_research_package(self, results, analysis_results, query, keywords):
-        """Create a complete research package with all exports."""
+    def create_complete_research_package(self, results, analysis_results, query, keywords, frame=None,
+                                         incremental=True, zip_package=False, max_workers=4):
+        """Create a complete research package with all exports.
+        
+        Artifacts share one run id and are built concurrently; artifacts whose
+        inputs match the previous package are reused (``incremental``). A
+        manifest with SHA-256 hashes and sizes is written alongside, and
+        ``zip_package`` also bundles everything into one zip file.
+        """
+        from .research_package import ResearchPackageBuilder
         print("Creating complete research package...")
         
-        package_files = []
-        
-        # Export raw data
-        json_file, csv_file = self.export_raw_data(results)
-        package_files.extend([json_file, csv_file])
-        
-        # Export analysis summary
-        summary_file = self.export_analysis_summary(analysis_results)
-        package_files.append(summary_file)
-        
-        # Create publication figures
-        figure_files = self.create_publication_ready_figures(results)
-        package_files.extend(figure_files)
-        
-        # Generate methodology
-        methodology_file = self.generate_methodology_section(results, query, keywords)
-        package_files.append(methodology_file)
-        
-        # Create README for the package
-        readme_file = f"{self.output_dir}/README_research_package.txt"
-        with open(readme_file, 'w') as f:
-            f.write("REDDIT ANALYSIS RESEARCH PACKAGE\n")
-            f.write("=" * 40 + "\n\n")
-            f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Search query: {query}\n")
-            f.write(f"Keywords: {', '.join(keywords) if keywords else 'N/A'}\n\n")
-            
-            f.write("PACKAGE CONTENTS:\n")
-            f.write("-" * 20 + "\n")
-            for file_path in package_files:
-                filename = os.path.basename(file_path)
-                f.write(f"- {filename}\n")
-            
-            f.write("\nFILE DESCRIPTIONS:\n")
-            f.write("-" * 20 + "\n")
-            f.write("- *.json: Raw data in JSON format\n")
-            f.write("- *.csv: Raw data in CSV format for spreadsheet analysis\n")
-            f.write("- *.tex: LaTeX formatted tables and methodology section\n")
-            f.write("- *.png: High-resolution publication-ready figures (300 DPI)\n")
-            f.write("- README_research_package.txt: This file\n")
-        
-        package_files.append(readme_file)
+        builder = ResearchPackageBuilder(self, max_workers=max_workers)
+        manifest = builder.build(results, analysis_results, query, keywords, frame=frame,
+                                 incremental=incremental, zip_package=zip_package)
+        package_files = builder.package_files(manifest)
         
         print(f"\nComplete research package created in: {self.output_dir}/")
         print("Package includes:")
-        print("  ✓ Raw data (JSON, CSV)")
+        print("  ✓ Raw data (JSON Lines, CSV, Parquet)")
         print("  ✓ LaTeX formatted tables")
         print("  ✓ Publication-ready figures (300 DPI)")
         print("  ✓ Methodology section")
-        print("  ✓ Package documentation")
+        print("  ✓ Package documentation and manifest (SHA-256, sizes)")
+        if 'zip' in manifest:
+            print(f"  ✓ Zip archive: {manifest['zip']}")
+            package_files.append(manifest['zip'])
         
         return package_files
@@ -0,0 +1,217 @@
+import os
+import json
+import shutil
+import hashlib
+import zipfile
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from .analysis_frame import as_analysis_frame, FRAME_COLUMNS
+from .render_cache import content_fingerprint, RENDER_VERSION
+from .research_export import RUN_ID_FORMAT, new_run_id
+from .streaming_export import iter_jsonl
+
+MANIFEST_NAME = 'package_manifest.json'
+README_NAME = 'README_research_package.txt'
+
+# Already-compressed formats are stored in the zip as-is
+STORED_EXTENSIONS = ('.png', '.parquet', '.gz', '.zip')
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def records_sha256(records):
+    """SHA-256 of the records' JSON Lines encoding, i.e. of what export_raw_data writes."""
+    digest = hashlib.sha256()
+    for block in iter_jsonl(records):
+        digest.update(block.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _expand(paths):
+    """Files behind artifact paths (directories such as Parquet datasets are walked)."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, name) for name in sorted(names))
+        else:
+            files.append(path)
+    return files
+
+
+class ResearchPackageBuilder:
+    def __init__(self, exporter, max_workers=4):
+        """Builds a research package with ResearchExporter under one run id.
+
+        Independent artifacts are produced concurrently, so a package takes
+        about as long as its slowest artifact. Every artifact records a
+        fingerprint of its inputs in the manifest; when the previous
+        package's fingerprint matches and its files are intact, the files
+        are reused instead of regenerated. The manifest lists each file with
+        its SHA-256 and size, and the package can be written to one zip.
+        """
+        self.exporter = exporter
+        self.output_dir = exporter.output_dir
+        self.max_workers = max_workers
+        self.manifest_path = os.path.join(self.output_dir, MANIFEST_NAME)
+
+    def _previous_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading package manifest: {e}")
+            return {}
+
+    def _reusable(self, previous, name, inputs):
+        entry = previous.get('artifacts', {}).get(name)
+        if not entry or entry['inputs'] != inputs:
+            return None
+        for item in entry['files']:
+            path = os.path.join(self.output_dir, item['path'])
+            if not os.path.exists(path) or os.path.getsize(path) != item['bytes']:
+                return None
+        return entry
+
+    def _describe(self, paths):
+        return [
+            {'path': os.path.relpath(path, self.output_dir).replace(os.sep, '/'),
+             'sha256': file_sha256(path),
+             'bytes': os.path.getsize(path)}
+            for path in _expand(paths)
+        ]
+
+    def _artifacts(self, results, analysis_results, query, keywords, frame, run_id):
+        """(name, input fingerprint, producer, needs_main_thread) for every artifact."""
+        exporter = self.exporter
+        data_key = content_fingerprint(frame[FRAME_COLUMNS])
+        # The raw exports carry every record field, not only the frame columns
+        raw_key = records_sha256(results)
+        tables = {key: analysis_results[key] for key in ('basic_stats', 'sentiment_table') if key in analysis_results}
+        return [
+            ('raw_data', raw_key,
+             lambda: list(exporter.export_raw_data(results, timestamp=run_id)), False),
+            ('parquet', data_key,
+             lambda: [exporter.export_parquet(frame, timestamp=run_id)], False),
+            ('analysis_summary', content_fingerprint(tables),
+             lambda: [exporter.export_analysis_summary(analysis_results, timestamp=run_id)], False),
+            ('methodology', content_fingerprint(data_key, query, keywords),
+             lambda: [exporter.generate_methodology_section(frame, query, keywords, timestamp=run_id)], False),
+            # The figures set their own style; pyplot keeps global state, so they
+            # are drawn on the calling thread only
+            ('figures', content_fingerprint(data_key, RENDER_VERSION),
+             lambda: exporter.create_publication_ready_figures(frame, timestamp=run_id), True)
+        ]
+
+    def build(self, results, analysis_results, query, keywords, frame=None, run_id=None,
+              incremental=True, zip_package=False):
+        """Build the package; returns the manifest dict."""
+        if frame is None:
+            frame = as_analysis_frame(results)
+        run_id = run_id or new_run_id()
+        previous = self._previous_manifest() if incremental else {}
+
+        artifacts = {}
+        pending = []
+        for name, inputs, produce, main_thread in self._artifacts(results, analysis_results, query,
+                                                                 keywords, frame, run_id):
+            entry = self._reusable(previous, name, inputs)
+            if entry is not None:
+                print(f"  - {name}: unchanged, reusing files from run {entry['run_id']}")
+                artifacts[name] = dict(entry, reused=True)
+            else:
+                pending.append((name, inputs, produce, main_thread))
+
+        def run(name, inputs, produce):
+            paths = produce()
+            return name, {'inputs': inputs, 'run_id': run_id, 'reused': False, 'files': self._describe(paths)}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(run, name, inputs, produce)
+                       for name, inputs, produce, main_thread in pending if not main_thread]
+            built = [run(name, inputs, produce)
+                     for name, inputs, produce, main_thread in pending if main_thread]
+            built.extend(future.result() for future in futures)
+        artifacts.update(built)
+
+        manifest = {
+            'run_id': run_id,
+            'query': query,
+            'keywords': list(keywords or []),
+            'records': len(frame),
+            'artifacts': {name: artifacts[name] for name in sorted(artifacts)}
+        }
+        readme_file = self._write_readme(manifest)
+        manifest['readme'] = os.path.basename(readme_file)
+
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
+        if zip_package:
+            manifest['zip'] = self._write_zip(manifest)
+        return manifest
+
+    def package_files(self, manifest):
+        """Artifact paths (Parquet datasets as directories), README and manifest."""
+        paths = []
+        for entry in manifest['artifacts'].values():
+            for item in entry['files']:
+                top = item['path'].split('/')[0]
+                path = os.path.join(self.output_dir, top)
+                if path not in paths:
+                    paths.append(path)
+        paths.append(os.path.join(self.output_dir, manifest['readme']))
+        paths.append(self.manifest_path)
+        return paths
+
+    def _write_readme(self, manifest):
+        readme_file = os.path.join(self.output_dir, README_NAME)
+        generated = datetime.strptime(manifest['run_id'], RUN_ID_FORMAT)
+        with open(readme_file, 'w') as f:
+            f.write("REDDIT ANALYSIS RESEARCH PACKAGE\n")
+            f.write("=" * 40 + "\n\n")
+            f.write(f"Generated on: {generated.strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"Run id: {manifest['run_id']}\n")
+            f.write(f"Search query: {manifest['query']}\n")
+            keywords = manifest['keywords']
+            f.write(f"Keywords: {', '.join(keywords) if keywords else 'N/A'}\n\n")
+            
+            f.write("PACKAGE CONTENTS:\n")
+            f.write("-" * 20 + "\n")
+            for path in self.package_files(dict(manifest, readme=README_NAME))[:-2]:
+                f.write(f"- {os.path.basename(path)}\n")
+            
+            f.write("\nFILE DESCRIPTIONS:\n")
+            f.write("-" * 20 + "\n")
+            f.write("- *.jsonl: Raw data in JSON Lines format (one record per line)\n")
+            f.write("- *.csv: Raw data in CSV format for spreadsheet analysis\n")
+            f.write("- *_parquet/: Raw data as Parquet (zstd), partitioned as subreddit=<name>/date=<YYYY-MM-DD>\n")
+            f.write("- *.tex: LaTeX formatted tables and methodology section\n")
+            f.write("- *.png: High-resolution publication-ready figures (300 DPI)\n")
+            f.write(f"- {MANIFEST_NAME}: SHA-256 and size of every file, per artifact\n")
+            f.write(f"- {README_NAME}: This file\n")
+        return readme_file
+
+    def _write_zip(self, manifest):
+        """Stream every package file into research_package_<run_id>.zip (stable order and timestamps)."""
+        zip_path = os.path.join(self.output_dir, f"research_package_{manifest['run_id']}.zip")
+        date_time = datetime.strptime(manifest['run_id'], RUN_ID_FORMAT).timetuple()[:6]
+        with zipfile.ZipFile(zip_path, 'w') as archive:
+            for path in _expand(self.package_files(manifest)):
+                info = zipfile.ZipInfo(os.path.relpath(path, self.output_dir).replace(os.sep, '/'), date_time)
+                info.compress_type = (zipfile.ZIP_STORED if path.endswith(STORED_EXTENSIONS)
+                                      else zipfile.ZIP_DEFLATED)
+                with open(path, 'rb') as source, archive.open(info, 'w') as target:
+                    shutil.copyfileobj(source, target, 1 << 20)
+        return zip_path
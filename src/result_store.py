@@ -0,0 +1,225 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from config.config import RESULT_STORE_PATH
+from .online_trends import record_timestamp
+from .time_cube import TimeCube
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    subreddit TEXT NOT NULL,
+    author TEXT,
+    title TEXT,
+    text TEXT,
+    url TEXT,
+    score INTEGER NOT NULL DEFAULT 0,
+    num_comments INTEGER NOT NULL DEFAULT 0,
+    upvote_ratio REAL,
+    sentiment TEXT NOT NULL,
+    created_utc INTEGER NOT NULL,
+    fetched_at INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS comments (
+    id TEXT PRIMARY KEY,
+    post_id TEXT,
+    subreddit TEXT NOT NULL,
+    author TEXT,
+    text TEXT,
+    post_title TEXT,
+    post_url TEXT,
+    score INTEGER NOT NULL DEFAULT 0,
+    sentiment TEXT NOT NULL,
+    created_utc INTEGER NOT NULL,
+    fetched_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_subreddit ON posts (subreddit, created_utc);
+CREATE INDEX IF NOT EXISTS posts_created ON posts (created_utc);
+CREATE INDEX IF NOT EXISTS posts_sentiment ON posts (sentiment);
+CREATE INDEX IF NOT EXISTS comments_subreddit ON comments (subreddit, created_utc);
+CREATE INDEX IF NOT EXISTS comments_created ON comments (created_utc);
+CREATE INDEX IF NOT EXISTS comments_sentiment ON comments (sentiment);
+CREATE INDEX IF NOT EXISTS comments_post ON comments (post_id);
+CREATE VIEW IF NOT EXISTS records AS
+    SELECT 'post' AS type, id, id AS post_id, subreddit, author, title, text, url, score,
+           num_comments, upvote_ratio, sentiment, created_utc
+    FROM posts
+    UNION ALL
+    SELECT 'comment' AS type, id, post_id, subreddit, author, post_title AS title, text, post_url AS url, score,
+           NULL AS num_comments, NULL AS upvote_ratio, sentiment, created_utc
+    FROM comments;
+"""
+
+UPSERT_POST = """
+INSERT INTO posts (id, subreddit, author, title, text, url, score, num_comments, upvote_ratio,
+                   sentiment, created_utc, fetched_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    score = excluded.score,
+    num_comments = excluded.num_comments,
+    upvote_ratio = excluded.upvote_ratio,
+    title = excluded.title,
+    text = excluded.text,
+    sentiment = excluded.sentiment,
+    fetched_at = excluded.fetched_at
+"""
+
+UPSERT_COMMENT = """
+INSERT INTO comments (id, post_id, subreddit, author, text, post_title, post_url, score,
+                      sentiment, created_utc, fetched_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    score = excluded.score,
+    text = excluded.text,
+    sentiment = excluded.sentiment,
+    fetched_at = excluded.fetched_at
+"""
+
+
+def _epoch(value):
+    """Epoch seconds for a datetime (naive = wall-clock UTC), date string or number."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = pd.Timestamp(value).to_pydatetime()
+    return record_timestamp({'created_utc': value})
+
+
+class ResultStore:
+    def __init__(self, path=RESULT_STORE_PATH):
+        """Embedded SQLite store of every fetched post and comment, keyed by id.
+
+        Re-fetched records are upserted (score, comment count and sentiment
+        are refreshed). Posts and comments are indexed by subreddit, creation
+        time and sentiment, and the aggregation helpers run GROUP BY in SQL
+        so multi-week analyses never load raw records into pandas.
+        """
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def upsert(self, records):
+        """Insert or refresh records from RedditClient; returns (posts, comments) written."""
+        fetched_at = int(datetime.now(timezone.utc).timestamp())
+        posts, comments = [], []
+        for record in records:
+            created = record_timestamp(record)
+            if record.get('type') == 'comment':
+                comments.append((
+                    record.get('comment_id', record.get('id')), record.get('post_id'),
+                    record.get('subreddit', 'unknown'), record.get('author'), record.get('text'),
+                    record.get('post_title', record.get('title')), record.get('post_url', record.get('url')),
+                    record.get('score', 0) or 0, record.get('sentiment', 'neutral'), created, fetched_at
+                ))
+            else:
+                posts.append((
+                    record.get('id'), record.get('subreddit', 'unknown'), record.get('author'),
+                    record.get('title'), record.get('text'), record.get('url'),
+                    record.get('score', 0) or 0, record.get('num_comments', 0) or 0,
+                    record.get('upvote_ratio', 0.5), record.get('sentiment', 'neutral'), created, fetched_at
+                ))
+        with self._lock, self.conn:
+            self.conn.executemany(UPSERT_POST, posts)
+            self.conn.executemany(UPSERT_COMMENT, comments)
+        return len(posts), len(comments)
+
+    def _where(self, subreddits=None, since=None, until=None, sentiments=None):
+        clauses, params = [], []
+        if subreddits:
+            clauses.append(f"subreddit IN ({', '.join('?' * len(subreddits))})")
+            params.extend(subreddits)
+        if since is not None:
+            clauses.append("created_utc >= ?")
+            params.append(_epoch(since))
+        if until is not None:
+            clauses.append("created_utc < ?")
+            params.append(_epoch(until))
+        if sentiments:
+            clauses.append(f"sentiment IN ({', '.join('?' * len(sentiments))})")
+            params.extend(sentiments)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def query(self, sql, params=()):
+        """Run a read-only SQL query (tables: posts, comments, view: records) into a DataFrame."""
+        with self._lock:
+            return pd.read_sql_query(sql, self.conn, params=list(params))
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        with self._lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM records{where}", params).fetchone()[0]
+
+    def load(self, **filters):
+        """Records matching the filters, in the same shape RedditClient returns."""
+        where, params = self._where(**filters)
+        df = self.query(f"SELECT * FROM records{where} ORDER BY created_utc", params)
+        results = []
+        for row in df.itertuples(index=False):
+            record = {
+                'type': row.type,
+                'author': row.author,
+                'score': int(row.score),
+                'text': row.text,
+                'sentiment': row.sentiment,
+                'subreddit': row.subreddit,
+                'created_utc': datetime.fromtimestamp(int(row.created_utc), timezone.utc).replace(tzinfo=None)
+            }
+            if row.type == 'post':
+                record.update({'title': row.title, 'url': row.url, 'id': row.id,
+                               'num_comments': int(row.num_comments), 'upvote_ratio': row.upvote_ratio})
+            else:
+                record.update({'post_title': row.title, 'post_url': row.url,
+                               'post_id': row.post_id, 'comment_id': row.id})
+            results.append(record)
+        return results
+
+    def time_cube(self, **filters):
+        """TimeCube aggregated in SQL (subreddit x hour x sentiment x type)."""
+        where, params = self._where(**filters)
+        cells = self.query(f"""
+            SELECT subreddit, created_utc / 3600 AS hour, sentiment, type,
+                   COUNT(*) AS count, SUM(score) AS score_sum, SUM(score * score) AS score_sq
+            FROM records{where}
+            GROUP BY subreddit, hour, sentiment, type
+        """, params)
+        return TimeCube().append_cells(
+            cells['subreddit'], cells['hour'], cells['sentiment'], cells['type'],
+            cells['count'], cells['score_sum'], cells['score_sq'].astype(np.float64)
+        )
+
+    def subreddit_daily(self, **filters):
+        """Per subreddit and day: daily_posts, avg_score, total_score, positive_ratio.
+
+        Same layout as the table TrendAnalyzer.analyze_subreddit_trends builds,
+        so momentum can be computed from the store without loading records.
+        """
+        where, params = self._where(**filters)
+        daily = self.query(f"""
+            SELECT subreddit, created_utc / 86400 AS day,
+                   COUNT(*) AS daily_posts, AVG(score) AS avg_score, SUM(score) AS total_score,
+                   AVG(sentiment = 'positive') AS positive_ratio
+            FROM records{where}
+            GROUP BY subreddit, day
+            ORDER BY subreddit, day
+        """, params)
+        daily['subreddit'] = pd.Categorical(daily['subreddit'])
+        return daily.set_index(['subreddit', 'day']).round(3)
+
+    def distinct_count(self, column, **filters):
+        """Exact COUNT(DISTINCT column), e.g. unique authors over the whole history."""
+        if column not in ('author', 'subreddit', 'post_id'):
+            raise ValueError(f"Unsupported column: {column}")
+        where, params = self._where(**filters)
+        with self._lock:
+            return self.conn.execute(f"SELECT COUNT(DISTINCT {column}) FROM records{where}", params).fetchone()[0]
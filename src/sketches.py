@@ -0,0 +1,295 @@
+import math
+import heapq
+import random
+import hashlib
+import numpy as np
+
+
+def _hash64(value):
+    digest = hashlib.blake2b(str(value).encode('utf-8', errors='replace'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class HyperLogLog:
+    def __init__(self, precision=14):
+        """Mergeable distinct-count sketch with relative error ~1.04/sqrt(2^precision)."""
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add(self, value):
+        h = _hash64(value)
+        index = h >> (64 - self.precision)
+        remainder = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    @property
+    def relative_error(self):
+        """Standard error of count() relative to the true cardinality."""
+        return 1.04 / math.sqrt(self.m)
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m ** 2 / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        # Linear counting is more accurate for small cardinalities
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+
+    def to_dict(self):
+        return {'precision': self.precision, 'registers': self.registers.tobytes().hex()}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['precision'])
+        sketch.registers = np.frombuffer(bytes.fromhex(data['registers']), dtype=np.uint8).copy()
+        return sketch
+
+
+class KLLSketch:
+    def __init__(self, k=200, seed=0):
+        """Mergeable KLL quantile sketch; memory grows only logarithmically with the stream."""
+        self.k = k
+        self.c = 2 / 3
+        self.compactors = [[]]
+        self.size = 0
+        self.count = 0
+        self.min = None
+        self.max = None
+        self._rng = random.Random(seed)
+        self._max_size = self._capacity(0)
+
+    def _capacity(self, level):
+        height = len(self.compactors) - level - 1
+        return int(math.ceil(self.c ** height * self.k)) + 1
+
+    def _grow(self):
+        self.compactors.append([])
+        self._max_size = sum(self._capacity(level) for level in range(len(self.compactors)))
+
+    def add(self, value):
+        value = float(value)
+        self.compactors[0].append(value)
+        self.size += 1
+        self.count += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if self.size >= self._max_size:
+            self._compress()
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+        return self
+
+    def _compress(self):
+        for level in range(len(self.compactors)):
+            items = self.compactors[level]
+            if len(items) >= self._capacity(level):
+                if level + 1 >= len(self.compactors):
+                    self._grow()
+                items.sort()
+                # Keep every other item (random offset); an odd leftover stays at this level
+                leftover = [items.pop()] if len(items) % 2 else []
+                offset = self._rng.randint(0, 1)
+                self.compactors[level + 1].extend(items[offset::2])
+                self.compactors[level] = leftover
+                self.size = sum(len(c) for c in self.compactors)
+                if self.size < self._max_size:
+                    break
+
+    def merge(self, other):
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.count += other.count
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        self.size = sum(len(c) for c in self.compactors)
+        while self.size >= self._max_size:
+            self._compress()
+        return self
+
+    @property
+    def rank_error(self):
+        """Approximate normalized rank error of quantile() (DataSketches KLL bound)."""
+        return 2.296 / self.k ** 0.9723
+
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1), or None for an empty sketch."""
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs):
+        if self.count == 0:
+            return [None for _ in qs]
+        values = []
+        weights = []
+        for level, items in enumerate(self.compactors):
+            values.extend(items)
+            weights.extend([1 << level] * len(items))
+        order = np.argsort(values, kind='stable')
+        values = np.asarray(values)[order]
+        cumulative = np.cumsum(np.asarray(weights)[order])
+        total = cumulative[-1]
+        result = []
+        for q in qs:
+            if q <= 0:
+                result.append(self.min)
+            elif q >= 1:
+                result.append(self.max)
+            else:
+                position = int(np.searchsorted(cumulative, q * total, side='left'))
+                result.append(float(values[min(position, len(values) - 1)]))
+        return result
+
+    def to_dict(self):
+        return {'k': self.k, 'compactors': self.compactors, 'count': self.count,
+                'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['k'])
+        sketch.compactors = [[]]
+        for _ in range(len(data['compactors']) - 1):
+            sketch._grow()
+        sketch.compactors = [list(items) for items in data['compactors']]
+        sketch.size = sum(len(c) for c in sketch.compactors)
+        sketch.count = data['count']
+        sketch.min = data['min']
+        sketch.max = data['max']
+        return sketch
+
+
+class SpaceSaving:
+    def __init__(self, capacity=1000):
+        """Space-Saving heavy hitters: approximate top-k counts in fixed memory.
+
+        At most ``capacity`` items are tracked. Any item whose true count
+        exceeds total/capacity is guaranteed to be tracked, and each reported
+        count overestimates the true count by at most ``errors[item]``.
+        """
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+        self._heap = []
+
+    def add(self, item, count=1):
+        self.total += count
+        if item in self.counts:
+            self.counts[item] += count
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+            heapq.heappush(self._heap, (count, item))
+            return
+        # Replace the current minimum; heap entries may be stale (lazily refreshed)
+        while True:
+            minimum, victim = heapq.heappop(self._heap)
+            if self.counts[victim] == minimum:
+                break
+            heapq.heappush(self._heap, (self.counts[victim], victim))
+        del self.counts[victim]
+        del self.errors[victim]
+        self.counts[item] = minimum + count
+        self.errors[item] = minimum
+        heapq.heappush(self._heap, (minimum + count, item))
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+        return self
+
+    def merge(self, other):
+        counts = dict(self.counts)
+        errors = dict(self.errors)
+        for item, count in other.counts.items():
+            counts[item] = counts.get(item, 0) + count
+            errors[item] = errors.get(item, 0) + other.errors[item]
+        top = heapq.nlargest(self.capacity, counts.items(), key=lambda entry: entry[1])
+        self.counts = dict(top)
+        self.errors = {item: errors[item] for item in self.counts}
+        self.total += other.total
+        self._heap = [(count, item) for item, count in self.counts.items()]
+        heapq.heapify(self._heap)
+        return self
+
+    def most_common(self, n=None):
+        """(item, count) pairs like Counter.most_common, largest first."""
+        entries = sorted(self.counts.items(), key=lambda entry: entry[1], reverse=True)
+        return entries if n is None else entries[:n]
+
+    def to_dict(self):
+        return {'capacity': self.capacity, 'total': self.total,
+                'counts': self.counts, 'errors': self.errors}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['capacity'])
+        sketch.total = data['total']
+        sketch.counts = dict(data['counts'])
+        sketch.errors = dict(data['errors'])
+        sketch._heap = [(count, item) for item, count in sketch.counts.items()]
+        heapq.heapify(sketch._heap)
+        return sketch
+
+
+def engagement_score(score, num_comments, upvote_ratio):
+    """Engagement score used by the engagement charts."""
+    return score * 0.4 + num_comments * 0.4 + upvote_ratio * 100 * 0.2
+
+
+class SummarySketch:
+    def __init__(self, precision=14, k=200):
+        """Mergeable summary statistics, filled record by record while fetching.
+
+        Unique authors/subreddits use HyperLogLog; score and post engagement
+        quantiles use KLL. Shards can be summarized independently and combined
+        with merge().
+        """
+        self.authors = HyperLogLog(precision)
+        self.subreddits = HyperLogLog(precision)
+        self.scores = KLLSketch(k)
+        self.engagement = KLLSketch(k, seed=1)
+
+    def add(self, record):
+        self.authors.add(record.get('author', ''))
+        self.subreddits.add(record.get('subreddit', 'unknown'))
+        score = record.get('score', 0) or 0
+        self.scores.add(score)
+        if record.get('type', 'post') == 'post':
+            self.engagement.add(engagement_score(score, record.get('num_comments', 0) or 0,
+                                                 record.get('upvote_ratio', 0.5)))
+
+    def update(self, records):
+        for record in records:
+            self.add(record)
+        return self
+
+    def merge(self, other):
+        self.authors.merge(other.authors)
+        self.subreddits.merge(other.subreddits)
+        self.scores.merge(other.scores)
+        self.engagement.merge(other.engagement)
+        return self
+
+    @property
+    def total(self):
+        return self.scores.count
@@ -0,0 +1,127 @@
+import csv
+import io
+import gzip
+import json
+import asyncio
+
+# Columns of the flat CSV export (also the key order of flatten_record)
+EXPORT_COLUMNS = [
+    'type', 'title', 'author', 'score', 'text', 'sentiment', 'subreddit',
+    'created_utc', 'num_comments', 'upvote_ratio', 'id', 'post_id', 'url'
+]
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def flatten_record(item):
+    """Flat row for CSV export (posts and comments share one set of columns)."""
+    return {
+        'type': item.get('type', ''),
+        'title': item.get('title', item.get('post_title', '')),
+        'author': item.get('author', ''),
+        'score': item.get('score', 0),
+        'text': item.get('text', ''),
+        'sentiment': item.get('sentiment', ''),
+        'subreddit': item.get('subreddit', ''),
+        'created_utc': item.get('created_utc', ''),
+        'num_comments': item.get('num_comments', 0),
+        'upvote_ratio': item.get('upvote_ratio', 0),
+        'id': item.get('id', item.get('comment_id', '')),
+        'post_id': item.get('post_id', ''),
+        'url': item.get('url', item.get('post_url', ''))
+    }
+
+
+def _chunks(records, chunk_size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def _achunks(records, chunk_size):
+    chunk = []
+    async for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def jsonl_chunk(records):
+    """One JSON Lines block for a chunk of records."""
+    return ''.join(json.dumps(record, default=str, ensure_ascii=False) + '\n' for record in records)
+
+
+def csv_chunk(records, header=False):
+    """One CSV block (optionally with the header row) for a chunk of records."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    if header:
+        writer.writeheader()
+    writer.writerows(flatten_record(record) for record in records)
+    return buffer.getvalue()
+
+
+def iter_jsonl(records, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield JSON Lines text in chunks of ``chunk_size`` records."""
+    for chunk in _chunks(records, chunk_size):
+        yield jsonl_chunk(chunk)
+
+
+def iter_csv(records, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield CSV text (header first) in chunks of ``chunk_size`` records."""
+    yield csv_chunk([], header=True)
+    for chunk in _chunks(records, chunk_size):
+        yield csv_chunk(chunk)
+
+
+def _open_output(path, compress):
+    if compress is None:
+        compress = path.endswith('.gz')
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def _write_blocks(blocks, path, compress):
+    with _open_output(path, compress) as f:
+        for block in blocks:
+            f.write(block)
+    return path
+
+
+def write_jsonl(records, path, chunk_size=DEFAULT_CHUNK_SIZE, compress=None):
+    """Stream records to a JSON Lines file; memory use is bounded by one chunk.
+
+    ``compress`` defaults to gzip when ``path`` ends in ``.gz``.
+    """
+    return _write_blocks(iter_jsonl(records, chunk_size), path, compress)
+
+
+def write_csv(records, path, chunk_size=DEFAULT_CHUNK_SIZE, compress=None):
+    """Stream records to a flat CSV file; memory use is bounded by one chunk."""
+    return _write_blocks(iter_csv(records, chunk_size), path, compress)
+
+
+async def awrite_jsonl(records, path, chunk_size=DEFAULT_CHUNK_SIZE, compress=None):
+    """write_jsonl for an async iterator of records (e.g. results as they are fetched)."""
+    with _open_output(path, compress) as f:
+        async for chunk in _achunks(records, chunk_size):
+            await asyncio.to_thread(f.write, jsonl_chunk(chunk))
+    return path
+
+
+async def awrite_csv(records, path, chunk_size=DEFAULT_CHUNK_SIZE, compress=None):
+    """write_csv for an async iterator of records."""
+    with _open_output(path, compress) as f:
+        f.write(csv_chunk([], header=True))
+        async for chunk in _achunks(records, chunk_size):
+            await asyncio.to_thread(f.write, csv_chunk(chunk))
+    return path
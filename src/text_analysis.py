@@ -1,11 +1,11 @@
 from nltk.corpus import stopwords
-import string
 from collections import Counter
 from gensim import corpora, models
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from config.config import NLTK_DATA_DIR
+from .word_frequencies import count_words
 import nltk
 
 class TextAnalyzer:
@@ -23,26 +23,32 @@ class TextAnalyzer:
             print(f"Warning: Using simple keyword extraction due to error: {e}")
             return [query]
 
-    def extract_top_keywords(self, text, top_n=50):
+    @staticmethod
+    def _stop_words():
+        # Make sure stopwords are loaded from the correct path
         try:
-            translator = str.maketrans('', '', string.punctuation)
-            text = text.lower().translate(translator)
-            words = text.split()
-            
-            # Make sure stopwords are loaded from the correct path
-            try:
-                stop_words = set(stopwords.words('english'))
-            except LookupError:
-                nltk.download('stopwords', download_dir=NLTK_DATA_DIR)
-                stop_words = set(stopwords.words('english'))
-            
-            words = [word for word in words 
-                    if word not in stop_words 
-                    and len(word) > 2
-                    and not word.isdigit()]
-            
-            word_freq = Counter(words)
-            return [(count, word) for word, count in word_freq.most_common(top_n)]
+            return set(stopwords.words('english'))
+        except LookupError:
+            nltk.download('stopwords', download_dir=NLTK_DATA_DIR)
+            return set(stopwords.words('english'))
+
+    def keyword_counts(self, texts, counter=None):
+        """Word counts over texts, one record at a time (no combined corpus string).
+
+        Pass a ``SpaceSaving`` sketch as ``counter`` to bound memory.
+        """
+        try:
+            return count_words(texts, self._stop_words(), counter)
+        except Exception as e:
+            print(f"Error counting keywords: {e}")
+            return Counter()
+
+    def extract_top_keywords(self, text=None, top_n=50, counts=None):
+        """Top (count, word) pairs for a text, or from precomputed ``counts``."""
+        try:
+            if counts is None:
+                counts = self.keyword_counts([text])
+            return [(count, word) for word, count in counts.most_common(top_n)]
         except Exception as e:
             print(f"Error extracting top keywords: {e}")
             return []
@@ -0,0 +1,216 @@
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from .analysis_frame import as_analysis_frame, SENTIMENT_CATEGORIES, TYPE_CATEGORIES, DAY_NAMES
+
+EPOCH_DATE = date(1970, 1, 1)
+TIME_KEYS = ('hour', 'date', 'day_of_week', 'hour_bucket')
+
+
+N_SENTIMENTS = len(SENTIMENT_CATEGORIES)
+N_TYPES = len(TYPE_CATEGORIES)
+
+
+def _encode(subreddit, hours, sentiment, record_type):
+    # One int64 per cell: subreddit in the high bits, then hour bucket, sentiment and type
+    return (((subreddit << 32) | hours) * N_SENTIMENTS + sentiment) * N_TYPES + record_type
+
+
+class TimeCube:
+    def __init__(self):
+        """Sparse aggregation cube keyed by subreddit x hour bucket x sentiment x type.
+
+        Holds count, score sum and score sum-of-squares for every occupied
+        cell only, so memory follows the number of distinct cells rather
+        than the time span (a few old posts do not allocate every hour in
+        between). Built once per batch (and appended to incrementally);
+        every chart and table then rolls it up to hour of day, date, day of
+        week or subreddit in O(cells) instead of re-grouping raw records.
+        """
+        self.subreddits = []
+        self.subreddit_ids = {}
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.count = np.zeros(0, dtype=np.int64)
+        self.score_sum = np.zeros(0, dtype=np.int64)
+        self.score_sq = np.zeros(0, dtype=np.float64)
+
+    @classmethod
+    def from_frame(cls, data):
+        """Build a cube from an analysis frame or raw results."""
+        return cls().append(data)
+
+    @property
+    def total(self):
+        return int(self.count.sum())
+
+    def _subreddit_id(self, name):
+        if name not in self.subreddit_ids:
+            self.subreddit_ids[name] = len(self.subreddits)
+            self.subreddits.append(name)
+        return self.subreddit_ids[name]
+
+    def append(self, data):
+        """Add a batch of records (frame or raw results) to the cube."""
+        df = as_analysis_frame(data)
+        if df.empty:
+            return self
+
+        # Map the frame's subreddit categories onto stable cube ids
+        codes = df['subreddit'].cat.codes.to_numpy()
+        categories = df['subreddit'].cat.categories
+        code_to_id = np.full(len(categories), -1, dtype=np.int64)
+        for code in np.unique(codes[codes >= 0]):
+            code_to_id[code] = self._subreddit_id(categories[code])
+        if (codes < 0).any():
+            subreddit = np.where(codes >= 0, code_to_id[codes], self._subreddit_id('unknown'))
+        else:
+            subreddit = code_to_id[codes]
+
+        hours = df['timestamp'].to_numpy() // 3600
+        sentiment = df['sentiment'].cat.codes.to_numpy().astype(np.int64)
+        sentiment = np.where(sentiment >= 0, sentiment, SENTIMENT_CATEGORIES.index('neutral'))
+        record_type = df['type'].cat.codes.to_numpy().astype(np.int64)
+        record_type = np.where(record_type >= 0, record_type, TYPE_CATEGORIES.index('post'))
+
+        scores = df['score'].to_numpy()
+        return self._accumulate(subreddit, hours, sentiment, record_type,
+                                np.ones(len(df), dtype=np.int64), scores, scores.astype(np.float64) ** 2)
+
+    def append_cells(self, subreddits, hours, sentiments, types, count, score_sum, score_sq):
+        """Add pre-aggregated cells, e.g. from a SQL GROUP BY over the result store.
+
+        ``hours`` are epoch hour buckets; the other key arrays hold names.
+        """
+        if len(count) == 0:
+            return self
+        subreddit = np.array([self._subreddit_id(name or 'unknown') for name in subreddits], dtype=np.int64)
+        sentiment_ids = {name: i for i, name in enumerate(SENTIMENT_CATEGORIES)}
+        type_ids = {name: i for i, name in enumerate(TYPE_CATEGORIES)}
+        sentiment = np.array([sentiment_ids.get(name, sentiment_ids['neutral']) for name in sentiments], dtype=np.int64)
+        record_type = np.array([type_ids.get(name, type_ids['post']) for name in types], dtype=np.int64)
+        return self._accumulate(subreddit, np.asarray(hours, dtype=np.int64), sentiment, record_type,
+                                np.asarray(count, dtype=np.int64), np.asarray(score_sum, dtype=np.int64),
+                                np.asarray(score_sq, dtype=np.float64))
+
+    def _accumulate(self, subreddit, hours, sentiment, record_type, count, score_sum, score_sq):
+        # Merge the batch into the existing cells; cost is O((cells + batch) log)
+        keys = np.concatenate([self.keys, _encode(subreddit, hours.astype(np.int64), sentiment, record_type)])
+        self.keys, inverse = np.unique(keys, return_inverse=True)
+        size = len(self.keys)
+        self.count = np.bincount(inverse, weights=np.concatenate([self.count, count]),
+                                 minlength=size).astype(np.int64)
+        self.score_sum = np.bincount(inverse, weights=np.concatenate([self.score_sum, score_sum]),
+                                     minlength=size).astype(np.int64)
+        self.score_sq = np.bincount(inverse, weights=np.concatenate([self.score_sq, score_sq]),
+                                    minlength=size)
+        return self
+
+    def _cells(self):
+        """Decode the cell keys into (subreddit, hour bucket, sentiment, type) arrays."""
+        keys = self.keys
+        record_type = keys % N_TYPES
+        keys = keys // N_TYPES
+        sentiment = keys % N_SENTIMENTS
+        keys = keys // N_SENTIMENTS
+        return keys >> 32, keys & 0xFFFFFFFF, sentiment, record_type
+
+    def _time_labels(self, key, hours):
+        if key == 'hour':
+            return hours % 24
+        if key == 'date':
+            return hours // 24
+        if key == 'day_of_week':
+            # 1970-01-01 was a Thursday
+            return (hours // 24 + 3) % 7
+        return hours
+
+    def _label_values(self, key, codes):
+        if key == 'subreddit':
+            return pd.Index(np.asarray(self.subreddits, dtype=object)[codes], name=key)
+        if key == 'sentiment':
+            return pd.Index(np.asarray(SENTIMENT_CATEGORIES, dtype=object)[codes], name=key)
+        if key == 'type':
+            return pd.Index(np.asarray(TYPE_CATEGORIES, dtype=object)[codes], name=key)
+        if key == 'date':
+            return pd.Index([EPOCH_DATE + timedelta(days=int(day)) for day in codes], name=key)
+        if key == 'day_of_week':
+            return pd.CategoricalIndex(pd.Categorical.from_codes(codes, DAY_NAMES, ordered=True), name=key)
+        if key == 'hour_bucket':
+            return pd.Index(pd.to_datetime(codes * 3600, unit='s'), name=key)
+        return pd.Index(codes, name=key)
+
+    def aggregate(self, by, sentiments=None, types=None):
+        """Roll the cube up to the dimensions in ``by``.
+
+        ``by`` may combine 'subreddit', 'sentiment', 'type' and one time key
+        ('hour', 'date', 'day_of_week' or 'hour_bucket'). ``sentiments`` and
+        ``types`` restrict the cells that are summed. Returns a DataFrame of
+        count, score_sum and score_sq with one row per non-empty group.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        time_keys = [key for key in by if key in TIME_KEYS]
+        if len(time_keys) > 1:
+            raise ValueError("Only one time dimension can be used per aggregation")
+
+        subreddit, hours, sentiment, record_type = self._cells()
+        mask = self.count > 0
+        if sentiments is not None:
+            mask &= np.isin(sentiment, [SENTIMENT_CATEGORIES.index(s) for s in sentiments])
+        if types is not None:
+            mask &= np.isin(record_type, [TYPE_CATEGORIES.index(t) for t in types])
+
+        columns = {'subreddit': subreddit[mask], 'sentiment': sentiment[mask], 'type': record_type[mask]}
+        if time_keys:
+            columns[time_keys[0]] = self._time_labels(time_keys[0], hours[mask])
+        count, score_sum, score_sq = self.count[mask], self.score_sum[mask], self.score_sq[mask]
+
+        # Group the occupied cells by the requested dimensions
+        group_keys = np.stack([columns[key] for key in by]) if by else np.zeros((1, len(count)), dtype=np.int64)
+        groups, inverse = np.unique(group_keys, axis=1, return_inverse=True)
+        inverse = inverse.ravel()
+        n_groups = groups.shape[1]
+
+        if len(by) == 1:
+            index = self._label_values(by[0], groups[0])
+        else:
+            index = pd.MultiIndex.from_arrays(
+                [self._label_values(key, groups[i]) for i, key in enumerate(by)], names=by
+            )
+
+        result = pd.DataFrame({
+            'count': np.bincount(inverse, weights=count, minlength=n_groups).astype(np.int64),
+            'score_sum': np.bincount(inverse, weights=score_sum, minlength=n_groups).astype(np.int64),
+            'score_sq': np.bincount(inverse, weights=score_sq, minlength=n_groups)
+        }, index=index)
+        return result.sort_index()
+
+    def counts(self, by, **filters):
+        """Record counts per group, like ``groupby(by).size()``."""
+        return self.aggregate(by, **filters)['count'].rename(None)
+
+    def summary(self, by):
+        """Count, score mean/sum/std and positive share per group."""
+        totals = self.aggregate(by)
+        positive = self.aggregate(by, sentiments=['positive'])['count']
+        positive = positive.reindex(totals.index, fill_value=0)
+
+        n = totals['count'].astype(np.float64)
+        mean = totals['score_sum'] / n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = (totals['score_sq'] - n * mean ** 2) / (n - 1)
+
+        return pd.DataFrame({
+            'count': totals['count'],
+            'avg_score': mean,
+            'total_score': totals['score_sum'],
+            'std_score': np.sqrt(variance.clip(lower=0)),
+            'positive_pct': positive / n * 100
+        }, index=totals.index)
+
+    def date_range(self):
+        """First and last date with any activity."""
+        hours = self._cells()[1][self.count > 0]
+        if len(hours) == 0:
+            return None, None
+        return (EPOCH_DATE + timedelta(days=int(hours.min() // 24)),
+                EPOCH_DATE + timedelta(days=int(hours.max() // 24)))
@@ -4,40 +4,40 @@ from datetime import datetime, timedelta
 from collections import defaultdict, Counter
 import matplotlib.pyplot as plt
 import seaborn as sns
+from .analysis_frame import as_analysis_frame
+from .keyword_matcher import KeywordMatcher
+from .online_trends import OnlineTrendEngine
+from .time_cube import TimeCube
 
 class TrendAnalyzer:
     def __init__(self):
         """Initialize trend analyzer for Reddit data."""
         pass
     
-    def analyze_temporal_patterns(self, results):
+    def analyze_temporal_patterns(self, results, cube=None):
         """Analyze temporal patterns in Reddit data."""
-        df = pd.DataFrame(results)
-        df['created_utc'] = pd.to_datetime(df['created_utc'])
-        df['hour'] = df['created_utc'].dt.hour
-        df['day_of_week'] = df['created_utc'].dt.day_name()
-        df['date'] = df['created_utc'].dt.date
+        if cube is None:
+            cube = TimeCube.from_frame(results)
         
         patterns = {
-            'hourly_activity': df.groupby('hour').size(),
-            'daily_activity': df.groupby('day_of_week').size(),
-            'date_activity': df.groupby('date').size(),
-            'hourly_sentiment': df.groupby(['hour', 'sentiment']).size().unstack(fill_value=0),
-            'daily_sentiment': df.groupby(['day_of_week', 'sentiment']).size().unstack(fill_value=0)
+            'hourly_activity': cube.counts('hour'),
+            'daily_activity': cube.counts('day_of_week'),
+            'date_activity': cube.counts('date'),
+            'hourly_sentiment': cube.counts(['hour', 'sentiment']).unstack(fill_value=0),
+            'daily_sentiment': cube.counts(['day_of_week', 'sentiment']).unstack(fill_value=0)
         }
         
         return patterns
     
     def detect_trending_periods(self, results, window_hours=6):
         """Detect periods of high activity (trending periods)."""
-        df = pd.DataFrame(results)
-        df['created_utc'] = pd.to_datetime(df['created_utc'])
+        df = as_analysis_frame(results)
         
         # Create time windows
-        df['time_window'] = df['created_utc'].dt.floor(f'{window_hours}H')
+        time_window = df['created_utc'].dt.floor(f'{window_hours}h').rename('time_window')
         
         # Count activity per window
-        window_activity = df.groupby('time_window').agg({
+        window_activity = df.groupby(time_window).agg({
             'score': ['count', 'sum', 'mean'],
             'sentiment': lambda x: (x == 'positive').mean()
         }).round(3)
@@ -50,44 +50,69 @@ class TrendAnalyzer:
         
         return trending_periods.sort_values('post_count', ascending=False)
     
+    def detect_bursts(self, results, keywords=None, window_hours=6, engine=None):
+        """Replay records in time order through an OnlineTrendEngine and return its alerts.
+        
+        Pass an existing ``engine`` (e.g. one restored from a snapshot) to
+        continue a live stream instead of starting from scratch.
+        """
+        df = as_analysis_frame(results).sort_values('timestamp', kind='stable')
+        if engine is None:
+            engine = OnlineTrendEngine(window_hours=window_hours, keywords=keywords)
+        
+        alerts = []
+        columns = ['timestamp', 'score', 'sentiment', 'subreddit', 'text', 'title']
+        for values in zip(*(df[column].tolist() for column in columns)):
+            alerts.extend(engine.update(dict(zip(columns, values))))
+        alerts.extend(engine.flush())
+        
+        return alerts
+    
     def analyze_keyword_trends(self, results, keywords):
         """Analyze how specific keywords trend over time."""
-        df = pd.DataFrame(results)
-        df['created_utc'] = pd.to_datetime(df['created_utc'])
-        df['date'] = df['created_utc'].dt.date
+        df = as_analysis_frame(results)
         
         # Combine text fields for keyword search
-        df['full_text'] = (df['text'].fillna('') + ' ' + 
-                          df.get('title', df.get('post_title', '')).fillna('')).str.lower()
+        full_text = (df['text'] + ' ' + df['title']).tolist()
+        
+        # One Aho-Corasick pass finds every whole-word mention of every keyword
+        matcher = KeywordMatcher(keywords)
+        mentions = matcher.incidence_matrix(full_text).tocoo()
         
         keyword_trends = {}
+        if mentions.nnz == 0:
+            return keyword_trends
+        
+        # One row per (record, keyword) mention, aggregated for all keywords at once
+        rows = mentions.row
+        keyword_data = pd.DataFrame({
+            'keyword': mentions.col,
+            'date': df['date'].values[rows],
+            'score': df['score'].values[rows],
+            'positive': (df['sentiment'] == 'positive').values[rows]
+        })
+        daily_mentions = keyword_data.groupby(['keyword', 'date'], observed=True).agg(
+            mentions=('score', 'count'),
+            avg_score=('score', 'mean'),
+            total_score=('score', 'sum'),
+            positive_ratio=('positive', 'mean')
+        ).round(3)
         
         for keyword in keywords:
-            # Find posts/comments containing the keyword
-            keyword_mask = df['full_text'].str.contains(keyword.lower(), na=False)
-            keyword_data = df[keyword_mask]
-            
-            if len(keyword_data) > 0:
-                daily_mentions = keyword_data.groupby('date').agg({
-                    'score': ['count', 'mean', 'sum'],
-                    'sentiment': lambda x: (x == 'positive').mean()
-                }).round(3)
-                
-                daily_mentions.columns = ['mentions', 'avg_score', 'total_score', 'positive_ratio']
-                keyword_trends[keyword] = daily_mentions
+            column = matcher.column(keyword)
+            if column is not None and column in daily_mentions.index.get_level_values('keyword'):
+                keyword_trends[keyword] = daily_mentions.xs(column, level='keyword')
         
         return keyword_trends
     
     def calculate_engagement_velocity(self, results):
         """Calculate engagement velocity - how quickly posts gain engagement."""
-        posts = [r for r in results if r['type'] == 'post']
+        frame = as_analysis_frame(results)
+        df = frame[frame['type'] == 'post'].copy()
         
-        if not posts:
+        if df.empty:
             return {}
         
-        df = pd.DataFrame(posts)
-        df['created_utc'] = pd.to_datetime(df['created_utc'])
-        
         # Calculate time since posting (assuming current time as reference)
         current_time = datetime.now()
         df['hours_since_post'] = (current_time - df['created_utc']).dt.total_seconds() / 3600
@@ -105,49 +130,93 @@ class TrendAnalyzer:
         
         return velocity_stats
     
-    def analyze_subreddit_trends(self, results):
-        """Analyze trending patterns across different subreddits."""
-        df = pd.DataFrame(results)
-        df['created_utc'] = pd.to_datetime(df['created_utc'])
-        df['date'] = df['created_utc'].dt.date
-        
-        # Subreddit activity over time
-        subreddit_trends = df.groupby(['subreddit', 'date']).agg({
-            'score': ['count', 'mean', 'sum'],
-            'sentiment': lambda x: (x == 'positive').mean()
-        }).round(3)
+    def analyze_subreddit_trends(self, results, min_days=2, min_activity=0, daily=None):
+        """Analyze trending patterns across different subreddits.
+        
+        Momentum is fitted for every subreddit at once with grouped
+        closed-form least squares. Subreddits active on fewer than
+        ``min_days`` days or with fewer than ``min_activity`` posts/comments
+        in total are left out. ``daily`` takes a precomputed per
+        subreddit/day table such as ``ResultStore.subreddit_daily()``.
+        ``activity_trend`` is the change in daily posts/comments per day.
+        """
+        if daily is None:
+            df = as_analysis_frame(results)
+            day = (df['timestamp'] // 86400).rename('day')
+            
+            # Subreddit activity over time
+            daily = df.groupby(['subreddit', day], observed=True).agg({
+                'score': ['count', 'mean', 'sum'],
+                'sentiment': lambda x: (x == 'positive').mean()
+            }).round(3)
+            daily.columns = ['daily_posts', 'avg_score', 'total_score', 'positive_ratio']
+        subreddit_trends = daily
+        
+        if subreddit_trends.empty:
+            return {}
         
-        subreddit_trends.columns = ['daily_posts', 'avg_score', 'total_score', 'positive_ratio']
+        # Per-group sums for the least-squares slope of daily_posts over time (per day)
+        codes = subreddit_trends.index.codes[0]
+        names = subreddit_trends.index.levels[0]
+        n_groups = len(names)
+        x = subreddit_trends.index.get_level_values('day').to_numpy(dtype=np.float64)
+        y = subreddit_trends['daily_posts'].to_numpy(dtype=np.float64)
+        
+        days = np.bincount(codes, minlength=n_groups)
+        totals = np.bincount(codes, weights=y, minlength=n_groups)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_mean = np.bincount(codes, weights=x, minlength=n_groups) / days
+            y_mean = totals / days
+            dx = x - x_mean[codes]
+            dy = y - y_mean[codes]
+            slopes = (np.bincount(codes, weights=dx * dy, minlength=n_groups) /
+                      np.bincount(codes, weights=dx * dx, minlength=n_groups))
+            avg_sentiment = np.bincount(
+                codes, weights=subreddit_trends['positive_ratio'].to_numpy(dtype=np.float64), minlength=n_groups
+            ) / days
+        peaks = np.zeros(n_groups, dtype=np.int64)
+        np.maximum.at(peaks, codes, subreddit_trends['daily_posts'].to_numpy())
         
         # Calculate trend momentum for each subreddit
+        keep = (days >= max(min_days, 2)) & (totals >= min_activity)
         subreddit_momentum = {}
         
-        for subreddit in df['subreddit'].unique():
-            subreddit_data = subreddit_trends.xs(subreddit, level='subreddit')
-            
-            if len(subreddit_data) > 1:
-                # Calculate linear trend in activity
-                dates_numeric = pd.to_datetime(subreddit_data.index).astype(int) / 10**9
-                activity_trend = np.polyfit(dates_numeric, subreddit_data['daily_posts'], 1)[0]
-                
-                subreddit_momentum[subreddit] = {
-                    'activity_trend': activity_trend,
-                    'total_activity': subreddit_data['daily_posts'].sum(),
-                    'avg_daily_activity': subreddit_data['daily_posts'].mean(),
-                    'peak_activity': subreddit_data['daily_posts'].max(),
-                    'avg_sentiment': subreddit_data['positive_ratio'].mean()
-                }
+        for i in np.flatnonzero(keep):
+            subreddit_momentum[names[i]] = {
+                'activity_trend': slopes[i],
+                'total_activity': int(totals[i]),
+                'avg_daily_activity': y_mean[i],
+                'peak_activity': peaks[i],
+                'avg_sentiment': avg_sentiment[i]
+            }
         
         return subreddit_momentum
     
+    def analyze_history(self, store, min_days=2, min_activity=0, **filters):
+        """Temporal patterns and subreddit momentum over everything in a ResultStore.
+        
+        Aggregation runs as SQL GROUP BY inside the store; ``filters`` are
+        ``subreddits``, ``since``, ``until`` and ``sentiments``.
+        """
+        return {
+            'temporal_patterns': self.analyze_temporal_patterns(None, cube=store.time_cube(**filters)),
+            'subreddit_trends': self.analyze_subreddit_trends(
+                None, min_days=min_days, min_activity=min_activity, daily=store.subreddit_daily(**filters)
+            )
+        }
+    
     def generate_trend_report(self, results, keywords=None):
         """Generate a comprehensive trend analysis report."""
         print("="*80)
         print("REDDIT TREND ANALYSIS REPORT")
         print("="*80)
         
+        # Build the shared frame and aggregation cube once for every stage below
+        results = as_analysis_frame(results)
+        cube = TimeCube.from_frame(results)
+        
         # Temporal patterns
-        patterns = self.analyze_temporal_patterns(results)
+        patterns = self.analyze_temporal_patterns(results, cube=cube)
         
         print("\n1. TEMPORAL ACTIVITY PATTERNS")
         print("-" * 40)
@@ -213,10 +282,25 @@ class TrendAnalyzer:
             print(f"  r/{subreddit}: trend={data['activity_trend']:.3f}, "
                   f"avg_daily={data['avg_daily_activity']:.1f}")
         
+        # Burst and sentiment-shift alerts
+        burst_alerts = self.detect_bursts(results, keywords)
+        
+        print(f"\n6. BURST & SENTIMENT-SHIFT ALERTS")
+        print("-" * 40)
+        
+        if burst_alerts:
+            for alert in burst_alerts[:10]:
+                print(f"  [{alert['type']}] {alert['key']} at {alert['window_start']}: "
+                      f"{alert['count']} posts/comments (expected {alert['expected_count']:.1f}), "
+                      f"z={alert['z_score']:.2f}")
+        else:
+            print("  No bursts detected")
+        
         return {
             'temporal_patterns': patterns,
             'trending_periods': trending_periods,
             'keyword_trends': keyword_trends if keywords else {},
             'velocity_stats': velocity_stats,
-            'subreddit_momentum': subreddit_momentum
+            'subreddit_momentum': subreddit_momentum,
+            'burst_alerts': burst_alerts
         }
@@ -0,0 +1,90 @@
+import os
+import json
+import string
+from collections import Counter
+from config.config import WORDCLOUD_LAYOUT_PATH
+
+_PUNCTUATION = str.maketrans('', '', string.punctuation)
+
+
+def tokenize(text, stop_words=()):
+    """Lower-cased words without punctuation, stopwords, digits or words under 3 chars."""
+    words = (text or '').lower().translate(_PUNCTUATION).split()
+    return [word for word in words
+            if word not in stop_words
+            and len(word) > 2
+            and not word.isdigit()]
+
+
+def count_words(texts, stop_words=(), counter=None):
+    """Count words across texts one record at a time.
+
+    ``counter`` may be a ``Counter`` (exact, the default) or a
+    ``SpaceSaving`` sketch for bounded memory on large corpora.
+    """
+    if counter is None:
+        counter = Counter()
+    for text in texts:
+        counter.update(tokenize(text, stop_words))
+    return counter
+
+
+def as_frequencies(source, max_words=100):
+    """Top ``max_words`` {word: count} from a Counter, SpaceSaving, dict or
+    ``extract_top_keywords`` style list of (count, word) pairs."""
+    if hasattr(source, 'most_common'):
+        return dict(source.most_common(max_words))
+    if isinstance(source, dict):
+        return dict(Counter(source).most_common(max_words))
+    return dict(Counter({word: count for count, word in source}).most_common(max_words))
+
+
+def frequency_distance(a, b):
+    """Total variation distance between two normalized frequency tables (0 = identical, 1 = disjoint)."""
+    total_a = sum(a.values()) or 1
+    total_b = sum(b.values()) or 1
+    words = set(a) | set(b)
+    return 0.5 * sum(abs(a.get(word, 0) / total_a - b.get(word, 0) / total_b) for word in words)
+
+
+class WordCloudLayoutCache:
+    def __init__(self, path=WORDCLOUD_LAYOUT_PATH, tolerance=0.05):
+        """Persisted word cloud layout reused while word frequencies barely change.
+
+        Laying out a word cloud (collision search for every word) dominates
+        its cost. If the new frequencies are within ``tolerance`` total
+        variation distance of the ones the stored layout was computed for,
+        the stored layout is drawn again instead.
+        """
+        self.path = path
+        self.tolerance = tolerance
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading word cloud layout: {e}")
+            return None
+
+    def get(self, frequencies, settings):
+        """Stored layout for these frequencies and WordCloud settings, or None."""
+        cached = self._load()
+        if cached is None or cached['settings'] != settings:
+            return None
+        if frequency_distance(cached['frequencies'], frequencies) > self.tolerance:
+            return None
+        return [((word, count), font_size, tuple(position), orientation, color)
+                for (word, count), font_size, position, orientation, color in cached['layout']]
+
+    def put(self, frequencies, settings, layout):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'settings': settings, 'frequencies': frequencies, 'layout': layout}, f,
+                      ensure_ascii=False, default=int)
+        os.replace(tmp_path, self.path)